@@ -23,10 +23,11 @@
 from __future__ import absolute_import
 
 
-from .qProf_main import qProf_main
+def classFactory(iface):
 
+    # the GUI is imported only when QGIS loads the plugin, so that qProf_batch can run without it
 
-def classFactory(iface):
+    from .qProf_main import qProf_main
 
     # create qgSurf_gui class   
     return qProf_main(iface)
@@ -1,3 +1,20 @@
 
+# topographic profiles from DEMs are created in chunks of points, within a memory budget
+profile_chunk_num_pts = 65536  # points densified and sampled at a time
+profile_memory_budget = 512 * 1024 * 1024  # memory available for the created profiles, in bytes
 
-pt_num_threshold = 10000
\ No newline at end of file
+# DEM tile cache shared by all profiles and analysis steps
+dem_tile_size = 256  # rows and columns of a cached DEM tile
+dem_cache_max_bytes = 256 * 1024 * 1024  # memory budget of the DEM tile cache
+
+# parallel creation of topographic profiles from DEMs
+profile_max_workers = 4  # default number of worker threads (1: sequential creation)
+
+# DEM-plane intersections are calculated in chunks of grid rows
+grid_chunk_num_cells = 4 * 1024 * 1024  # maximum number of cells processed at a time
+
+# parallel intersection of multiple geological planes with a DEM
+plane_dem_max_workers = 4  # default number of worker processes (1: sequential calculation)
+
+# off-screen export of profile figures, one file per profile or set of profiles
+figure_export_max_workers = 4  # default number of worker processes (1: sequential export)
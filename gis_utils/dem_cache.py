@@ -0,0 +1,189 @@
+from builtins import object
+
+from collections import OrderedDict
+import threading
+
+from ..config.settings import dem_tile_size, dem_cache_max_bytes
+
+
+class DEMTileCache(object):
+    """
+    Process-wide cache of DEM tiles, with least-recently-used eviction.
+    Tiles are keyed by (layer id, band, tile row, tile column),
+    so that the same DEM area is decoded once and then shared
+    by all profiles and analysis steps using it.
+    """
+
+    def __init__(self, max_bytes, tile_size):
+        """
+        :param max_bytes: memory budget of the cache, in bytes
+        :param tile_size: number of rows and columns of a tile
+        """
+
+        self._max_bytes = int(max_bytes)
+        self._tile_size = int(tile_size)
+
+        self._tiles = OrderedDict()
+        self._size_bytes = 0
+
+        self._pending_reads = dict()
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def tile_size(self):
+
+        return self._tile_size
+
+    @property
+    def max_bytes(self):
+
+        return self._max_bytes
+
+    @property
+    def size_bytes(self):
+
+        return self._size_bytes
+
+    @property
+    def num_tiles(self):
+
+        return len(self._tiles)
+
+    def set_max_bytes(self, max_bytes):
+        """
+        Change the memory budget, evicting tiles if required.
+
+        :param max_bytes: int
+        :return: None
+        """
+
+        with self._lock:
+            self._max_bytes = int(max_bytes)
+            self._evict()
+
+    def set_tile_size(self, tile_size):
+        """
+        Change the tile size. Cached tiles are discarded.
+
+        :param tile_size: int
+        :return: None
+        """
+
+        with self._lock:
+            self._tile_size = int(tile_size)
+            self.clear()
+
+    def tile(self, key, read_tile):
+        """
+        Return the cached tile with the given key,
+        reading it with the provided function when missing.
+
+        :param key: tuple (layer id, band, tile row, tile column)
+        :param read_tile: function with no arguments returning the tile as a 2D numpy.array
+        :return: 2D numpy.array
+        """
+
+        with self._lock:
+            tile = self._cached_tile(key)
+            if tile is not None:
+                return tile
+            pending_read = self._pending_reads.get(key)
+            if pending_read is None:
+                pending_read = self._pending_reads[key] = threading.Event()
+                reader = True
+            else:
+                reader = False
+
+        # another thread is already reading the same tile
+
+        if not reader:
+            pending_read.wait()
+            with self._lock:
+                tile = self._cached_tile(key)
+            if tile is not None:
+                return tile
+
+        # the tile is read outside the lock, so that different tiles can be read in parallel
+
+        try:
+            tile = read_tile()
+            tile.setflags(write=False)
+            with self._lock:
+                self.misses += 1
+                if key not in self._tiles:
+                    self._tiles[key] = tile
+                    self._size_bytes += tile.nbytes
+                    self._evict()
+        finally:
+            if reader:
+                with self._lock:
+                    del self._pending_reads[key]
+                pending_read.set()
+
+        return tile
+
+    def _cached_tile(self, key):
+
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            self.hits += 1
+
+        return tile
+
+    def _evict(self):
+
+        while self._size_bytes > self._max_bytes and len(self._tiles) > 0:
+            _, tile = self._tiles.popitem(last=False)
+            self._size_bytes -= tile.nbytes
+            self.evictions += 1
+
+    def remove_layer(self, layer_id):
+        """
+        Discard all the tiles of a layer.
+
+        :param layer_id: str
+        :return: None
+        """
+
+        with self._lock:
+            for key in [key for key in self._tiles if key[0] == layer_id]:
+                self._size_bytes -= self._tiles.pop(key).nbytes
+
+    def clear(self):
+
+        with self._lock:
+            self._tiles.clear()
+            self._size_bytes = 0
+
+    def reset_counters(self):
+
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def statistics(self):
+        """
+        Return the cache usage counters.
+
+        :return: dict
+        """
+
+        with self._lock:
+            requests = self.hits + self.misses
+            return dict(hits=self.hits,
+                        misses=self.misses,
+                        evictions=self.evictions,
+                        hit_ratio=float(self.hits) / requests if requests > 0 else 0.0,
+                        tiles=len(self._tiles),
+                        size_bytes=self._size_bytes,
+                        max_bytes=self._max_bytes,
+                        tile_size=self._tile_size)
+
+
+dem_tile_cache = DEMTileCache(dem_cache_max_bytes, dem_tile_size)
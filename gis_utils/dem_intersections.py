@@ -0,0 +1,154 @@
+from builtins import zip
+
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..gsf.geometry import Point, GPlane
+
+from .features import ArrayMultiLine
+from .intersections import Intersections
+
+from ..config.settings import plane_dem_max_workers
+
+
+# DEM grid of the current worker process, set once by the pool initializer
+_worker_grid = None
+
+
+def intersection_networks(grid, src_pt, plane_attitude):
+    """
+    Intersect a plane with a DEM grid and connect the intersections into networks,
+    i.e. the outcrop traces of the plane.
+
+    :param grid: Grid
+    :param src_pt: Point, on the plane
+    :param plane_attitude: GPlane
+    :return: ArrayMultiLine, with a part for each network
+    """
+
+    plane_coeffs = grid.plane_coefficients(src_pt, plane_attitude)
+    if plane_coeffs is None:
+        return ArrayMultiLine()
+
+    xcoords_x, xcoords_y, ycoords_x, ycoords_y = grid.intersection_with_surface('plane', src_pt, plane_attitude)
+
+    intersections = Intersections()
+    intersections.xcoords_x, intersections.xcoords_y = xcoords_x, xcoords_y
+    intersections.ycoords_x, intersections.ycoords_y = ycoords_x, ycoords_y
+
+    intersections.links = intersections.get_intersections()
+    intersections.neighbours = intersections.set_neighbours()
+    intersections.define_paths()
+    intersections.networks = intersections.define_networks()
+
+    networks = list(intersections.networks.values())
+    if not networks:
+        return ArrayMultiLine()
+
+    # coordinates of the network intersections, from the x- or y-direction arrays
+
+    link_ndxs = np.concatenate(networks).astype(np.int64) - 1
+    link_is = intersections.links['i'][link_ndxs]
+    link_js = intersections.links['j'][link_ndxs]
+    along_x = intersections.links['pi_dir'][link_ndxs] == 'x'
+
+    xs = np.where(along_x, xcoords_x[link_is, link_js], ycoords_x[link_is, link_js])
+    ys = np.where(along_x, xcoords_y[link_is, link_js], ycoords_y[link_is, link_js])
+
+    plane_x_coeff, plane_y_coeff, plane_const = plane_coeffs
+    zs = plane_x_coeff * xs + plane_y_coeff * ys + plane_const
+
+    part_offsets = np.concatenate(([0], np.cumsum([len(network) for network in networks])))
+
+    return ArrayMultiLine(xs, ys, zs, part_offsets=part_offsets)
+
+
+def plane_window_networks(grid, src_x, src_y, src_z, dip_dir, dip_angle, window_radius=None):
+    """
+    Intersection networks of a plane with the DEM window around its source point.
+
+    :param grid: Grid
+    :param src_x: float
+    :param src_y: float
+    :param src_z: float
+    :param dip_dir: float, plane dip direction
+    :param dip_angle: float, plane dip angle
+    :param window_radius: float, half side of the DEM window, or None for the whole DEM
+    :return: ArrayMultiLine
+    """
+
+    if window_radius is not None:
+        grid = grid.window(src_x, src_y, window_radius)
+        if grid is None:
+            return ArrayMultiLine()
+
+    return intersection_networks(grid, Point(src_x, src_y, src_z), GPlane(dip_dir, dip_angle))
+
+
+def _init_plane_worker(grid):
+    """
+    Keep the DEM grid in the worker process, read-only.
+    The workers are forked, so the grid memory is shared with the main process.
+
+    :param grid: Grid
+    """
+
+    global _worker_grid
+
+    grid.data.flags.writeable = False
+    _worker_grid = grid
+
+
+def _worker_plane_networks(plane_record):
+
+    return plane_window_networks(_worker_grid, *plane_record)
+
+
+def planes_intersection_networks(
+        grid,
+        src_xs,
+        src_ys,
+        src_zs,
+        dip_dirs,
+        dip_angles,
+        window_radius=None,
+        num_workers=plane_dem_max_workers
+):
+    """
+    Intersect many geological planes with a DEM.
+    On Linux the planes are distributed among a pool of forked worker processes.
+    Elsewhere (and within QGIS on Windows and macOS) new processes would not start a Python interpreter,
+    and the planes are intersected sequentially.
+    Each plane is intersected with the DEM window around its source point.
+    The results are in the same order as the planes.
+
+    :param grid: Grid, the DEM
+    :param src_xs: array-like of float
+    :param src_ys: array-like of float
+    :param src_zs: array-like of float
+    :param dip_dirs: array-like of float
+    :param dip_angles: array-like of float
+    :param window_radius: float, half side of the DEM windows, or None for the whole DEM
+    :param num_workers: number of worker processes (1: sequential calculation)
+    :return: list of ArrayMultiLine, the intersection networks of each plane
+    """
+
+    plane_records = [(float(src_x), float(src_y), float(src_z), float(dip_dir), float(dip_angle), window_radius)
+                     for (src_x, src_y, src_z, dip_dir, dip_angle) in
+                     zip(src_xs, src_ys, src_zs, dip_dirs, dip_angles)]
+
+    if num_workers <= 1 or len(plane_records) <= 1 or not sys.platform.startswith('linux'):
+        return [plane_window_networks(grid, *plane_record) for plane_record in plane_records]
+
+    chunksize = max(len(plane_records) // (4 * num_workers), 1)
+
+    with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_plane_worker,
+            initargs=(grid,)) as executor:
+
+        return list(executor.map(_worker_plane_networks, plane_records, chunksize=chunksize))
@@ -0,0 +1,131 @@
+from builtins import range
+
+import numpy as np
+
+from .dem_cache import dem_tile_cache
+
+
+def tiled_cell_values(layer_id, dem_params, rows, cols, read_block, band=1):
+    """
+    Return the values of the DEM cells with the given (row, col) indices.
+    Row indices increase northward, starting from the southernmost row.
+    Only the tiles containing the cells are read, each one
+    through the process-wide DEM tile cache.
+    Tiles at the northern and eastern DEM borders can be smaller than the others.
+
+    :param layer_id: str, identifier of the DEM in the tile cache
+    :param dem_params: DEM parameters, with rows and cols attributes
+    :param rows: numpy.array of int
+    :param cols: numpy.array of int
+    :param read_block: function (row_min, row_max, col_min, col_max, band) returning the cell values
+     as a 2D numpy.array, indexed by (row - row_min, col - col_min)
+    :param band: int
+    :return: numpy.array of float
+    """
+
+    values = np.full(rows.shape, np.nan)
+
+    if rows.size == 0:
+        return values
+
+    tile_size = dem_tile_cache.tile_size
+
+    tile_rows, tile_cols = rows // tile_size, cols // tile_size
+    tile_ids = tile_rows * (dem_params.cols // tile_size + 1) + tile_cols
+
+    # group the cells by tile, so that each tile is accessed once
+
+    _, tile_ndxs = np.unique(tile_ids, return_inverse=True)
+    cell_order = np.argsort(tile_ndxs, kind='stable')
+    tile_bounds = np.cumsum(np.bincount(tile_ndxs))[:-1]
+
+    for tile_cells in np.split(cell_order, tile_bounds):
+
+        tile_row, tile_col = tile_rows[tile_cells[0]], tile_cols[tile_cells[0]]
+
+        row_min, col_min = tile_row * tile_size, tile_col * tile_size
+        row_max = min(row_min + tile_size, dem_params.rows) - 1
+        col_max = min(col_min + tile_size, dem_params.cols) - 1
+
+        tile = dem_tile_cache.tile(
+            (layer_id, band, tile_row, tile_col),
+            lambda: read_block(row_min, row_max, col_min, col_max, band))
+
+        values[tile_cells] = tile[rows[tile_cells] - row_min,
+                                  cols[tile_cells] - col_min]
+
+    return values
+
+
+def bilinear_zs(dem_params, xs, ys, cell_values):
+    """
+    Interpolate the z values of many points at once.
+    Bilinear interpolation is applied to points within the area
+    defined by the extreme cell centers, the cell value to points
+    on the remaining border of the DEM, while points outside the DEM get nan.
+    Assume grid has no rotation.
+
+    :param dem_params: DEM parameters, with xMin, xMax, yMin, yMax, cellsizeEW, cellsizeNS, rows and cols attributes
+    :param xs: array-like of float, in the DEM CRS
+    :param ys: array-like of float, in the DEM CRS
+    :param cell_values: function (rows, cols) returning the values of the DEM cells
+    :return: numpy.array of float
+    """
+
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+
+    zs = np.full(xs.shape, np.nan)
+
+    half_cell_x = dem_params.cellsizeEW / 2.0
+    half_cell_y = dem_params.cellsizeNS / 2.0
+
+    with np.errstate(invalid='ignore'):
+
+        in_interpolation_area = \
+            (dem_params.xMin + half_cell_x <= xs) & (xs <= dem_params.xMax - half_cell_x) & \
+            (dem_params.yMin + half_cell_y <= ys) & (ys <= dem_params.yMax - half_cell_y)
+
+        in_dem_border = \
+            (dem_params.xMin <= xs) & (xs <= dem_params.xMax) & \
+            (dem_params.yMin <= ys) & (ys <= dem_params.yMax) & \
+            np.logical_not(in_interpolation_area)
+
+    # raster coordinates of the points to interpolate
+
+    raster_x = (xs[in_interpolation_area] - (dem_params.xMin + half_cell_x)) / dem_params.cellsizeEW
+    raster_y = (ys[in_interpolation_area] - (dem_params.yMin + half_cell_y)) / dem_params.cellsizeNS
+
+    floor_x, ceil_x = np.floor(raster_x).astype(np.int64), np.ceil(raster_x).astype(np.int64)
+    floor_y, ceil_y = np.floor(raster_y).astype(np.int64), np.ceil(raster_y).astype(np.int64)
+
+    # cells containing the border points
+
+    border_cols = np.clip(
+        np.floor((xs[in_dem_border] - dem_params.xMin) / dem_params.cellsizeEW).astype(np.int64),
+        0,
+        dem_params.cols - 1)
+    border_rows = np.clip(
+        np.floor((ys[in_dem_border] - dem_params.yMin) / dem_params.cellsizeNS).astype(np.int64),
+        0,
+        dem_params.rows - 1)
+
+    # read all the required cell values together
+
+    values = cell_values(
+        np.concatenate((floor_y, floor_y, ceil_y, ceil_y, border_rows)),
+        np.concatenate((floor_x, ceil_x, floor_x, ceil_x, border_cols)))
+
+    num_interp = raster_x.size
+    z1, z2, z3, z4 = [values[ndx * num_interp: (ndx + 1) * num_interp] for ndx in range(4)]
+
+    delta_x = raster_x - floor_x
+    delta_y = raster_y - floor_y
+
+    z_x_a = z1 + (z2 - z1) * delta_x
+    z_x_b = z3 + (z4 - z3) * delta_x
+
+    zs[in_interpolation_area] = z_x_a + (z_x_b - z_x_a) * delta_y
+    zs[in_dem_border] = values[4 * num_interp:]
+
+    return zs
@@ -373,20 +373,9 @@ class Line(object):
         """
 
         assert sample_distance > 0.0
+        assert self.num_pts > 1
 
-        segments = self.as_segments()
-
-        densified_line_list = [segment.densify_2d_segment(sample_distance) for segment in segments]
-
-        assert len(densified_line_list) > 0
-
-        densifyied_multiline = MultiLine(densified_line_list)
-
-        densifyied_line = densifyied_multiline.to_line()
-
-        densifyied_line_wo_coinc_pts = densifyied_line.remove_coincident_points()
-
-        return densifyied_line_wo_coinc_pts
+        return ArrayLine.from_line(self).densify_2d_line(sample_distance).to_line()
 
     def join(self, another):
         """
@@ -458,12 +447,9 @@ class Line(object):
 
     def crs_project(self, srcCrs, destCrs):
 
-        points = []
-        for point in self.pts:
-            destCrs_point = project_point(point, srcCrs, destCrs)
-            points.append(destCrs_point)
+        xs, ys = project_xy_arrays(self.x_list, self.y_list, srcCrs, destCrs)
 
-        return Line(points)
+        return Line([Point(x, y, point.z) for (x, y, point) in zip(xs, ys, self.pts)])
 
 
 class MultiLine(object):
@@ -557,9 +543,17 @@ class MultiLine(object):
 
     def crs_project(self, srcCrs, destCrs):
 
+        # all the points are projected together, and then split back into lines
+
+        points = [point for line in self.lines for point in line.pts]
+        xs, ys = project_xy_arrays([pt.x for pt in points], [pt.y for pt in points], srcCrs, destCrs)
+
         lines = []
+        ndx = 0
         for line in self.lines:
-            lines.append(line.crs_project(srcCrs, destCrs))
+            lines.append(Line([Point(x, y, point.z) for (x, y, point) in
+                               zip(xs[ndx:ndx + line.num_pts], ys[ndx:ndx + line.num_pts], line.pts)]))
+            ndx += line.num_pts
 
         return MultiLine(lines)
 
@@ -580,6 +574,682 @@ class MultiLine(object):
         return MultiLine(cleaned_lines)
 
 
+class ArrayLine(object):
+    """
+    A line stored as contiguous float64 arrays of x, y, z and t values
+    (struct-of-arrays), alternative to the Point list of Line.
+    Its methods are vectorized, so it is suited to long lines,
+    such as densified profile traces and GPX tracks.
+    """
+
+    def __init__(self, xs=None, ys=None, zs=None, ts=None):
+        """
+        Missing z and t values are set to nan.
+
+        :param xs: array-like of float
+        :param ys: array-like of float
+        :param zs: array-like of float, or None
+        :param ts: array-like of float, or None
+        """
+
+        if xs is None:
+            xs = []
+        if ys is None:
+            ys = []
+
+        self._xs = np.asarray(xs, dtype=np.float64)
+        self._ys = np.asarray(ys, dtype=np.float64)
+        self._zs = np.full(self._xs.shape, np.nan) if zs is None else np.asarray(zs, dtype=np.float64)
+        self._ts = np.full(self._xs.shape, np.nan) if ts is None else np.asarray(ts, dtype=np.float64)
+
+        assert self._xs.ndim == 1
+        assert self._xs.shape == self._ys.shape == self._zs.shape == self._ts.shape
+
+    @classmethod
+    def from_line(cls, line):
+        """
+        Create an ArrayLine from a Line instance.
+
+        :param line: Line
+        :return: ArrayLine
+        """
+
+        if line.num_pts == 0:
+            return cls()
+
+        values = np.array([pt.v for pt in line.pts], dtype=np.float64)
+
+        return cls(values[:, 0], values[:, 1], values[:, 2], values[:, 3])
+
+    def to_line(self):
+        """
+        Convert to a Line instance.
+
+        :return: Line
+        """
+
+        return Line([Point(x, y, z, t) for (x, y, z, t) in zip(self._xs, self._ys, self._zs, self._ts)])
+
+    @property
+    def xs(self):
+
+        return self._xs
+
+    @property
+    def ys(self):
+
+        return self._ys
+
+    @property
+    def zs(self):
+
+        return self._zs
+
+    @property
+    def ts(self):
+
+        return self._ts
+
+    @property
+    def num_pts(self):
+
+        return self._xs.size
+
+    @property
+    def pts(self):
+
+        return self.to_line().pts
+
+    def clone(self):
+
+        return ArrayLine(self._xs.copy(), self._ys.copy(), self._zs.copy(), self._ts.copy())
+
+    @property
+    def x_list(self):
+
+        return self._xs.tolist()
+
+    @property
+    def y_list(self):
+
+        return self._ys.tolist()
+
+    @property
+    def z_list(self):
+
+        return self._zs.tolist()
+
+    def xy_lists(self):
+
+        return self.x_list, self.y_list
+
+    @property
+    def x_min(self):
+
+        return np.nanmin(self._xs)
+
+    @property
+    def x_max(self):
+
+        return np.nanmax(self._xs)
+
+    @property
+    def y_min(self):
+
+        return np.nanmin(self._ys)
+
+    @property
+    def y_max(self):
+
+        return np.nanmax(self._ys)
+
+    @property
+    def z_min(self):
+
+        return np.nanmin(self._zs)
+
+    @property
+    def z_max(self):
+
+        return np.nanmax(self._zs)
+
+    def z_array(self):
+
+        return self._zs.copy()
+
+    @property
+    def z_mean(self):
+
+        return np.nanmean(self._zs)
+
+    @property
+    def z_var(self):
+
+        return np.nanvar(self._zs)
+
+    @property
+    def z_std(self):
+
+        return np.nanstd(self._zs)
+
+    def remove_coincident_points(self):
+        """
+        Remove coincident successive points.
+        As in Point.coincident, points with nan z values
+        are compared in 2D.
+
+        :return: ArrayLine instance
+        """
+
+        assert self.num_pts >= 2
+
+        with np.errstate(invalid='ignore'):
+            separated = (self.step_lengths_2d() > MIN_SEPARATION_THRESHOLD) | \
+                        (self.step_lengths_3d() > MIN_SEPARATION_THRESHOLD)
+
+        kept = np.concatenate(([True], separated))
+
+        return ArrayLine(self._xs[kept], self._ys[kept], self._zs[kept], self._ts[kept])
+
+    def step_lengths_2d(self):
+        """
+        Horizontal distances between successive points.
+
+        :return: numpy.array of float, with num_pts - 1 values
+        """
+
+        return np.hypot(np.diff(self._xs), np.diff(self._ys))
+
+    def step_lengths_3d(self):
+        """
+        Spatial distances between successive points.
+
+        :return: numpy.array of float, with num_pts - 1 values
+        """
+
+        return np.sqrt(np.diff(self._xs) ** 2 + np.diff(self._ys) ** 2 + np.diff(self._zs) ** 2)
+
+    @property
+    def length_3d(self):
+
+        return float(np.sum(self.step_lengths_3d()))
+
+    @property
+    def length_2d(self):
+
+        return float(np.sum(self.step_lengths_2d()))
+
+    def incremental_length_3d(self):
+
+        return np.concatenate(([0.0], np.cumsum(self.step_lengths_3d())))
+
+    def incremental_length_2d(self):
+
+        return np.concatenate(([0.0], np.cumsum(self.step_lengths_2d())))
+
+    def sub_line(self, start, end):
+        """
+        Return the points from start to end (excluded) as an ArrayLine
+        whose arrays are views of the line ones (no data copy).
+
+        :param start: int
+        :param end: int
+        :return: ArrayLine
+        """
+
+        return ArrayLine(self._xs[start:end], self._ys[start:end], self._zs[start:end], self._ts[start:end])
+
+    def _densify_2d_layout(self, sample_distance):
+        """
+        Layout of the densified line: index of the first densified point of each segment,
+        sample distance as a fraction of each segment length
+        and total number of densified points.
+        """
+
+        assert sample_distance > 0.0
+        assert self.num_pts > 1
+
+        lengths_2d = self.step_lengths_2d()
+
+        # number of points added inside each segment: the ones at sample distance multiples,
+        # excluding the segment end
+
+        num_inner_pts = np.zeros(lengths_2d.size, dtype=np.int64)
+        valid_segments = lengths_2d > 0.0
+        num_inner_pts[valid_segments] = np.ceil(lengths_2d[valid_segments] / sample_distance).astype(np.int64) - 1
+
+        # each segment contributes its start point and its inner points, the last vertex is added at the end
+
+        num_segment_pts = num_inner_pts + 1
+        segment_starts = np.cumsum(num_segment_pts) - num_segment_pts
+
+        fractions = np.zeros(lengths_2d.size)
+        fractions[valid_segments] = sample_distance / lengths_2d[valid_segments]
+
+        return segment_starts, fractions, int(np.sum(num_segment_pts)) + 1
+
+    def num_densified_2d_pts(self, sample_distance):
+        """
+        Number of points of the line densified with the provided sample distance,
+        before the removal of coincident points.
+
+        :param sample_distance: float
+        :return: int
+        """
+
+        return self._densify_2d_layout(sample_distance)[2]
+
+    def densified_2d_pts(self, sample_distance, start=0, end=None):
+        """
+        Points of the densified line with indices from start to end (excluded),
+        before the removal of coincident points.
+        Long lines can thus be densified in chunks.
+
+        :param sample_distance: float
+        :param start: int
+        :param end: int, or None for the end of the densified line
+        :return: ArrayLine instance
+        """
+
+        segment_starts, fractions, num_densified_pts = self._densify_2d_layout(sample_distance)
+
+        if end is None or end > num_densified_pts:
+            end = num_densified_pts
+
+        add_last_vertex = end == num_densified_pts
+        if add_last_vertex:
+            end -= 1
+
+        ndxs = np.arange(start, end)
+        segment_ndxs = np.searchsorted(segment_starts, ndxs, side='right') - 1
+        ndx_fractions = (ndxs - segment_starts[segment_ndxs]) * fractions[segment_ndxs]
+
+        def densify(values):
+
+            densified_values = values[segment_ndxs] + ndx_fractions * (values[segment_ndxs + 1] - values[segment_ndxs])
+
+            return np.append(densified_values, values[-1]) if add_last_vertex else densified_values
+
+        ts = self._ts[segment_ndxs]
+
+        return ArrayLine(densify(self._xs),
+                         densify(self._ys),
+                         densify(self._zs),
+                         np.append(ts, self._ts[-1]) if add_last_vertex else ts)
+
+    def densify_2d_line(self, sample_distance):
+        """
+        Densify the line, adding points separated by the sample distance
+        along each segment, as in Segment.densify_2d_segment.
+        All the original vertices are kept, and the points
+        are computed for all the segments at once.
+        Returned ArrayLine instance has coincident successive points removed.
+
+        :param sample_distance: float
+        :return: ArrayLine instance
+        """
+
+        return self.densified_2d_pts(sample_distance).remove_coincident_points()
+
+    def reverse_direction(self):
+
+        return ArrayLine(self._xs[::-1].copy(), self._ys[::-1].copy(), self._zs[::-1].copy(), self._ts[::-1].copy())
+
+    def delta_times(self):
+        """
+        Time differences between successive points.
+
+        :return: numpy.array of float, with num_pts - 1 values
+        """
+
+        return np.diff(self._ts)
+
+    def speeds(self):
+        """
+        Speeds between successive points, as in Point.speed:
+        infinite when the time difference is zero.
+
+        :return: numpy.array of float, with num_pts - 1 values
+        """
+
+        delta_times = self.delta_times()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            speeds = self.step_lengths_3d() / delta_times
+
+        speeds[delta_times == 0.0] = np.inf
+
+        return speeds
+
+    def slopes(self):
+        """
+        Slopes (as degrees) between successive points,
+        positive when upward. The slope value for the last point is unknown (nan),
+        as is the slope between coincident points.
+
+        :return: numpy.array of float
+        """
+
+        delta_zs = np.diff(self._zs)
+        lengths_2d = self.step_lengths_2d()
+
+        with np.errstate(invalid='ignore'):
+            slopes = np.degrees(np.arctan2(delta_zs, lengths_2d))
+            slopes[(lengths_2d == 0.0) & (delta_zs == 0.0)] = np.nan
+            slopes[np.fabs(slopes) <= MIN_SCALAR_VALUE] = 0.0
+
+        return np.concatenate((slopes, [np.nan]))
+
+    def absolute_slopes(self):
+
+        return np.fabs(self.slopes())
+
+    def crs_project(self, srcCrs, destCrs):
+
+        xs, ys = project_xy_arrays(self._xs, self._ys, srcCrs, destCrs)
+
+        return ArrayLine(xs, ys, self._zs.copy(), self._ts.copy())
+
+
+class ArrayMultiLine(object):
+    """
+    A multiline stored as flat float64 arrays of x, y, z and t values,
+    together with the offsets of its parts (ragged layout):
+    part n spans the values from part_offsets[n] to part_offsets[n + 1].
+    """
+
+    def __init__(self, xs=None, ys=None, zs=None, ts=None, part_offsets=None):
+        """
+        :param xs: array-like of float
+        :param ys: array-like of float
+        :param zs: array-like of float, or None
+        :param ts: array-like of float, or None
+        :param part_offsets: array-like of int, with (number of parts + 1) values
+        """
+
+        self._coords = ArrayLine(xs, ys, zs, ts)
+
+        if part_offsets is None:
+            part_offsets = [0, self._coords.num_pts] if self._coords.num_pts > 0 else [0]
+
+        self._part_offsets = np.asarray(part_offsets, dtype=np.int64)
+
+        assert self._part_offsets[0] == 0
+        assert self._part_offsets[-1] == self._coords.num_pts
+
+    @classmethod
+    def from_lines(cls, lines):
+        """
+        Create an ArrayMultiLine from a list of ArrayLine instances.
+
+        :param lines: list of ArrayLine
+        :return: ArrayMultiLine
+        """
+
+        if len(lines) == 0:
+            return cls()
+
+        return cls(np.concatenate([line.xs for line in lines]),
+                   np.concatenate([line.ys for line in lines]),
+                   np.concatenate([line.zs for line in lines]),
+                   np.concatenate([line.ts for line in lines]),
+                   np.concatenate(([0], np.cumsum([line.num_pts for line in lines]))))
+
+    @classmethod
+    def from_multiline(cls, multiline):
+        """
+        Create an ArrayMultiLine from a MultiLine instance.
+
+        :param multiline: MultiLine
+        :return: ArrayMultiLine
+        """
+
+        return cls.from_lines([ArrayLine.from_line(line) for line in multiline.lines])
+
+    def to_multiline(self):
+        """
+        Convert to a MultiLine instance.
+
+        :return: MultiLine
+        """
+
+        return MultiLine([line.to_line() for line in self.lines])
+
+    @property
+    def xs(self):
+
+        return self._coords.xs
+
+    @property
+    def ys(self):
+
+        return self._coords.ys
+
+    @property
+    def zs(self):
+
+        return self._coords.zs
+
+    @property
+    def ts(self):
+
+        return self._coords.ts
+
+    @property
+    def part_offsets(self):
+
+        return self._part_offsets
+
+    @property
+    def num_parts(self):
+
+        return self._part_offsets.size - 1
+
+    @property
+    def num_points(self):
+
+        return self._coords.num_pts
+
+    def segment_start_ndxs(self):
+        """
+        Indices of the segment start points, i.e. of all the points
+        except the last one of each part.
+
+        :return: numpy.array of int
+        """
+
+        part_starts, part_ends = self._part_offsets[:-1], self._part_offsets[1:]
+
+        is_part_end = np.zeros(self.num_points, dtype=bool)
+        is_part_end[part_ends[part_ends > part_starts] - 1] = True
+
+        return np.flatnonzero(np.logical_not(is_part_end))
+
+    def segment_part_ndxs(self, segment_start_ndxs):
+        """
+        Indices of the parts the segments belong to.
+
+        :param segment_start_ndxs: numpy.array of int
+        :return: numpy.array of int
+        """
+
+        return np.searchsorted(self._part_offsets, segment_start_ndxs, side='right') - 1
+
+    def line(self, ndx):
+        """
+        Return a part as an ArrayLine whose arrays are views
+        of the multiline ones (no data copy).
+
+        :param ndx: int
+        :return: ArrayLine
+        """
+
+        start, end = self._part_offsets[ndx], self._part_offsets[ndx + 1]
+
+        return ArrayLine(self.xs[start:end], self.ys[start:end], self.zs[start:end], self.ts[start:end])
+
+    @property
+    def lines(self):
+
+        return [self.line(ndx) for ndx in range(self.num_parts)]
+
+    @property
+    def x_min(self):
+
+        return self._coords.x_min
+
+    @property
+    def x_max(self):
+
+        return self._coords.x_max
+
+    @property
+    def y_min(self):
+
+        return self._coords.y_min
+
+    @property
+    def y_max(self):
+
+        return self._coords.y_max
+
+    @property
+    def z_min(self):
+
+        return self._coords.z_min
+
+    @property
+    def z_max(self):
+
+        return self._coords.z_max
+
+    def to_line(self):
+
+        return self._coords.clone()
+
+    def crs_project(self, srcCrs, destCrs):
+
+        xs, ys = project_xy_arrays(self.xs, self.ys, srcCrs, destCrs)
+
+        return ArrayMultiLine(xs, ys, self.zs.copy(), self.ts.copy(), self._part_offsets.copy())
+
+    def sub_multiline(self, start, end):
+        """
+        Return the parts from start to end (excluded) as an ArrayMultiLine
+        whose arrays are views of the multiline ones (no data copy).
+
+        :param start: int
+        :param end: int
+        :return: ArrayMultiLine
+        """
+
+        pt_start, pt_end = self._part_offsets[start], self._part_offsets[end]
+
+        return ArrayMultiLine(self.xs[pt_start:pt_end],
+                              self.ys[pt_start:pt_end],
+                              self.zs[pt_start:pt_end],
+                              self.ts[pt_start:pt_end],
+                              self._part_offsets[start:end + 1] - pt_start)
+
+    def _kept_points(self, kept):
+        """
+        Create an ArrayMultiLine with the points flagged as kept,
+        preserving the parts.
+
+        :param kept: numpy.array of bool
+        :return: ArrayMultiLine
+        """
+
+        kept_before = np.concatenate(([0], np.cumsum(kept)))
+
+        return ArrayMultiLine(self.xs[kept],
+                              self.ys[kept],
+                              self.zs[kept],
+                              self.ts[kept],
+                              kept_before[self._part_offsets])
+
+    def remove_coincident_points(self):
+        """
+        Remove coincident successive points of each part,
+        as ArrayLine.remove_coincident_points.
+
+        :return: ArrayMultiLine
+        """
+
+        if self.num_points == 0:
+            return ArrayMultiLine(part_offsets=self._part_offsets.copy())
+
+        with np.errstate(invalid='ignore'):
+            separated = (self._coords.step_lengths_2d() > MIN_SEPARATION_THRESHOLD) | \
+                        (self._coords.step_lengths_3d() > MIN_SEPARATION_THRESHOLD)
+
+        kept = np.concatenate(([True], separated))
+        kept[self._part_offsets[:-1][self._part_offsets[:-1] < self.num_points]] = True
+
+        return self._kept_points(kept)
+
+    def densify_2d_multiline(self, sample_distance):
+        """
+        Densify all the parts at once, as ArrayLine.densify_2d_line does for a single line:
+        points are added inside each segment at multiples of the sample distance,
+        and coincident successive points are then removed.
+
+        :param sample_distance: float
+        :return: ArrayMultiLine
+        """
+
+        assert sample_distance > 0.0
+
+        if self.num_points == 0:
+            return ArrayMultiLine(part_offsets=self._part_offsets.copy())
+
+        # densification units: the segments, adding their start point and their inner points,
+        # and the last point of each part
+
+        segment_starts = self.segment_start_ndxs()
+        part_starts, part_ends = self._part_offsets[:-1], self._part_offsets[1:]
+        part_last_ndxs = part_ends[part_ends > part_starts] - 1
+
+        lengths_2d = np.hypot(self.xs[segment_starts + 1] - self.xs[segment_starts],
+                              self.ys[segment_starts + 1] - self.ys[segment_starts])
+
+        valid_segments = lengths_2d > 0.0
+
+        num_segment_pts = np.ones(segment_starts.size, dtype=np.int64)
+        num_segment_pts[valid_segments] = np.ceil(lengths_2d[valid_segments] / sample_distance).astype(np.int64)
+
+        fractions = np.zeros(segment_starts.size)
+        fractions[valid_segments] = sample_distance / lengths_2d[valid_segments]
+
+        unit_ndxs = np.concatenate((segment_starts, part_last_ndxs))
+        unit_num_pts = np.concatenate((num_segment_pts, np.ones(part_last_ndxs.size, dtype=np.int64)))
+        unit_fractions = np.concatenate((fractions, np.zeros(part_last_ndxs.size)))
+
+        unit_order = np.argsort(unit_ndxs, kind='stable')
+        unit_ndxs, unit_num_pts, unit_fractions = unit_ndxs[unit_order], unit_num_pts[unit_order], unit_fractions[unit_order]
+
+        # densified points
+
+        src_ndxs = np.repeat(unit_ndxs, unit_num_pts)
+        next_ndxs = np.minimum(src_ndxs + 1, self.num_points - 1)
+        src_fractions = (np.arange(src_ndxs.size) - np.repeat(np.cumsum(unit_num_pts) - unit_num_pts, unit_num_pts)) * \
+            np.repeat(unit_fractions, unit_num_pts)
+
+        def densify(values):
+
+            return values[src_ndxs] + src_fractions * (values[next_ndxs] - values[src_ndxs])
+
+        part_num_pts = np.bincount(self.segment_part_ndxs(unit_ndxs), weights=unit_num_pts, minlength=self.num_parts)
+
+        densified = ArrayMultiLine(densify(self.xs),
+                                   densify(self.ys),
+                                   densify(self.zs),
+                                   self.ts[src_ndxs],
+                                   np.concatenate(([0], np.cumsum(part_num_pts).astype(np.int64))))
+
+        return densified.remove_coincident_points()
+
+
 class ParamLine3D(object):
     """
     parametric line
@@ -622,6 +1292,96 @@ class ParamLine3D(object):
                      z1 - n * k)
 
 
+def segment_pairs_intersections_2d(
+        start_xs_a, start_ys_a, end_xs_a, end_ys_a,
+        start_xs_b, start_ys_b, end_xs_b, end_ys_b,
+        param_tolerance=MIN_SCALAR_VALUE):
+    """
+    Intersect many pairs of 2D segments at once.
+    Segment a of the n-th pair is (start_xs_a[n], start_ys_a[n]) - (end_xs_a[n], end_ys_a[n]),
+    segment b the analogous one.
+
+    Each segment is expressed as start + t * (end - start), with t in [0, 1]:
+    the parameters of the intersection derive from the 2D cross products
+    of the segment vectors, so vertical segments are not special cases.
+    Intersections within param_tolerance from the segment ends are accepted.
+    Parallel (also collinear), degenerate and nan segment pairs have no intersection.
+
+    :param start_xs_a: array-like of float
+    :param start_ys_a: array-like of float
+    :param end_xs_a: array-like of float
+    :param end_ys_a: array-like of float
+    :param start_xs_b: array-like of float
+    :param start_ys_b: array-like of float
+    :param end_xs_b: array-like of float
+    :param end_ys_b: array-like of float
+    :param param_tolerance: float, tolerance on the segment parameters
+    :return: tuple of numpy.array: intersection flags (bool), intersection x and y values,
+     and parameters of the intersections along segments a and b (nan where no intersection)
+    """
+
+    start_xs_a, start_ys_a = np.asarray(start_xs_a, dtype=np.float64), np.asarray(start_ys_a, dtype=np.float64)
+    start_xs_b, start_ys_b = np.asarray(start_xs_b, dtype=np.float64), np.asarray(start_ys_b, dtype=np.float64)
+
+    dxs_a, dys_a = np.asarray(end_xs_a, dtype=np.float64) - start_xs_a, np.asarray(end_ys_a, dtype=np.float64) - start_ys_a
+    dxs_b, dys_b = np.asarray(end_xs_b, dtype=np.float64) - start_xs_b, np.asarray(end_ys_b, dtype=np.float64) - start_ys_b
+
+    offset_xs, offset_ys = start_xs_b - start_xs_a, start_ys_b - start_ys_a
+
+    # cross products, with the parallelism threshold relative to the segment lengths
+
+    denominators = dxs_a * dys_b - dys_a * dxs_b
+    is_crossing = np.abs(denominators) > MIN_SCALAR_VALUE * np.hypot(dxs_a, dys_a) * np.hypot(dxs_b, dys_b)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        params_a = np.where(is_crossing, (offset_xs * dys_b - offset_ys * dxs_b) / denominators, np.nan)
+        params_b = np.where(is_crossing, (offset_xs * dys_a - offset_ys * dxs_a) / denominators, np.nan)
+
+        is_intersecting = \
+            (-param_tolerance <= params_a) & (params_a <= 1.0 + param_tolerance) & \
+            (-param_tolerance <= params_b) & (params_b <= 1.0 + param_tolerance)
+
+    params_a[~is_intersecting] = np.nan
+    params_b[~is_intersecting] = np.nan
+
+    return (is_intersecting,
+            start_xs_a + params_a * dxs_a,
+            start_ys_a + params_a * dys_a,
+            params_a,
+            params_b)
+
+
+def points_segment_distances_2d(xs, ys, start_x, start_y, end_x, end_y):
+    """
+    2D distances of many points from a segment.
+    Each point is projected on the segment line and the projection parameter
+    is clipped to the segment, so points beyond the segment ends
+    get their distance from the nearest end.
+
+    :param xs: array-like of float
+    :param ys: array-like of float
+    :param start_x: float
+    :param start_y: float
+    :param end_x: float
+    :param end_y: float
+    :return: numpy.array of float
+    """
+
+    offset_xs = np.asarray(xs, dtype=np.float64) - start_x
+    offset_ys = np.asarray(ys, dtype=np.float64) - start_y
+
+    dx, dy = end_x - start_x, end_y - start_y
+    square_length = dx * dx + dy * dy
+
+    if square_length > 0.0:
+        params = np.clip((offset_xs * dx + offset_ys * dy) / square_length, 0.0, 1.0)
+    else:
+        params = np.zeros(offset_xs.shape)
+
+    return np.hypot(offset_xs - params * dx, offset_ys - params * dy)
+
+
 def eq_xy_pair(xy_pair_1, xy_pair_2):
 
     if xy_pair_1[0] == xy_pair_2[0] and xy_pair_1[1] == xy_pair_2[1]:
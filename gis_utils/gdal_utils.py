@@ -5,6 +5,9 @@ from builtins import str
 from builtins import range
 from builtins import object
 import os
+import threading
+
+import numpy as np
 
 
 try:
@@ -23,6 +26,7 @@ except ImportError:
     import osr
 
 from .errors import RasterParametersException, OGRIOException
+from .dem_sampling import tiled_cell_values, bilinear_zs
 
 
 from ..gsf.geometry import Point
@@ -316,6 +320,140 @@ class GDALParameters(object):
             return True
 
 
+class GDALDEM(object):
+    """
+    A single-band DEM read via GDAL, for use without QGIS layers.
+    It acts both as the DEM layer (id(), name()) and as its raster parameters,
+    that have the same names as in QGisRasterParameters,
+    so it can be passed as both in the profile functions (e.g., topoprofiles_from_topolines).
+    Its cells are read by blocks through the process-wide DEM tile cache.
+    """
+
+    def __init__(self, dem_path):
+        """
+        :param dem_path: path of the DEM file
+        :raise: RasterParametersException - DEM not readable or with rotated axes
+        """
+
+        dataset = gdal.Open(str(dem_path), gdal.GA_ReadOnly)
+        if dataset is None:
+            raise RasterParametersException('Unable to open raster {}'.format(dem_path))
+
+        geotransform = dataset.GetGeoTransform()
+
+        params = GDALParameters()
+        params.topLeftX, params.pixSizeEW, params.rotGT2, params.topLeftY, params.rotGT4, params.pixSizeNS = geotransform
+        params.rows, params.cols = dataset.RasterYSize, dataset.RasterXSize
+        params.noDataValue = dataset.GetRasterBand(1).GetNoDataValue()
+        if abs(params.rotGT2) > 1e-06 or abs(params.rotGT4) > 1e-06:
+            raise RasterParametersException('There should be no axis rotation in raster')
+
+        if params.pixSizeNS >= 0.0:
+            raise RasterParametersException('Raster {} is not north-up'.format(dem_path))
+
+        self._dataset = dataset
+        self._lock = threading.Lock()
+
+        self.path = os.path.abspath(str(dem_path))
+        self.cellsizeEW = params.pixSizeEW
+        self.cellsizeNS = abs(params.pixSizeNS)
+        self.rows = params.rows
+        self.cols = params.cols
+        self.xMin = params.llcorner().x
+        self.xMax = params.trcorner().x
+        self.yMin = params.llcorner().y
+        self.yMax = params.trcorner().y
+        self.nodatavalue = params.noDataValue if params.noDataValue is not None else np.nan
+
+        wkt = dataset.GetProjection()
+        if wkt:
+            self.spatial_reference = osr.SpatialReference()
+            self.spatial_reference.ImportFromWkt(wkt)
+        else:
+            self.spatial_reference = None
+
+    def id(self):
+
+        return 'gdal:' + self.path
+
+    def name(self):
+
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+    def read_block(self, row_min, row_max, col_min, col_max, band=1):
+        """
+        Read a window of DEM cells.
+        Row indices increase northward, starting from the southernmost row,
+        as in QGisRasterParameters.geogr2raster.
+
+        :param row_min: int
+        :param row_max: int
+        :param col_min: int
+        :param col_max: int
+        :param band: int
+        :return: 2D numpy.array, indexed by (row - row_min, col - col_min)
+        """
+
+        # GDAL datasets cannot be read concurrently
+
+        with self._lock:
+            values = self._dataset.GetRasterBand(band).ReadAsArray(
+                col_min,
+                self.rows - 1 - row_max,
+                col_max - col_min + 1,
+                row_max - row_min + 1).astype(np.float64)
+
+        if not np.isnan(self.nodatavalue):
+            values[values == self.nodatavalue] = np.nan
+
+        return values[::-1, :]
+
+    def interpolate_z_array(self, xs, ys):
+        """
+        Interpolate the z values of many points at once,
+        as in qgs_tools.interpolate_z_array.
+
+        :param xs: array-like of float, in the DEM CRS
+        :param ys: array-like of float, in the DEM CRS
+        :return: numpy.array of float
+        """
+
+        return bilinear_zs(
+            self,
+            xs,
+            ys,
+            lambda rows, cols: tiled_cell_values(self.id(), self, rows, cols, self.read_block))
+
+
+def osr_project_xy_arrays(xs, ys, src_srs, dest_srs):
+    """
+    Project the x and y coordinates of many points between two spatial references.
+    No projection is applied when one of the spatial references is undefined.
+
+    :param xs: array-like of float
+    :param ys: array-like of float
+    :param src_srs: osgeo.osr.SpatialReference, or None
+    :param dest_srs: osgeo.osr.SpatialReference, or None
+    :return: tuple of two numpy.array of float
+    """
+
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+
+    if src_srs is None or dest_srs is None or src_srs.IsSame(dest_srs) or xs.size == 0:
+        return xs.copy(), ys.copy()
+
+    src_srs, dest_srs = src_srs.Clone(), dest_srs.Clone()
+    if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+        src_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        dest_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+    transform = osr.CoordinateTransformation(src_srs, dest_srs)
+    projected = np.array(transform.TransformPoints(list(zip(xs.tolist(), ys.tolist()))), dtype=np.float64)
+
+    return projected[:, 0], projected[:, 1]
+
+
 def read_line_shapefile_via_ogr(line_shp_path):
     """
     Read line shapefile using OGR.
@@ -341,6 +479,11 @@ def read_line_shapefile_via_ogr(line_shp_path):
         # get internal layer
     lnLayer = line_shape.GetLayer(0)
 
+    # get layer spatial reference
+    spatial_reference = lnLayer.GetSpatialRef()
+    if spatial_reference is not None:
+        spatial_reference = spatial_reference.Clone()
+
     # set vector layer extent
     layer_extent = lnLayer.GetExtent()
     lines_extent = {'xmin': layer_extent[0], 'xmax': layer_extent[1], 'ymin': layer_extent[2], 'ymax': layer_extent[3]}
@@ -378,7 +521,7 @@ def read_line_shapefile_via_ogr(line_shp_path):
 
     line_shape.Destroy()
 
-    return dict(success=True, extent=lines_extent, vertices=lines_points)
+    return dict(success=True, extent=lines_extent, vertices=lines_points, spatial_reference=spatial_reference)
 
 
 def shapefile_create_def_field(field_def):
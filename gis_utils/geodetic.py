@@ -1,10 +1,15 @@
 from __future__ import division
 
 from builtins import object
-from math import sqrt, radians, sin, cos
+
+from array import array
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
 
 from ..gsf.geometry import Point
-from .time_utils import standard_gpstime_to_seconds
+from .errors import GPXIOException
+from .time_utils import standard_gpstime_to_seconds, gpx_times_to_seconds
 
 
 WGS84 = {'semi-major axis': 6378137.0,
@@ -14,20 +19,29 @@ WGS84 = {'semi-major axis': 6378137.0,
 def n_phi(phi_rad):
     a = WGS84['semi-major axis']
     e_squared = WGS84['first eccentricity squared']
-    return a / sqrt(1.0 - e_squared * sin(phi_rad) ** 2)
+    return a / np.sqrt(1.0 - e_squared * np.sin(phi_rad) ** 2)
 
 
 def geodetic2ecef(lat, lon, height):
+    """
+    Convert geodetic coordinates (WGS84) into ECEF coordinates.
+    Accept both single values and numpy arrays.
+
+    :param lat: latitude, in decimal degrees
+    :param lon: longitude, in decimal degrees
+    :param height: height above the ellipsoid
+    :return: tuple of x, y and z ECEF coordinates
+    """
 
     e_squared = WGS84['first eccentricity squared']
 
-    lat_rad, lon_rad = radians(lat), radians(lon)
+    lat_rad, lon_rad = np.radians(lat), np.radians(lon)
 
     nphi = n_phi(lat_rad)
 
-    x = (nphi + height) * cos(lat_rad) * cos(lon_rad)
-    y = (nphi + height) * cos(lat_rad) * sin(lon_rad)
-    z = (nphi * (1 - e_squared) + height) * sin(lat_rad)
+    x = (nphi + height) * np.cos(lat_rad) * np.cos(lon_rad)
+    y = (nphi + height) * np.cos(lat_rad) * np.sin(lon_rad)
+    z = (nphi * (1 - e_squared) + height) * np.sin(lat_rad)
 
     return x, y, z
 
@@ -47,3 +61,110 @@ class TrackPointGPX(object):
         t = standard_gpstime_to_seconds(self.time)
 
         return Point(x, y, self.elev, t)
+
+
+def gpx_track_xyzt(lats, lons, elevs, times):
+    """
+    Convert a whole track, as TrackPointGPX.as_pt3dt does for a single point:
+    ECEF x and y values, original elevations and times as seconds.
+
+    :param lats: numpy.array of float
+    :param lons: numpy.array of float
+    :param elevs: numpy.array of float
+    :param times: list of str
+    :return: tuple of four numpy.array of float
+    """
+
+    xs, ys, _ = geodetic2ecef(lats, lons, elevs)
+
+    return xs, ys, elevs, gpx_times_to_seconds(times)
+
+
+def read_gpx_track(source_gpx_path):
+    """
+    Read the track points of a GPX file with incremental parsing,
+    so that the XML document is never fully held in memory.
+    Only the points within track segments are considered.
+
+    :param source_gpx_path: str
+    :return: tuple of track name (str), latitudes, longitudes, elevations (numpy.array of float)
+     and times (list of str)
+    :raise: GPXIOException - track point without elevation or time
+    """
+
+    trkname = None
+
+    lats, lons, elevs = array('d'), array('d'), array('d')
+    times = []
+
+    tags = None
+    open_elements = []
+    trk_num = 0
+    open_trks = 0
+    open_trksegs = 0
+
+    for event, element in ElementTree.iterparse(source_gpx_path, events=('start', 'end')):
+
+        if event == 'start':
+
+            if tags is None:
+
+                # tags are qualified with the namespace of the root element
+
+                namespace = element.tag[:element.tag.find('}') + 1]
+                tags = dict([(tag, namespace + tag) for tag in ('trk', 'trkseg', 'trkpt', 'name', 'ele', 'time')])
+
+            if element.tag == tags['trk']:
+                trk_num += 1
+                open_trks += 1
+            elif element.tag == tags['trkseg'] and open_trks > 0:
+                open_trksegs += 1
+
+            open_elements.append(element)
+            continue
+
+        open_elements.pop()
+
+        if element.tag == tags['trkpt']:
+
+            if open_trksegs > 0:
+
+                elev_text = element.findtext(tags['ele'])
+                time_text = element.findtext(tags['time'])
+
+                if elev_text is None or time_text is None:
+                    raise GPXIOException("Track point without elevation or time")
+
+                lats.append(float(element.get("lat")))
+                lons.append(float(element.get("lon")))
+                elevs.append(float(elev_text))
+                times.append(time_text.strip())
+
+        elif element.tag == tags['name']:
+
+            # the track name is the first name within the first track
+
+            if trkname is None and trk_num == 1 and open_trks > 0:
+                trkname = element.text
+            continue
+
+        elif element.tag == tags['trkseg'] and open_trks > 0:
+            open_trksegs -= 1
+
+        elif element.tag == tags['trk']:
+            open_trks -= 1
+
+        elif len(open_elements) > 1:
+            continue
+
+        # release the parsed track points and top-level contents
+
+        if open_elements:
+            element.clear()
+            open_elements[-1].remove(element)
+
+    return trkname if trkname is not None else '', \
+        np.frombuffer(lats, dtype=np.float64), \
+        np.frombuffer(lons, dtype=np.float64), \
+        np.frombuffer(elevs, dtype=np.float64), \
+        times
@@ -102,30 +102,293 @@ def map_measure_to_section(structural_rec, section_data, map_axis=None):
                          signed_distance_from_section_start)
 
 
+def section_plane_arrays(section_data):
+    """
+    Section parameters as arrays: the unit normal and the constant term
+    of the section plane equation, the section start point and the section versor.
+
+    :param section_data: dict with the section 'init_pt', 'cartes_plane' and 'vector'
+    :return: tuple of numpy.array, float, numpy.array, numpy.array
+    """
+
+    section_init_pt, section_cartes_plane, section_vector = section_data['init_pt'], section_data['cartes_plane'], \
+                                                            section_data['vector']
+
+    section_normal = np.array([section_cartes_plane.a, section_cartes_plane.b, section_cartes_plane.c])
+    section_normal_length = np.linalg.norm(section_normal)
+
+    section_vect = np.array([section_vector.x, section_vector.y, section_vector.z])
+
+    return (section_normal / section_normal_length,
+            section_cartes_plane.d / section_normal_length,
+            np.array([section_init_pt.x, section_init_pt.y, section_init_pt.z]),
+            section_vect / np.linalg.norm(section_vect))
+
+
+def axis_versors_array(trends, plunges):
+    """
+    Versors of geological axes, one for each row.
+
+    :param trends: array-like of float (degrees)
+    :param plunges: array-like of float (degrees)
+    :return: numpy.array of float, with shape (n, 3)
+    """
+
+    trends_rad, plunges_rad = np.radians(trends), np.radians(plunges)
+
+    return np.column_stack((
+        np.cos(plunges_rad) * np.sin(trends_rad),
+        np.cos(plunges_rad) * np.cos(trends_rad),
+        -np.sin(plunges_rad)))
+
+
+def project_pts_along_axes(pts, axis_versors, section_normal, section_d):
+    """
+    Project points onto the section plane along the given axes,
+    as ParamLine3D.intersect_cartes_plane does for a single point.
+    Points whose axis is parallel to the section get nan coordinates.
+
+    :param pts: numpy.array of float, with shape (n, 3)
+    :param axis_versors: numpy.array of float, with shape (n, 3) or (3,)
+    :param section_normal: numpy.array of float, unit normal of the section plane
+    :param section_d: float, constant term of the section plane equation
+    :return: numpy.array of float, with shape (n, 3)
+    """
+
+    axis_normal_sps = np.asarray(axis_versors.dot(section_normal))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factors = np.where(
+            np.abs(axis_normal_sps) > MIN_SCALAR_VALUE,
+            (pts.dot(section_normal) + section_d) / axis_normal_sps,
+            np.nan)
+
+    return pts - factors[:, np.newaxis] * axis_versors
+
+
+def section_signed_distances(pts, section_init_pt, section_versor):
+    """
+    Signed distances along the section of points lying on the section plane,
+    from the section start.
+
+    :param pts: numpy.array of float, with shape (n, 3)
+    :param section_init_pt: numpy.array of float
+    :param section_versor: numpy.array of float
+    :return: numpy.array of float
+    """
+
+    return (pts - section_init_pt).dot(section_versor)
+
+
+def map_attitudes_on_section(xs, ys, zs, dip_dirs, dip_angles, section_data, axis_trends=None, axis_plunges=None):
+    """
+    Map many structural attitudes onto the section at once.
+    Each attitude is mapped along the nearest direction
+    (i.e., along the plane, normally to the plane-section intersection line)
+    when the axis trends and plunges are None, otherwise along its axis.
+
+    Attitudes that cannot be mapped (planes parallel to the section,
+    axes parallel to the section, nan values) are flagged as not valid.
+
+    :param xs: array-like of float, structural point x values
+    :param ys: array-like of float, structural point y values
+    :param zs: array-like of float, structural point z values
+    :param dip_dirs: array-like of float, plane dip directions (degrees)
+    :param dip_angles: array-like of float, plane dip angles (degrees)
+    :param section_data: dict with the section 'init_pt', 'cartes_plane' and 'vector'
+    :param axis_trends: array-like of float (degrees), or None
+    :param axis_plunges: array-like of float (degrees), or None
+    :return: tuple of numpy.array: validity flags, mapped point x, y and z values,
+     slopes of the planes on the section (radians), downward senses ("right", "vertical" or "left")
+     and signed distances from the section start
+    """
+
+    pts = np.column_stack((xs, ys, zs)).astype(np.float64)
+
+    section_normal, section_d, section_init_pt, section_versor = section_plane_arrays(section_data)
+
+    # versors normal to the structural planes
+
+    dip_dirs_rad, dip_angles_rad = np.radians(dip_dirs), np.radians(dip_angles)
+    plane_normals = np.column_stack((
+        np.sin(dip_angles_rad) * np.sin(dip_dirs_rad),
+        np.sin(dip_angles_rad) * np.cos(dip_dirs_rad),
+        np.cos(dip_angles_rad)))
+
+    # intersection versors between the section plane and the structural planes
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        intersection_vects = np.cross(section_normal, plane_normals)
+        intersection_lengths = np.linalg.norm(intersection_vects, axis=1)
+        is_valid = intersection_lengths > MIN_SCALAR_VALUE
+        intersection_versors = intersection_vects / intersection_lengths[:, np.newaxis]
+
+        # slope of the structural planes onto the section plane
+
+        slopes_rad = np.arctan2(np.abs(intersection_versors[:, 2]), np.hypot(intersection_versors[:, 0], intersection_versors[:, 1]))
+
+        downward_versors = np.where(intersection_versors[:, 2:] > 0.0, -intersection_versors, intersection_versors)
+        downward_sps = downward_versors.dot(section_versor)
+
+        downward_senses = np.where(downward_sps > 0.0, "right", np.where(downward_sps == 0.0, "vertical", "left"))
+
+        if axis_trends is None:
+
+            # projections of the structural points on the plane-section intersection lines,
+            # the points lying on the structural planes
+
+            normals_dot = plane_normals.dot(section_normal)
+            factors = (pts.dot(section_normal) + section_d) / (1.0 - normals_dot ** 2)
+
+            mapped_pts = pts - factors[:, np.newaxis] * (section_normal - normals_dot[:, np.newaxis] * plane_normals)
+
+        else:
+
+            mapped_pts = project_pts_along_axes(
+                pts,
+                axis_versors_array(axis_trends, axis_plunges),
+                section_normal,
+                section_d)
+
+        # signed horizontal distances between the mapped points and the section start
+
+        signed_distances = section_signed_distances(mapped_pts, section_init_pt, section_versor)
+
+    is_valid &= np.all(np.isfinite(mapped_pts), axis=1) & np.isfinite(slopes_rad)
+
+    return (is_valid,
+            mapped_pts[:, 0],
+            mapped_pts[:, 1],
+            mapped_pts[:, 2],
+            slopes_rad,
+            downward_senses,
+            signed_distances)
+
+
+def axis_value(value):
+    """
+    Convert an axis attribute value to float,
+    nan when not convertible.
+
+    :param value: attribute value
+    :return: float
+    """
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
 def map_struct_pts_on_section(structural_data, section_data, mapping_method):
     """
     defines:
         - 2D x-y location in section
         - plane-plane segment intersection
+    All the structural records are mapped at once by map_attitudes_on_section.
+    Records that cannot be mapped are skipped.
     """
 
     if mapping_method['method'] == 'nearest':
-        return [map_measure_to_section(structural_rec, section_data) for structural_rec in structural_data]
-
-    if mapping_method['method'] == 'common axis':
+        axis_trends, axis_plunges = None, None
+    elif mapping_method['method'] == 'common axis':
         map_axis = GAxis(mapping_method['trend'], mapping_method['plunge'])
-        return [map_measure_to_section(structural_rec, section_data, map_axis) for structural_rec in structural_data]
-
-    if mapping_method['method'] == 'individual axes':
+        axis_trends = np.full(len(structural_data), map_axis.tr)
+        axis_plunges = np.full(len(structural_data), map_axis.pl)
+    elif mapping_method['method'] == 'individual axes':
         assert len(mapping_method['individual_axes_values']) == len(structural_data)
-        result = []
-        for structural_rec, (trend, plunge) in zip(structural_data, mapping_method['individual_axes_values']):
-            try:
-                map_axis = GAxis(trend, plunge)
-                result.append(map_measure_to_section(structural_rec, section_data, map_axis))
-            except:
-                continue
-        return result
+        axis_trends = np.array([axis_value(trend) for (trend, _) in mapping_method['individual_axes_values']])
+        axis_plunges = np.array([axis_value(plunge) for (_, plunge) in mapping_method['individual_axes_values']])
+        with np.errstate(invalid='ignore'):
+            axis_plunges[np.abs(axis_plunges) > 90.0] = np.nan
+    else:
+        return None
+
+    if len(structural_data) == 0:
+        return []
+
+    structural_pts = [structural_pt for (structural_pt, _, _) in structural_data]
+    structural_planes = [structural_plane for (_, structural_plane, _) in structural_data]
+
+    is_valid, xs, ys, zs, slopes_rad, downward_senses, signed_distances = map_attitudes_on_section(
+        [pt.x for pt in structural_pts],
+        [pt.y for pt in structural_pts],
+        [pt.z for pt in structural_pts],
+        [plane.dd for plane in structural_planes],
+        [plane.da for plane in structural_planes],
+        section_data,
+        axis_trends,
+        axis_plunges)
+
+    plane_attitudes = []
+    for structural_rec, valid, x, y, z, slope_rad, downward_sense, signed_distance in zip(
+            structural_data,
+            is_valid.tolist(),
+            xs.tolist(),
+            ys.tolist(),
+            zs.tolist(),
+            slopes_rad.tolist(),
+            downward_senses.tolist(),
+            signed_distances.tolist()):
+        if not valid:
+            continue
+        structural_pt, structural_plane, structural_pt_id = structural_rec
+        plane_attitudes.append(PlaneAttitude(structural_pt_id,
+                                             structural_pt,
+                                             structural_plane,
+                                             Point(x, y, z),
+                                             slope_rad,
+                                             downward_sense,
+                                             signed_distance))
+
+    return plane_attitudes
+
+
+def project_multilines_on_section(multilines_3d, section_data, trend, plunge):
+    """
+    Project the vertices of 3D multilines onto the section, along a common axis,
+    returning for each multiline its (signed distance, z) section coordinates.
+    All the vertices are projected together, stored as flat arrays
+    with the offsets of the single lines (ragged layout).
+    Vertices whose projection is not defined get nan values.
+
+    :param multilines_3d: list of MultiLine or ArrayMultiLine
+    :param section_data: dict with the section 'init_pt', 'cartes_plane' and 'vector'
+    :param trend: float, projection axis trend (degrees)
+    :param plunge: float, projection axis plunge (degrees)
+    :return: list of ArrayMultiLine, with signed distances as x values and z as y values
+    """
+
+    lines_3d = ArrayMultiLine.from_lines(
+        [line_3d if isinstance(line_3d, ArrayLine) else ArrayLine.from_line(line_3d) for multiline_3d in multilines_3d
+         for line_3d in multiline_3d.lines])
+
+    section_normal, section_d, section_init_pt, section_versor = section_plane_arrays(section_data)
+
+    projected_pts = project_pts_along_axes(
+        np.column_stack((lines_3d.xs, lines_3d.ys, lines_3d.zs)),
+        axis_versors_array([trend], [plunge])[0],
+        section_normal,
+        section_d)
+
+    ss = section_signed_distances(projected_pts, section_init_pt, section_versor)
+    zs = projected_pts[:, 2]
+
+    # split the flat arrays back into the source multilines
+
+    part_offsets = lines_3d.part_offsets
+    multiline_part_offsets = np.cumsum([0] + [len(multiline_3d.lines) for multiline_3d in multilines_3d])
+
+    multilines_2d = []
+    for part_start, part_end in zip(multiline_part_offsets[:-1], multiline_part_offsets[1:]):
+        pt_start, pt_end = part_offsets[part_start], part_offsets[part_end]
+        multilines_2d.append(ArrayMultiLine(
+            ss[pt_start:pt_end],
+            zs[pt_start:pt_end],
+            part_offsets=part_offsets[part_start:part_end + 1] - pt_start))
+
+    return multilines_2d
 
 
 class IntersectionParameters(object):
@@ -159,176 +422,109 @@ class Intersections(object):
         """
         Initialize a structured array of the possible and found links for each intersection.
         It will store a list of the possible connections for each intersection,
-        together with the found connections.       
+        together with the found connections.
+        Links are numbered from 1, first the x-direction intersections, then the y-direction ones,
+        each in row-major order.
         """
 
         # data type for structured array storing intersection parameters
-        dt = np.dtype([('id', np.uint16),
-                       ('i', np.uint16),
-                       ('j', np.uint16),
+        dt = np.dtype([('id', np.uint32),
+                       ('i', np.uint32),
+                       ('j', np.uint32),
                        ('pi_dir', np.str_, 1),
-                       ('conn_from', np.uint16),
-                       ('conn_to', np.uint16),
+                       ('conn_from', np.uint32),
+                       ('conn_to', np.uint32),
                        ('start', np.bool_)
                        ])
 
-        # number of valid intersections
-        num_intersections = len(list(self.xcoords_x[np.logical_not(np.isnan(self.xcoords_x))])) + \
-                            len(list(self.ycoords_y[np.logical_not(np.isnan(self.ycoords_y))]))
+        # valid intersections
+        x_is, x_js = np.nonzero(np.logical_not(np.isnan(self.xcoords_x)))
+        y_is, y_js = np.nonzero(np.logical_not(np.isnan(self.ycoords_y)))
 
-        # creation and initialization of structured array of valid intersections in the x-direction
-        links = np.zeros(num_intersections, dtype=dt)
-
-        # filling array with values
+        num_x_intersections = x_is.size
+        num_intersections = num_x_intersections + y_is.size
 
-        curr_ndx = 0
-        for i in range(self.xcoords_x.shape[0]):
-            for j in range(self.xcoords_x.shape[1]):
-                if not isnan(self.xcoords_x[i, j]):
-                    links[curr_ndx] = (curr_ndx + 1, i, j, 'x', 0, 0, False)
-                    curr_ndx += 1
+        # creation and initialization of structured array of valid intersections
+        links = np.zeros(num_intersections, dtype=dt)
 
-        for i in range(self.ycoords_y.shape[0]):
-            for j in range(self.ycoords_y.shape[1]):
-                if not isnan(self.ycoords_y[i, j]):
-                    links[curr_ndx] = (curr_ndx + 1, i, j, 'y', 0, 0, False)
-                    curr_ndx += 1
+        links['id'] = np.arange(1, num_intersections + 1)
+        links['i'] = np.concatenate((x_is, y_is))
+        links['j'] = np.concatenate((x_js, y_js))
+        links['pi_dir'][:num_x_intersections] = 'x'
+        links['pi_dir'][num_x_intersections:] = 'y'
 
         return links
 
     def set_neighbours(self):
+        """
+        Find the possibly connected intersections of each intersection.
+        Intersections are searched by their (i, j, direction) key
+        in the sorted keys of all the links.
+
+        :return: dict of int: list of int, the neighbour ids of each link id
+        """
 
         # shape of input arrays (equal shapes)
         num_rows, num_cols = self.xcoords_x.shape
 
+        links_i = self.links['i'].astype(np.int64)
+        links_j = self.links['j'].astype(np.int64)
+        links_is_y = self.links['pi_dir'] == 'y'
+
+        def link_keys(i, j, is_y):
+
+            return (i * num_cols + j) * 2 + is_y
+
+        keys = link_keys(links_i, links_j, links_is_y)
+        key_order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[key_order]
+        sorted_ids = self.links['id'][key_order]
+
+        def neighbour_ids(applicable, delta_i, delta_j, to_y):
+            """
+            Ids of the links at (i + delta_i, j + delta_j) with the given direction,
+            for the applicable links (0 when not applicable or not found).
+            """
+
+            ids = np.zeros(links_i.size, dtype=np.int64)
+
+            ndxs = np.flatnonzero(applicable)
+            searched_keys = link_keys(links_i[ndxs] + delta_i, links_j[ndxs] + delta_j, to_y)
+
+            positions = np.minimum(np.searchsorted(sorted_keys, searched_keys), max(sorted_keys.size - 1, 0))
+            if sorted_keys.size > 0:
+                found = sorted_keys[positions] == searched_keys
+                ids[ndxs[found]] = sorted_ids[positions[found]]
+
+            return ids
+
+        is_x = np.logical_not(links_is_y)
+
+        x_lower_right = is_x & (links_i < num_rows - 1) & (links_j < num_cols - 1)
+        x_upper_right = is_x & (links_i > 0) & (links_j < num_cols - 1)
+        y_upper_right = links_is_y & (links_i > 0) & (links_j < num_cols - 1)
+        y_upper_left = links_is_y & (links_i > 0) & (links_j > 0)
+
+        # candidate neighbours, in the order of the checks for x- and y-direction links
+
+        candidate_ids = np.column_stack((
+            neighbour_ids(x_lower_right, 1, 1, True),  # -- A
+            neighbour_ids(x_lower_right, 1, 0, False),  # -- B
+            neighbour_ids(x_lower_right, 1, 0, True),  # -- C
+            neighbour_ids(x_upper_right, 0, 0, True),  # -- E
+            neighbour_ids(x_upper_right, -1, 0, False),  # -- F
+            neighbour_ids(x_upper_right, 0, 1, True),  # -- G
+            neighbour_ids(y_upper_right, 0, 0, False),  # -- D
+            neighbour_ids(y_upper_right, -1, 0, False),  # -- F
+            neighbour_ids(y_upper_right, 0, 1, True),  # -- G
+            neighbour_ids(y_upper_left, 0, -1, False),  # -- H
+            neighbour_ids(y_upper_left, 0, -1, True),  # -- I
+            neighbour_ids(y_upper_left, -1, -1, False)))  # -- L
+
         # dictionary storing intersection links
         neighbours = {}
-
-        # search and connect intersection points   
-        for curr_ndx in range(self.links.shape[0]):
-
-            # get current point location (i, j) and direction type (pi_dir)
-            curr_id = self.links[curr_ndx]['id']
-            curr_i = self.links[curr_ndx]['i']
-            curr_j = self.links[curr_ndx]['j']
-            curr_dir = self.links[curr_ndx]['pi_dir']
-
-            # check possible connected spdata
-            near_intersections = []
-
-            if curr_dir == 'x':
-
-                if curr_i < num_rows - 1 and curr_j < num_cols - 1:
-
-                    try:  # -- A
-                        id_link = self.links[(self.links['i'] == curr_i + 1) & \
-                                             (self.links['j'] == curr_j + 1) & \
-                                             (self.links['pi_dir'] == 'y')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-                    try:  # -- B
-                        id_link = self.links[(self.links['i'] == curr_i + 1) & \
-                                             (self.links['j'] == curr_j) & \
-                                             (self.links['pi_dir'] == 'x')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-                    try:  # -- C
-                        id_link = self.links[(self.links['i'] == curr_i + 1) & \
-                                             (self.links['j'] == curr_j) & \
-                                             (self.links['pi_dir'] == 'y')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-
-                if curr_i > 0 and curr_j < num_cols - 1:
-
-                    try:  # -- E
-                        id_link = self.links[(self.links['i'] == curr_i) & \
-                                             (self.links['j'] == curr_j) & \
-                                             (self.links['pi_dir'] == 'y')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-                    try:  # -- F
-                        id_link = self.links[(self.links['i'] == curr_i - 1) & \
-                                             (self.links['j'] == curr_j) & \
-                                             (self.links['pi_dir'] == 'x')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-                    try:  # -- G
-                        id_link = self.links[(self.links['i'] == curr_i) & \
-                                             (self.links['j'] == curr_j + 1) & \
-                                             (self.links['pi_dir'] == 'y')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-
-            if curr_dir == 'y':
-
-                if curr_i > 0 and curr_j < num_cols - 1:
-
-                    try:  # -- D
-                        id_link = self.links[(self.links['i'] == curr_i) & \
-                                             (self.links['j'] == curr_j) & \
-                                             (self.links['pi_dir'] == 'x')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-                    try:  # -- F
-                        id_link = self.links[(self.links['i'] == curr_i - 1) & \
-                                             (self.links['j'] == curr_j) & \
-                                             (self.links['pi_dir'] == 'x')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-                    try:  # -- G
-                        id_link = self.links[(self.links['i'] == curr_i) & \
-                                             (self.links['j'] == curr_j + 1) & \
-                                             (self.links['pi_dir'] == 'y')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-
-                if curr_i > 0 and curr_j > 0:
-
-                    try:  # -- H
-                        id_link = self.links[(self.links['i'] == curr_i) & \
-                                             (self.links['j'] == curr_j - 1) & \
-                                             (self.links['pi_dir'] == 'x')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-                    try:  # -- I
-                        id_link = self.links[(self.links['i'] == curr_i) & \
-                                             (self.links['j'] == curr_j - 1) & \
-                                             (self.links['pi_dir'] == 'y')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-                    try:  # -- L
-                        id_link = self.links[(self.links['i'] == curr_i - 1) & \
-                                             (self.links['j'] == curr_j - 1) & \
-                                             (self.links['pi_dir'] == 'x')]['id']
-                        if len(list(id_link)) == 1:
-                            near_intersections.append(id_link[0])
-                    except:
-                        pass
-
-            neighbours[curr_id] = near_intersections
+        for curr_id, curr_candidate_ids in zip(self.links['id'].tolist(), candidate_ids.tolist()):
+            neighbours[curr_id] = [candidate_id for candidate_id in curr_candidate_ids if candidate_id > 0]
 
         return neighbours
 
@@ -337,23 +533,26 @@ class Intersections(object):
         Creates a path of connected intersections from a given start intersection.
         
         """
+
+        conn_from, conn_to = self.links['conn_from'], self.links['conn_to']
+
         from_id = start_id
 
-        while self.links[from_id - 1]['conn_to'] == 0:
+        while conn_to[from_id - 1] == 0:
 
             conns = self.neighbours[from_id]
             num_conn = len(conns)
             if num_conn == 0:
                 raise Exception('no connected intersection')
             elif num_conn == 1:
-                if self.links[conns[0] - 1]['conn_from'] == 0 and self.links[conns[0] - 1]['conn_to'] != from_id:
+                if conn_from[conns[0] - 1] == 0 and conn_to[conns[0] - 1] != from_id:
                     to_id = conns[0]
                 else:
                     raise Exception('no free connection')
             elif num_conn == 2:
-                if self.links[conns[0] - 1]['conn_from'] == 0 and self.links[conns[0] - 1]['conn_to'] != from_id:
+                if conn_from[conns[0] - 1] == 0 and conn_to[conns[0] - 1] != from_id:
                     to_id = conns[0]
-                elif self.links[conns[1] - 1]['conn_from'] == 0 and self.links[conns[1] - 1]['conn_to'] != from_id:
+                elif conn_from[conns[1] - 1] == 0 and conn_to[conns[1] - 1] != from_id:
                     to_id = conns[1]
                 else:
                     raise Exception('no free connection')
@@ -361,19 +560,21 @@ class Intersections(object):
                 raise Exception('multiple connection')
 
             # set connection
-            self.links[to_id - 1]['conn_from'] = from_id
-            self.links[from_id - 1]['conn_to'] = to_id
+            conn_from[to_id - 1] = from_id
+            conn_to[from_id - 1] = to_id
 
             # prepare for next step
             from_id = to_id
 
     def path_closed(self, start_id):
 
+        conn_to = self.links['conn_to']
+
         from_id = start_id
 
-        while self.links[from_id - 1]['conn_to'] != 0:
+        while conn_to[from_id - 1] != 0:
 
-            to_id = self.links[from_id - 1]['conn_to']
+            to_id = conn_to[from_id - 1]
 
             if to_id == start_id: return True
 
@@ -383,20 +584,22 @@ class Intersections(object):
 
     def invert_path(self, start_id):
 
-        self.links[start_id - 1]['start'] = False
+        conn_from, conn_to, starts = self.links['conn_from'], self.links['conn_to'], self.links['start']
+
+        starts[start_id - 1] = False
 
         curr_id = start_id
 
         while curr_id != 0:
 
-            prev_from_id = self.links[curr_id - 1]['conn_from']
-            prev_to_id = self.links[curr_id - 1]['conn_to']
+            prev_from_id = conn_from[curr_id - 1]
+            prev_to_id = conn_to[curr_id - 1]
 
-            self.links[curr_id - 1]['conn_from'] = prev_to_id
-            self.links[curr_id - 1]['conn_to'] = prev_from_id
+            conn_from[curr_id - 1] = prev_to_id
+            conn_to[curr_id - 1] = prev_from_id
 
-            if self.links[curr_id - 1]['conn_from'] == 0:
-                self.links[curr_id - 1]['start'] = True
+            if prev_to_id == 0:
+                starts[curr_id - 1] = True
 
             curr_id = prev_to_id
 
@@ -406,38 +609,40 @@ class Intersections(object):
 
         if self.path_closed(start_id): return
 
+        conn_from, conn_to = self.links['conn_from'], self.links['conn_to']
+
         from_id = start_id
 
-        conns = self.neighbours[from_id]
-        try:
-            conns.remove(self.links[from_id - 1]['conn_to'])
-        except:
-            pass
+        conns = [conn for conn in self.neighbours[from_id] if conn != conn_to[from_id - 1]]
 
         num_conn = len(conns)
 
         if num_conn != 1: return
 
-        new_toid = self.links[conns[0] - 1]
+        new_toid = conns[0]
 
-        if self.links[new_toid]['conn_to'] > 0 \
-                and self.links[new_toid]['conn_to'] != from_id \
-                and self.links[new_toid]['conn_from'] == 0:
+        if conn_to[new_toid - 1] > 0 \
+                and conn_to[new_toid - 1] != from_id \
+                and conn_from[new_toid - 1] == 0:
 
             if self.path_closed(new_toid): return
             self.invert_path(from_id)
-            self.links[from_id - 1]['conn_to'] = new_toid
-            self.links[new_toid - 1]['conn_from'] = from_id
-            self.links[new_toid - 1]['start'] = False
+            conn_to[from_id - 1] = new_toid
+            conn_from[new_toid - 1] = from_id
+            self.links['start'][new_toid - 1] = False
 
     def define_paths(self):
 
+        conn_from, conn_to, starts = self.links['conn_from'], self.links['conn_to'], self.links['start']
+
+        num_neighbours = [len(self.neighbours[ndx + 1]) for ndx in range(self.links.shape[0])]
+
         # simple networks starting from border
         for ndx in range(self.links.shape[0]):
 
-            if len(self.neighbours[ndx + 1]) != 1 or \
-                            self.links[ndx]['conn_from'] > 0 or \
-                            self.links[ndx]['conn_to'] > 0:
+            if num_neighbours[ndx] != 1 or \
+                            conn_from[ndx] > 0 or \
+                            conn_to[ndx] > 0:
                 continue
 
             try:
@@ -449,13 +654,13 @@ class Intersections(object):
 
         for ndx in range(self.links.shape[0]):
 
-            if len(self.neighbours[ndx + 1]) != 2 or \
-                            self.links[ndx]['conn_to'] > 0 or \
-                            self.links[ndx]['start'] == True:
+            if num_neighbours[ndx] != 2 or \
+                            conn_to[ndx] > 0 or \
+                            starts[ndx]:
                 continue
 
             try:
-                self.links[ndx]['start'] = True
+                starts[ndx] = True
                 self.follow_path(ndx + 1)
             except:
                 continue
@@ -464,8 +669,8 @@ class Intersections(object):
 
         for ndx in range(self.links.shape[0]):
 
-            if len(self.neighbours[ndx + 1]) == 2 and \
-                            self.links[ndx]['conn_from'] == 0:
+            if num_neighbours[ndx] == 2 and \
+                            conn_from[ndx] == 0:
                 try:
                     self.patch_path(ndx + 1)
                 except:
@@ -479,6 +684,9 @@ class Intersections(object):
         
         """
 
+        conn_to_list = self.links['conn_to'].tolist()
+        starts_list = self.links['start'].tolist()
+
         pid = 0
         networks = {}
 
@@ -494,7 +702,7 @@ class Intersections(object):
             while to_ndx != 0:
                 network_list.append(to_ndx)
 
-                to_ndx = self.links[to_ndx - 1]['conn_to']
+                to_ndx = conn_to_list[to_ndx - 1]
 
             if len(network_list) > 1:
                 pid += 1
@@ -505,7 +713,7 @@ class Intersections(object):
         for ndx in range(self.links.shape[0]):
 
             if len(self.neighbours[ndx + 1]) != 2 or \
-                            self.links[ndx]['start'] == False:
+                            not starts_list[ndx]:
                 continue
 
             start_id = ndx + 1
@@ -518,7 +726,7 @@ class Intersections(object):
 
                 network_list.append(to_ndx)
 
-                to_ndx = self.links[to_ndx - 1]['conn_to']
+                to_ndx = conn_to_list[to_ndx - 1]
 
                 if to_ndx == start_id:
                     network_list.append(to_ndx)
@@ -2,13 +2,13 @@
 from typing import Union, Dict
 
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from builtins import zip
 from builtins import map
 from builtins import range
 
 import copy
-import xml.dom.minidom
 
 from .features import *
 
@@ -16,8 +16,12 @@ from .qgs_tools import *
 
 from .geodetic import *
 
+from .spatial_index import SegmentGridIndex
+
 from .errors import *
 
+from ..config.settings import profile_chunk_num_pts
+
 
 class SectionLines:
 
@@ -228,6 +232,7 @@ class ProfileElevations:
         self.lons = None
         self.lats = None
         self.times = None
+        self.time_seconds = None
 
         self.profile_s = None
 
@@ -281,22 +286,183 @@ class PlaneAttitude(object):
         self.sign_hor_dist = sign_hor_dist
 
 
-def topoline_from_dem(resampled_trace2d, bOnTheFlyProjection, project_crs, dem, dem_params):
+def chunk_bounds(num_values, chunk_num_values=profile_chunk_num_pts):
+    """
+    Start and end (excluded) indices of the successive chunks of a sequence.
 
-    if bOnTheFlyProjection and dem.crs() != project_crs:
-        trace2d_in_dem_crs = resampled_trace2d.crs_project(project_crs, dem.crs())
-    else:
-        trace2d_in_dem_crs = resampled_trace2d
+    :param num_values: int
+    :param chunk_num_values: int
+    :return: list of (int, int) tuples
+    """
+
+    return [(start, min(start + chunk_num_values, num_values)) for start in range(0, num_values, chunk_num_values)]
+
+
+def estimated_profiles_bytes(source_profile_lines, sample_distance, num_dems):
+    """
+    Estimate the memory required by the topographic profiles created from DEMs.
+    Each profile point stores five values for the trace (x, y, z, t and distance)
+    and three for each DEM (elevation, 3D distance and slope).
+
+    :param source_profile_lines: list of Line
+    :param sample_distance: float
+    :param num_dems: int
+    :return: int
+    """
+
+    num_pts = sum([ArrayLine.from_line(profile_line).num_densified_2d_pts(sample_distance) for profile_line in
+                   source_profile_lines])
+
+    return num_pts * np.dtype(np.float64).itemsize * (5 + 3 * num_dems)
+
+
+def resample_profile_line(source_profile_line, sample_distance, invert_profile, chunk_num_pts=profile_chunk_num_pts):
+    """
+    Densify the profile line by the sample distance, optionally inverting it.
+    The densified points are created in chunks, so that the temporary arrays
+    do not exceed the chunk size.
+
+    :param source_profile_line: Line
+    :param sample_distance: float
+    :param invert_profile: bool
+    :param chunk_num_pts: int
+    :return: ArrayLine
+    """
+
+    line = ArrayLine.from_line(source_profile_line)
+
+    if invert_profile:
+        line = line.reverse_direction()
+
+    num_densified_pts = line.num_densified_2d_pts(sample_distance)
+
+    xs = np.empty(num_densified_pts)
+    ys = np.empty(num_densified_pts)
+
+    num_pts = 0
+    for start, end in chunk_bounds(num_densified_pts, chunk_num_pts):
+
+        # the chunk starts with the last point of the previous one, to check their coincidence
+
+        chunk = line.densified_2d_pts(sample_distance, max(start - 1, 0), end).remove_coincident_points()
+        if start > 0:
+            chunk = chunk.sub_line(1, chunk.num_pts)
+
+        xs[num_pts:num_pts + chunk.num_pts] = chunk.xs
+        ys[num_pts:num_pts + chunk.num_pts] = chunk.ys
+        num_pts += chunk.num_pts
+
+    return ArrayLine(xs[:num_pts], ys[:num_pts])  # line resampled by sample distance
+
+
+def sample_topoline(resampled_trace2d, sample_zs, chunk_num_pts=profile_chunk_num_pts):
+    """
+    Create a 3D topographic line from the resampled trace,
+    calculating the elevations one chunk of points at a time.
+
+    :param resampled_trace2d: ArrayLine
+    :param sample_zs: function (xs, ys) returning the elevations of the points
+    :param chunk_num_pts: int
+    :return: ArrayLine
+    """
+
+    sampled_zs = np.empty(resampled_trace2d.num_pts)
+
+    for start, end in chunk_bounds(resampled_trace2d.num_pts, chunk_num_pts):
+
+        chunk = resampled_trace2d.sub_line(start, end)
+        sampled_zs[start:end] = sample_zs(chunk.xs, chunk.ys)
+
+    return ArrayLine(resampled_trace2d.xs, resampled_trace2d.ys, sampled_zs, resampled_trace2d.ts)
+
+
+def topoline_from_dem(resampled_trace2d, bOnTheFlyProjection, project_crs, dem, dem_params, chunk_num_pts=profile_chunk_num_pts):
+    """
+    Create the 3D topographic line, in the project CRS,
+    sampling the DEM at the points of the resampled trace, one chunk at a time.
+
+    :param resampled_trace2d: ArrayLine
+    :param chunk_num_pts: int
+    :return: ArrayLine
+    """
+
+    reproject = bOnTheFlyProjection and dem.crs() != project_crs
+
+    def sample_zs(xs, ys):
+
+        if reproject:
+            xs, ys = project_xy_arrays(xs, ys, project_crs, dem.crs())
+
+        return interpolate_z_array(dem, dem_params, xs, ys)
+
+    return sample_topoline(resampled_trace2d, sample_zs, chunk_num_pts)
+
+
+def incremental_lengths_by_chunks(line, step_lengths, chunk_num_pts=profile_chunk_num_pts):
+    """
+    Incremental lengths along a line, calculated one chunk of steps at a time.
+
+    :param line: ArrayLine
+    :param step_lengths: ArrayLine.step_lengths_2d or ArrayLine.step_lengths_3d
+    :param chunk_num_pts: int
+    :return: numpy.array of float
+    """
+
+    lengths = np.zeros(line.num_pts)
 
-    ln3dtProfile = Line()
-    for trace_pt2d_dem_crs, trace_pt2d_project_crs in zip(trace2d_in_dem_crs.pts, resampled_trace2d.pts):
-        fInterpolatedZVal = interpolate_z(dem, dem_params, trace_pt2d_dem_crs)
-        pt3dtPoint = Point(trace_pt2d_project_crs.x,
-                           trace_pt2d_project_crs.y,
-                           fInterpolatedZVal)
-        ln3dtProfile.add_pt(pt3dtPoint)
+    for start, end in chunk_bounds(line.num_pts - 1, chunk_num_pts):
+        lengths[start + 1:end + 1] = lengths[start] + np.cumsum(step_lengths(line.sub_line(start, end + 1)))
 
-    return ln3dtProfile
+    return lengths
+
+
+def slopes_by_chunks(line, chunk_num_pts=profile_chunk_num_pts):
+    """
+    Slopes (as degrees) along a line, calculated one chunk of steps at a time.
+    As in ArrayLine.slopes, the value for the last point is nan.
+
+    :param line: ArrayLine
+    :param chunk_num_pts: int
+    :return: numpy.array of float
+    """
+
+    slopes = np.full(line.num_pts, np.nan)
+
+    for start, end in chunk_bounds(line.num_pts - 1, chunk_num_pts):
+        slopes[start:end] = line.sub_line(start, end + 1).slopes()[:-1]
+
+    return slopes
+
+
+def topoprofiles_from_topolines(
+        resampled_line,
+        dem_topolines3d,
+        selected_dems,
+        selected_dem_parameters
+) -> ProfileElevations:
+    """
+    Setup the topographic profiles properties from the 3D lines sampled on the DEMs.
+
+    :param resampled_line: ArrayLine
+    :param dem_topolines3d: list of ArrayLine, one for each DEM
+    :param selected_dems: list of qgis._core.QgsRasterLayer, or of GDALDEM
+    :param selected_dem_parameters: list of QGisRasterParameters, or of GDALDEM (the same objects as selected_dems)
+    :return: ProfileElevations
+    """
+
+    topo_profiles = ProfileElevations()
+
+    topo_profiles.planar_xs = resampled_line.xs
+    topo_profiles.planar_ys = resampled_line.ys
+    topo_profiles.surface_names = [dem.name() for dem in selected_dems]
+    topo_profiles.profile_s = incremental_lengths_by_chunks(resampled_line, ArrayLine.step_lengths_2d)
+    topo_profiles.profile_s3ds = [incremental_lengths_by_chunks(cl3dt, ArrayLine.step_lengths_3d) for cl3dt in dem_topolines3d]
+    topo_profiles.profile_zs = [cl3dt.zs for cl3dt in dem_topolines3d]
+    topo_profiles.profile_dirslopes = [slopes_by_chunks(cl3dt) for cl3dt in dem_topolines3d]
+    topo_profiles.dem_params = [DEMParams(dem, params) for (dem, params) in
+                                zip(selected_dems, selected_dem_parameters)]
+
+    return topo_profiles
 
 
 def topoprofiles_from_dems(
@@ -311,12 +477,7 @@ def topoprofiles_from_dems(
     # get project CRS information
     on_the_fly_projection, project_crs = get_on_the_fly_projection(canvas)
 
-    if invert_profile:
-        line = source_profile_line.reverse_direction()
-    else:
-        line = source_profile_line
-
-    resampled_line = line.densify_2d_line(sample_distance)  # line resampled by sample distance
+    resampled_line = resample_profile_line(source_profile_line, sample_distance, invert_profile)
 
     # calculate 3D profiles from DEMs
 
@@ -335,19 +496,63 @@ def topoprofiles_from_dems(
 
     # setup topoprofiles properties
 
-    topo_profiles = ProfileElevations()
+    return topoprofiles_from_topolines(
+        resampled_line,
+        dem_topolines3d,
+        selected_dems,
+        selected_dem_parameters)
 
-    topo_profiles.planar_xs = np.asarray(resampled_line.x_list)
-    topo_profiles.planar_ys = np.asarray(resampled_line.y_list)
-    topo_profiles.surface_names = [dem.name() for dem in selected_dems]
-    topo_profiles.profile_s = np.asarray(resampled_line.incremental_length_2d())
-    topo_profiles.profile_s3ds = [np.asarray(cl3dt.incremental_length_3d()) for cl3dt in dem_topolines3d]
-    topo_profiles.profile_zs = [cl3dt.z_array() for cl3dt in dem_topolines3d]
-    topo_profiles.profile_dirslopes = [np.asarray(cl3dt.slopes()) for cl3dt in dem_topolines3d]
-    topo_profiles.dem_params = [DEMParams(dem, params) for (dem, params) in
-                                zip(selected_dems, selected_dem_parameters)]
 
-    return topo_profiles
+def topoprofiles_from_dems_parallel(
+        canvas,
+        source_profile_lines,
+        sample_distance,
+        selected_dems,
+        selected_dem_parameters,
+        invert_profile,
+        num_workers
+) -> List[ProfileElevations]:
+    """
+    Create the topographic profiles of multiple profile lines,
+    distributing the profile lines and the DEMs among a pool of worker threads.
+    The results are in the same order as the source profile lines.
+
+    :param canvas: the map canvas
+    :param source_profile_lines: list of Line
+    :param sample_distance: float
+    :param selected_dems: list of qgis._core.QgsRasterLayer
+    :param selected_dem_parameters: list of QGisRasterParameters
+    :param invert_profile: bool
+    :param num_workers: number of worker threads
+    :return: list of ProfileElevations
+    """
+
+    # get project CRS information
+    on_the_fly_projection, project_crs = get_on_the_fly_projection(canvas)
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+
+        resampled_lines = list(executor.map(
+            lambda profile_line: resample_profile_line(profile_line, sample_distance, invert_profile),
+            source_profile_lines))
+
+        # one task for each (profile line, DEM) pair
+
+        dem_topolines_futures = [[executor.submit(
+            topoline_from_dem,
+            resampled_line,
+            on_the_fly_projection,
+            project_crs,
+            dem,
+            dem_params) for (dem, dem_params) in zip(selected_dems, selected_dem_parameters)]
+            for resampled_line in resampled_lines]
+
+        return [topoprofiles_from_topolines(
+            resampled_line,
+            [future.result() for future in dem_topoline_futures],
+            selected_dems,
+            selected_dem_parameters) for (resampled_line, dem_topoline_futures) in
+            zip(resampled_lines, dem_topolines_futures)]
 
 
 def topoprofiles_from_line3d(
@@ -361,18 +566,20 @@ def topoprofiles_from_line3d(
 
         topo_profiles.surface_names = ['Line 3D']
 
+        line3d = ArrayLine.from_line(line3d)
+
         if invert_profile:
             line3d = line3d.reverse_direction()
 
         topo_profiles.planar_xs = line3d.x_list
         topo_profiles.planar_ys = line3d.y_list
-        topo_profiles.profile_s = np.asarray(line3d.incremental_length_2d())
-        topo_profiles.profile_s3ds = [np.asarray(line3d.incremental_length_3d())]  # [] required for compatibility with DEM case
-        topo_profiles.profile_zs = [np.asarray(line3d.z_list)]  # [] required for compatibility with DEM case
+        topo_profiles.profile_s = line3d.incremental_length_2d()
+        topo_profiles.profile_s3ds = [line3d.incremental_length_3d()]  # [] required for compatibility with DEM case
+        topo_profiles.profile_zs = [line3d.z_array()]  # [] required for compatibility with DEM case
 
         topo_profiles.inverted = invert_profile
 
-        topo_profiles.profile_dirslopes = [np.asarray(line3d.slopes())]  # [] required for compatibility with DEM case
+        topo_profiles.profile_dirslopes = [line3d.slopes()]  # [] required for compatibility with DEM case
 
         return topo_profiles
 
@@ -387,98 +594,51 @@ def topoprofiles_from_gpxfile(
     gpx_source
 ) -> ProfileElevations:
 
-    doc = xml.dom.minidom.parse(source_gpx_path)
-
-    # define track name
-    try:
-        trkname = doc.getElementsByTagName('trk')[0].getElementsByTagName('name')[0].firstChild.data
-    except:
-        trkname = ''
-
-    # get raw track point values (lat, lon, elev, time)
-    track_raw_data = []
-    for trk_node in doc.getElementsByTagName('trk'):
-        for trksegment in trk_node.getElementsByTagName('trkseg'):
-            for tkr_pt in trksegment.getElementsByTagName('trkpt'):
-                track_raw_data.append((tkr_pt.getAttribute("lat"),
-                                       tkr_pt.getAttribute("lon"),
-                                       tkr_pt.getElementsByTagName("ele")[0].childNodes[0].data,
-                                       tkr_pt.getElementsByTagName("time")[0].childNodes[0].data))
-
-    # reverse profile orientation if requested
-    if invert_profile:
-        track_data = track_raw_data[::-1]
-    else:
-        track_data = track_raw_data
-
-    # create list of TrackPointGPX elements
-    track_points = []
-    for val in track_data:
-        gpx_trackpoint = TrackPointGPX(*val)
-        track_points.append(gpx_trackpoint)
+    trkname, lats, lons, elevations, times = read_gpx_track(source_gpx_path)
 
     # check for the presence of track points
-    if len(track_points) == 0:
+    if lats.size == 0:
         raise GPXIOException("No track point found in this file")
 
-    # calculate delta elevations between consecutive points
-    delta_elev_values = [np.nan]
-    for ndx in range(1, len(track_points)):
-        delta_elev_values.append(track_points[ndx].elev - track_points[ndx - 1].elev)
+    # reverse profile orientation if requested
+    if invert_profile:
+        lats, lons, elevations, times = lats[::-1], lons[::-1], elevations[::-1], times[::-1]
 
-    # convert original values into ECEF values (x, y, z in ECEF global coordinate system)
-    trk_ECEFpoints = [trck.as_pt3dt() for trck in track_points]
+    # convert original values into ECEF values (x, y in ECEF global coordinate system, with original elevations and times)
+    track_line = ArrayLine(*gpx_track_xyzt(lats, lons, elevations, times))
 
-    # calculate 3D distances between consecutive points
-    dist_3D_values = [np.nan]
-    for ndx in range(1, len(trk_ECEFpoints)):
-        dist_3D_values.append(trk_ECEFpoints[ndx].dist_3d(trk_ECEFpoints[ndx - 1]))
+    # calculate delta elevations and 3D distances between consecutive points
+    delta_elev_values = np.diff(elevations)
+    dist_3D_values = track_line.step_lengths_3d()
 
-    # calculate slope along track
-    dir_slopes = []
-    for delta_elev, dist_3D in zip(delta_elev_values, dist_3D_values):
-        try:
-            slope = degrees(asin(delta_elev / dist_3D))
-        except:
-            slope = 0.0
-        dir_slopes.append(slope)
+    # calculate slope along track, zero for coincident points
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = np.degrees(np.arcsin(delta_elev_values / dist_3D_values))
+    slopes[np.isnan(slopes)] = 0.0
 
     # calculate horizontal distance along track
-    horiz_dist_values = []
-    for slope, dist_3D in zip(dir_slopes, dist_3D_values):
-        try:
-            horiz_dist_values.append(dist_3D * cos(radians(slope)))
-        except:
-            horiz_dist_values.append(np.nan)
-
-    # defines the cumulative 2D distance values
-    cum_distances_2D = [0.0]
-    for ndx in range(1, len(horiz_dist_values)):
-        cum_distances_2D.append(cum_distances_2D[-1] + horiz_dist_values[ndx])
+    horiz_dist_values = dist_3D_values * np.cos(np.radians(slopes))
 
-    # defines the cumulative 3D distance values
-    cum_distances_3D = [0.0]
-    for ndx in range(1, len(dist_3D_values)):
-        cum_distances_3D.append(cum_distances_3D[-1] + dist_3D_values[ndx])
+    # defines the cumulative 2D and 3D distance values
+    cum_distances_2D = np.concatenate(([0.0], np.cumsum(horiz_dist_values)))
+    cum_distances_3D = np.concatenate(([0.0], np.cumsum(dist_3D_values)))
 
-    lat_values = [track.lat for track in track_points]
-    lon_values = [track.lon for track in track_points]
-    time_values = [track.time for track in track_points]
-    elevations = [track.elev for track in track_points]
+    dir_slopes = np.concatenate(([np.nan], slopes))  # slope value for first point is unknown
 
     topo_profiles = ProfileElevations()
 
     topo_profiles.line_source = gpx_source
     topo_profiles.inverted = invert_profile
 
-    topo_profiles.lons = np.asarray(lon_values)
-    topo_profiles.lats = np.asarray(lat_values)
-    topo_profiles.times = time_values
+    topo_profiles.lons = lons
+    topo_profiles.lats = lats
+    topo_profiles.times = times
+    topo_profiles.time_seconds = track_line.ts
     topo_profiles.surface_names = [trkname]  # [] required for compatibility with DEM case
-    topo_profiles.profile_s = np.asarray(cum_distances_2D)
-    topo_profiles.profile_s3ds = [np.asarray(cum_distances_3D)]  # [] required for compatibility with DEM case
-    topo_profiles.profile_zs = [np.asarray(elevations)]  # [] required for compatibility with DEM case
-    topo_profiles.profile_dirslopes = [np.asarray(dir_slopes)]  # [] required for compatibility with DEM case
+    topo_profiles.profile_s = cum_distances_2D
+    topo_profiles.profile_s3ds = [cum_distances_3D]  # [] required for compatibility with DEM case
+    topo_profiles.profile_zs = [elevations]  # [] required for compatibility with DEM case
+    topo_profiles.profile_dirslopes = [dir_slopes]  # [] required for compatibility with DEM case
 
     return topo_profiles
 
@@ -495,92 +655,212 @@ def intersect_with_dem(demLayer, demParams, on_the_fly_projection, project_crs,
     """
 
     # project to Dem CRS
+    xs = [pt.x for pt in lIntersPts]
+    ys = [pt.y for pt in lIntersPts]
+
     if on_the_fly_projection and demParams.crs != project_crs:
-        lQgsPoints = [QgsPointXY(pt.x, pt.y) for pt in lIntersPts]
-        lDemCrsIntersQgsPoints = [project_qgs_point(qgsPt, project_crs, demParams.crs) for qgsPt in
-                                               lQgsPoints]
-        lDemCrsIntersPts = [Point(qgispt.x(), qgispt.y()) for qgispt in lDemCrsIntersQgsPoints]
+        dem_crs_xs, dem_crs_ys = project_xy_arrays(xs, ys, project_crs, demParams.crs)
     else:
-        lDemCrsIntersPts = lIntersPts
+        dem_crs_xs, dem_crs_ys = xs, ys
 
     # interpolate z values from Dem
-    lZVals = [interpolate_z(demLayer, demParams, pt) for pt in lDemCrsIntersPts]
+    lZVals = interpolate_z_array(
+        demLayer,
+        demParams,
+        dem_crs_xs,
+        dem_crs_ys)
 
     lXYZVals = [(pt2d.x, pt2d.y, z) for pt2d, z in zip(lIntersPts, lZVals)]
 
     return [Point(x, y, z) for x, y, z in lXYZVals]
 
 
-def calculate_profile_lines_intersection(multilines2d_list, id_list, profile_line2d):
+def profile_lines_intersections(multilines2d_list, id_list, profile_line2d):
+    """
+    Intersections between a profile, made up by one or more segments, and the lines,
+    sorted by their distance along the profile from its start.
+    The line segments are spatially indexed, so that only the ones
+    near each profile segment are intersected with it.
+
+    :param multilines2d_list: list of MultiLine
+    :param id_list: list of line ids, or None
+    :param profile_line2d: Line
+    :return: list of (distance from profile start, Point, line id) tuples
+    """
+
+    profile = ArrayLine.from_line(profile_line2d)
+
+    # all the line segments, stored as arrays
+
+    multiline_ndxs = [ndx for ndx, multiline2d in enumerate(multilines2d_list) for _ in multiline2d.lines]
+    lines = ArrayMultiLine.from_lines(
+        [ArrayLine.from_line(line2d) for multiline2d in multilines2d_list for line2d in multiline2d.lines])
+
+    segment_starts = lines.segment_start_ndxs()
+    segment_multiline_ndxs = np.asarray(multiline_ndxs, dtype=np.int64)[lines.segment_part_ndxs(segment_starts)]
+
+    start_xs, start_ys = lines.xs[segment_starts], lines.ys[segment_starts]
+    end_xs, end_ys = lines.xs[segment_starts + 1], lines.ys[segment_starts + 1]
 
-    profile_segment2d_list = profile_line2d.as_segments()
+    is_valid = np.isfinite(start_xs) & np.isfinite(start_ys) & np.isfinite(end_xs) & np.isfinite(end_ys)
+    valid_segments = np.flatnonzero(is_valid)
 
-    profile_segment2d = profile_segment2d_list[0]
+    segments_index = SegmentGridIndex(
+        start_xs[valid_segments],
+        start_ys[valid_segments],
+        end_xs[valid_segments],
+        end_ys[valid_segments])
 
-    intersection_list = []
-    for ndx, multiline2d in enumerate(multilines2d_list):
+    # candidate (profile segment, line segment) pairs
+
+    profile_ndxs, candidate_segments = segments_index.query_segments(
+        profile.xs[:-1],
+        profile.ys[:-1],
+        profile.xs[1:],
+        profile.ys[1:])
+
+    candidate_segments = valid_segments[candidate_segments]
+
+    # exact intersections, for the candidate pairs only
+
+    is_intersecting, inters_xs, inters_ys, profile_params, _ = segment_pairs_intersections_2d(
+        profile.xs[profile_ndxs],
+        profile.ys[profile_ndxs],
+        profile.xs[profile_ndxs + 1],
+        profile.ys[profile_ndxs + 1],
+        start_xs[candidate_segments],
+        start_ys[candidate_segments],
+        end_xs[candidate_segments],
+        end_ys[candidate_segments])
+
+    profile_ndxs, candidate_segments = profile_ndxs[is_intersecting], candidate_segments[is_intersecting]
+    inters_xs, inters_ys, profile_params = inters_xs[is_intersecting], inters_ys[is_intersecting], profile_params[is_intersecting]
+
+    # distances from the cumulative lengths at the profile vertices
+
+    profile_vertex_distances = profile.incremental_length_2d()
+    profile_step_lengths = np.diff(profile_vertex_distances)
+
+    distances = profile_vertex_distances[profile_ndxs] + profile_params * profile_step_lengths[profile_ndxs]
+
+    # remove the intersections found twice, for a line segment crossing the profile at a profile vertex,
+    # and sort by distance
+
+    order = np.lexsort((distances, candidate_segments))
+
+    is_duplicated = np.zeros(order.size, dtype=bool)
+    is_duplicated[1:] = \
+        (candidate_segments[order[1:]] == candidate_segments[order[:-1]]) & \
+        (distances[order[1:]] - distances[order[:-1]] <= MIN_SEPARATION_THRESHOLD)
+
+    order = order[~is_duplicated]
+    order = order[np.argsort(distances[order], kind='stable')]
+
+    intersections = []
+    for distance, segment_ndx, x, y in zip(distances[order], candidate_segments[order], inters_xs[order], inters_ys[order]):
         if id_list is None:
             multiline_id = ''
         else:
-            multiline_id = id_list[ndx]
-        for line2d in multiline2d.lines:
-            for line_segment2d in line2d.as_segments():
-                try:
-                    intersection_point2d = profile_segment2d.intersection_2d_pt(line_segment2d)
-                except ZeroDivisionError:
-                    continue
-                if intersection_point2d is None:
-                    continue
-                if line_segment2d.contains_2d_pt(intersection_point2d) and \
-                   profile_segment2d.contains_2d_pt(intersection_point2d):
-                    intersection_list.append([intersection_point2d, multiline_id])
+            multiline_id = id_list[segment_multiline_ndxs[segment_ndx]]
+        intersections.append((float(distance), Point(float(x), float(y)), multiline_id))
+
+    return intersections
+
+
+def calculate_profile_lines_intersection(multilines2d_list, id_list, profile_line2d):
+    """
+    Intersection points between the profile and the lines,
+    sorted by distance from the profile start.
+
+    :param multilines2d_list: list of MultiLine
+    :param id_list: list of line ids, or None
+    :param profile_line2d: Line
+    :return: list of [Point, line id] pairs
+    """
 
-    return intersection_list
+    return [[intersection_point2d, multiline_id] for (_, intersection_point2d, multiline_id) in
+            profile_lines_intersections(multilines2d_list, id_list, profile_line2d)]
 
 
 def intersection_distances_by_profile_start_list(profile_line, intersections):
+    """
+    Distances along the profile, from its start, of the intersection points.
+    Each point is referred to the nearest profile segment.
+
+    :param profile_line: Line
+    :param intersections: list of [Point, line id] pairs
+    :return: list of float
+    """
 
-    # convert the profile line
-    # from a CartesianLine2DT to a CartesianSegment2DT
-    profile_segment2d_list = profile_line.as_segments()
-    # debug
-    assert len(profile_segment2d_list) == 1
-    profile_segment2d = profile_segment2d_list[0]
+    profile = ArrayLine.from_line(profile_line)
 
-    # determine distances for each point in intersection list
-    # creating a list of float values
-    distance_from_profile_start_list = []
-    for intersection in intersections:
-        distance_from_profile_start_list.append(profile_segment2d.start_pt.dist_2d(intersection[0]))
+    pt_xs = np.array([intersection[0].x for intersection in intersections], dtype=np.float64)[:, np.newaxis]
+    pt_ys = np.array([intersection[0].y for intersection in intersections], dtype=np.float64)[:, np.newaxis]
 
-    return distance_from_profile_start_list
+    # projection of each point on each profile segment (points by rows, segments by columns)
+
+    start_xs, start_ys = profile.xs[:-1], profile.ys[:-1]
+    delta_xs, delta_ys = np.diff(profile.xs), np.diff(profile.ys)
+    step_lengths = np.hypot(delta_xs, delta_ys)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        params = np.clip(((pt_xs - start_xs) * delta_xs + (pt_ys - start_ys) * delta_ys) / step_lengths ** 2, 0.0, 1.0)
+    params[:, step_lengths == 0.0] = 0.0
+
+    separations = np.hypot(start_xs + params * delta_xs - pt_xs, start_ys + params * delta_ys - pt_ys)
+    nearest_ndxs = np.argmin(separations, axis=1)
+
+    distances = profile.incremental_length_2d()[nearest_ndxs] + \
+        params[np.arange(nearest_ndxs.size), nearest_ndxs] * step_lengths[nearest_ndxs]
+
+    return distances.tolist()
 
 
 def calculate_pts_in_projection(pts_in_orig_crs, srcCrs, destCrs):
 
-    pts_in_prj_crs = []
-    for pt in pts_in_orig_crs:
-        qgs_pt = QgsPointXY(pt.x, pt.y)
-        qgs_pt_prj_crs = project_qgs_point(qgs_pt, srcCrs, destCrs)
-        pts_in_prj_crs.append(Point(qgs_pt_prj_crs.x(), qgs_pt_prj_crs.y()))
-    return pts_in_prj_crs
+    xs, ys = project_xy_arrays([pt.x for pt in pts_in_orig_crs], [pt.y for pt in pts_in_orig_crs], srcCrs, destCrs)
+
+    return [Point(x, y) for (x, y) in zip(xs, ys)]
 
 
 def profile_polygon_intersection(profile_qgsgeometry, polygon_layer, inters_polygon_classifaction_field_ndx):
+    """
+    Intersect the profile with the (selected) polygons of the layer.
+    Only the polygons whose bounding box overlaps the profile one are fetched,
+    and they are tested against the profile geometry, prepared once,
+    before calculating the intersections.
+
+    :param profile_qgsgeometry: QgsGeometry, in the polygon layer CRS
+    :param polygon_layer: QgsVectorLayer
+    :param inters_polygon_classifaction_field_ndx: int, index of the classification field (-1 when not used)
+    :return: tuple of success (bool) and the list of [classification, polyline] pairs or the error message
+    """
 
     intersection_polyline_polygon_crs_list = []
 
+    request = QgsFeatureRequest().setFilterRect(profile_qgsgeometry.boundingBox())
+    if inters_polygon_classifaction_field_ndx >= 0:
+        request.setSubsetOfAttributes([inters_polygon_classifaction_field_ndx])
+    else:
+        request.setSubsetOfAttributes([])
+
     if polygon_layer.selectedFeatureCount() > 0:
-        features = polygon_layer.selectedFeatures()
+        features = polygon_layer.getSelectedFeatures(request)
     else:
-        features = polygon_layer.getFeatures()
+        features = polygon_layer.getFeatures(request)
+
+    profile_geometry_engine = QgsGeometry.createGeometryEngine(profile_qgsgeometry.constGet())
+    profile_geometry_engine.prepareGeometry()
 
     for polygon_feature in features:
-        # retrieve every (selected) feature with its geometry and attributes
+        # retrieve every (selected) feature near the profile with its geometry and attributes
 
         # fetch geometry
         poly_geom = polygon_feature.geometry()
 
+        if not profile_geometry_engine.intersects(poly_geom.constGet()):
+            continue
+
         intersection_qgsgeometry = poly_geom.intersection(profile_qgsgeometry)
 
         try:
@@ -636,6 +916,52 @@ def extract_multiline2d_list(
     return line_proj_crs_MultiLine2D_list
 
 
+def extract_ragged_lines(
+        structural_line_layer,
+        on_the_fly_projection,
+        project_crs
+):
+    """
+    Read all the lines of the (selected) layer features as a single ArrayMultiLine,
+    in the project CRS and with coincident successive points removed,
+    together with the offsets of the parts of each feature
+    (feature n has the parts from feature_part_offsets[n] to feature_part_offsets[n + 1]).
+
+    :param structural_line_layer: QgsVectorLayer
+    :param on_the_fly_projection: bool
+    :param project_crs: QgsCoordinateReferenceSystem
+    :return: tuple of ArrayMultiLine and numpy.array of int
+    """
+
+    line_orig_crs_geoms_attrs = line_geoms_attrs(structural_line_layer)
+
+    lines_xy = [np.asarray(xy_list, dtype=np.float64).reshape(-1, 2) for geom_data in line_orig_crs_geoms_attrs
+                for xy_list in geom_data[0]]
+    lines_num_pts = [line_xy.shape[0] for line_xy in lines_xy]
+
+    if lines_xy:
+        xys = np.concatenate(lines_xy)
+    else:
+        xys = np.zeros((0, 2))
+
+    lines_orig_crs = ArrayMultiLine(
+        xys[:, 0],
+        xys[:, 1],
+        part_offsets=np.concatenate(([0], np.cumsum(lines_num_pts))).astype(np.int64)).remove_coincident_points()
+
+    feature_part_offsets = np.concatenate(
+        ([0], np.cumsum([len(geom_data[0]) for geom_data in line_orig_crs_geoms_attrs]))).astype(np.int64)
+
+    # project input lines to project CRS
+
+    if on_the_fly_projection:
+        lines_proj_crs = lines_orig_crs.crs_project(structural_line_layer.crs(), project_crs)
+    else:
+        lines_proj_crs = lines_orig_crs
+
+    return lines_proj_crs, feature_part_offsets
+
+
 def define_plot_structural_segment(
     structural_attitude,
     profile_length, #Is this length of the section?
@@ -752,6 +1078,62 @@ def define_plot_structural_segment(
     return structural_segment_s, structural_segment_z
     """
 
+
+def define_plot_structural_segments(
+    h_dists,
+    zs,
+    slopes_rad,
+    downward_lefts,
+    profile_length,
+    vertical_exaggeration,
+    segment_scale_factor=55.0
+):
+    """
+    Segments representing many structural attitudes at once,
+    with the same geometry as define_plot_structural_segment.
+
+    :param h_dists: array-like of float, signed horizontal distances along the section
+    :param zs: array-like of float
+    :param slopes_rad: array-like of float
+    :param downward_lefts: array-like of bool, whether the downward sense is to the left
+    :param profile_length: float
+    :param vertical_exaggeration: float
+    :param segment_scale_factor: float
+    :return: numpy.array of float, with shape (n, 2, 2): the (s, z) values of the segment ends
+    """
+
+    h_dists = np.asarray(h_dists, dtype=np.float64)
+    zs = np.asarray(zs, dtype=np.float64)
+    slopes_rad = np.asarray(slopes_rad, dtype=np.float64)
+
+    ve = float(vertical_exaggeration)
+    length = profile_length / segment_scale_factor
+
+    s_slopes = np.sin(slopes_rad)
+    c_slopes = np.cos(slopes_rad)
+
+    is_vertical = c_slopes == 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        t_slopes = s_slopes / c_slopes
+        widths = length * c_slopes
+        lengths_exag = widths * np.sqrt(1 + ve * ve * t_slopes * t_slopes)
+        corr_widths = np.where(is_vertical, 0.0, widths * length / lengths_exag)
+        corr_heights = np.where(is_vertical, length / ve, corr_widths * t_slopes)
+
+    # the segment rises leftwards, unless the downward sense is to the left
+    corr_heights = np.where(np.asarray(downward_lefts, dtype=np.bool_) & ~is_vertical, -corr_heights, corr_heights)
+
+    segments = np.empty((h_dists.size, 2, 2))
+    segments[:, 0, 0] = h_dists - corr_widths
+    segments[:, 1, 0] = h_dists + corr_widths
+    segments[:, 0, 1] = zs + corr_heights
+    segments[:, 1, 1] = zs - corr_heights
+
+    return segments
+
+
 def calculate_projected_3d_pts(canvas, struct_pts, structural_pts_crs, demObj):
 
     demCrs = demObj.params.crs
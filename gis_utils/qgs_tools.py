@@ -2,6 +2,7 @@
 from typing import Optional, Union, List
 
 import numbers
+import threading
 
 from builtins import str
 from builtins import object
@@ -28,6 +29,7 @@ from qgis.PyQt.QtGui import *
 from qgis.PyQt.QtWidgets import *
 
 from .errors import VectorIOException
+from .dem_sampling import tiled_cell_values, bilinear_zs
 from ..gsf.geometry import Point
 
 
@@ -93,15 +95,37 @@ def loaded_monoband_raster_layers():
     return [layer for layer in loaded_raster_layers() if layer.bandCount() == 1]
 
 
-def pt_geoms_attrs(pt_layer, field_list=None):
+def layer_features(layer, filter_rect=None):
+    """
+    The selected features of the layer, or all its features when none is selected.
+    With a filter rectangle, only the features intersecting it are fetched,
+    through the spatial index of the layer provider.
+
+    :param layer: qgis._core.QgsVectorLayer
+    :param filter_rect: qgis._core.QgsRectangle in the layer CRS, or None
+    :return: iterable of qgis._core.QgsFeature
+    """
+
+    if filter_rect is None:
+        if layer.selectedFeatureCount() > 0:
+            return layer.selectedFeatures()
+        else:
+            return layer.getFeatures()
+
+    request = QgsFeatureRequest().setFilterRect(filter_rect)
+
+    if layer.selectedFeatureCount() > 0:
+        return layer.getSelectedFeatures(request)
+    else:
+        return layer.getFeatures(request)
+
+
+def pt_geoms_attrs(pt_layer, field_list=None, filter_rect=None):
 
     if field_list is None:
         field_list = []
 
-    if pt_layer.selectedFeatureCount() > 0:
-        features = pt_layer.selectedFeatures()
-    else:
-        features = pt_layer.getFeatures()
+    features = layer_features(pt_layer, filter_rect)
 
     provider = pt_layer.dataProvider()
     field_indices = [provider.fieldNameIndex(field_name) for field_name in field_list if field_name]
@@ -234,12 +258,9 @@ def field_values(layer, curr_field_ndx):
     return values
 
 
-def vect_attrs(layer, field_list):
+def vect_attrs(layer, field_list, filter_rect=None):
 
-    if layer.selectedFeatureCount() > 0:
-        features = layer.selectedFeatures()
-    else:
-        features = layer.getFeatures()
+    features = layer_features(layer, filter_rect)
 
     provider = layer.dataProvider()
     field_indices = [provider.fieldNameIndex(field_name) for field_name in field_list]
@@ -289,9 +310,74 @@ def qgs_pt(x, y):
     return QgsPointXY(x, y)
 
 
+_coordinate_transforms = threading.local()
+
+
+def coordinate_transform(srcCrs, destCrs):
+    """
+    Return the coordinate transform between two CRSs.
+    Transforms are created once for each (source CRS, destination CRS) pair
+    and then reused; each thread has its own transforms,
+    since QgsCoordinateTransform instances are not thread-safe.
+
+    :param srcCrs: qgis._core.QgsCoordinateReferenceSystem
+    :param destCrs: qgis._core.QgsCoordinateReferenceSystem
+    :return: qgis._core.QgsCoordinateTransform
+    """
+
+    try:
+        transforms = _coordinate_transforms.transforms
+    except AttributeError:
+        transforms = _coordinate_transforms.transforms = dict()
+
+    key = (srcCrs.toWkt(), destCrs.toWkt())
+
+    transform = transforms.get(key)
+    if transform is None:
+        transform = transforms[key] = QgsCoordinateTransform(srcCrs, destCrs, QgsProject.instance())
+
+    return transform
+
+
 def project_qgs_point(qgsPt, srcCrs, destCrs):
 
-    return QgsCoordinateTransform(srcCrs, destCrs, QgsProject.instance()).transform(qgsPt)
+    return coordinate_transform(srcCrs, destCrs).transform(qgsPt)
+
+
+def project_rectangle(rect, srcCrs, destCrs):
+    """
+    Rectangle enclosing the projected rectangle.
+
+    :param rect: qgis._core.QgsRectangle
+    :param srcCrs: qgis._core.QgsCoordinateReferenceSystem
+    :param destCrs: qgis._core.QgsCoordinateReferenceSystem
+    :return: qgis._core.QgsRectangle
+    """
+
+    return coordinate_transform(srcCrs, destCrs).transformBoundingBox(rect)
+
+
+def project_xy_arrays(xs, ys, srcCrs, destCrs):
+    """
+    Project arrays of x and y coordinates with a single transform call.
+
+    :param xs: array-like of float
+    :param ys: array-like of float
+    :param srcCrs: qgis._core.QgsCoordinateReferenceSystem
+    :param destCrs: qgis._core.QgsCoordinateReferenceSystem
+    :return: tuple of two numpy.array of float
+    """
+
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+
+    if xs.size == 0:
+        return xs.copy(), ys.copy()
+
+    coords = QgsLineString(xs.tolist(), ys.tolist())
+    coords.transform(coordinate_transform(srcCrs, destCrs))
+
+    return np.array(coords.xVector(), dtype=np.float64), np.array(coords.yVector(), dtype=np.float64)
 
 
 def project_point(pt, srcCrs, destCrs):
@@ -560,14 +646,158 @@ def interpolate_z(dem, dem_params, point):
         return np.nan
 
 
-def get_zs_from_dem(struct_pts_2d, demObj):
+qgis_numpy_dtypes = {
+    Qgis.Byte: np.uint8,
+    Qgis.UInt16: np.uint16,
+    Qgis.Int16: np.int16,
+    Qgis.UInt32: np.uint32,
+    Qgis.Int32: np.int32,
+    Qgis.Float32: np.float32,
+    Qgis.Float64: np.float64
+}
+
 
-    z_list = []
-    for point_2d in struct_pts_2d:
-        interp_z = interpolate_z(demObj.layer, demObj.params, point_2d)
-        z_list.append(interp_z)
+def raster_block_to_array(block, nodatavalue=np.nan):
+    """
+    Convert a raster block into a float array.
+    No-data cells are set to nan.
+
+    :param block: qgis._core.QgsRasterBlock
+    :param nodatavalue: float
+    :return: 2D numpy.array, with the first row being the northernmost one
+    """
+
+    rows, cols = block.height(), block.width()
+
+    if not block.isValid():
+        return np.full((rows, cols), np.nan)
+
+    dtype = qgis_numpy_dtypes.get(block.dataType())
+    if dtype is not None:
+        values = np.frombuffer(bytes(block.data()), dtype=dtype).reshape(rows, cols).astype(np.float64)
+    else:
+        values = np.array([[block.value(row, col) for col in range(cols)] for row in range(rows)], dtype=np.float64)
+
+    if block.hasNoDataValue():
+        values[values == block.noDataValue()] = np.nan
+
+    if not isnan(nodatavalue):
+        values[values == nodatavalue] = np.nan
+
+    return values
+
+
+_raster_providers = threading.local()
+
+
+def raster_provider(layer):
+    """
+    Return a data provider of the raster layer that can be used in the current thread.
+    Raster providers are not thread-safe, so the main thread uses the layer provider
+    while each worker thread uses its own clone, created once per layer.
+
+    :param layer: qgis._core.QgsRasterLayer
+    :return: qgis._core.QgsRasterDataProvider
+    """
+
+    if threading.current_thread() is threading.main_thread():
+        return layer.dataProvider()
+
+    try:
+        providers = _raster_providers.providers
+    except AttributeError:
+        providers = _raster_providers.providers = dict()
+
+    provider = providers.get(layer.id())
+    if provider is None:
+        provider = providers[layer.id()] = layer.dataProvider().clone()
+
+    return provider
+
+
+def read_dem_block(dem, dem_params, row_min, row_max, col_min, col_max, band=1):
+    """
+    Read a window of DEM cells with a single provider call.
+    Row indices increase northward, starting from the southernmost row,
+    as in QGisRasterParameters.geogr2raster.
+
+    :param dem: qgis._core.QgsRasterLayer
+    :param dem_params: qProf.gis_utils.qgs_tools.QGisRasterParameters
+    :param row_min: int
+    :param row_max: int
+    :param col_min: int
+    :param col_max: int
+    :param band: int
+    :return: 2D numpy.array, indexed by (row - row_min, col - col_min)
+    """
+
+    extent = QgsRectangle(
+        dem_params.xMin + col_min * dem_params.cellsizeEW,
+        dem_params.yMin + row_min * dem_params.cellsizeNS,
+        dem_params.xMin + (col_max + 1) * dem_params.cellsizeEW,
+        dem_params.yMin + (row_max + 1) * dem_params.cellsizeNS)
+
+    block = raster_provider(dem).block(
+        band,
+        extent,
+        col_max - col_min + 1,
+        row_max - row_min + 1)
+
+    return raster_block_to_array(block, dem_params.nodatavalue)[::-1, :]
+
+
+def dem_cell_values(dem, dem_params, rows, cols, band=1):
+    """
+    Return the values of the DEM cells with the given (row, col) indices.
+    Only the tiles containing the cells are read, each one
+    through the process-wide DEM tile cache.
+
+    :param dem: qgis._core.QgsRasterLayer
+    :param dem_params: qProf.gis_utils.qgs_tools.QGisRasterParameters
+    :param rows: numpy.array of int
+    :param cols: numpy.array of int
+    :param band: int
+    :return: numpy.array of float
+    """
+
+    return tiled_cell_values(
+        dem.id(),
+        dem_params,
+        rows,
+        cols,
+        lambda row_min, row_max, col_min, col_max, band: read_dem_block(
+            dem, dem_params, row_min, row_max, col_min, col_max, band),
+        band)
+
+
+def interpolate_z_array(dem, dem_params, xs, ys):
+    """
+    Interpolate the z values of many points at once.
+    Bilinear interpolation is applied to points within the area
+    defined by the extreme cell centers, the cell value to points
+    on the remaining border of the DEM, while points outside the DEM get nan.
+
+    :param dem: qgis._core.QgsRasterLayer
+    :param dem_params: qProf.gis_utils.qgs_tools.QGisRasterParameters
+    :param xs: array-like of float, in the DEM CRS
+    :param ys: array-like of float, in the DEM CRS
+    :return: numpy.array of float
+    """
+
+    return bilinear_zs(
+        dem_params,
+        xs,
+        ys,
+        lambda rows, cols: dem_cell_values(dem, dem_params, rows, cols))
+
+
+def get_zs_from_dem(struct_pts_2d, demObj):
 
-    return z_list
+    return list(interpolate_z_array(
+        demObj.layer,
+        demObj.params,
+        [pt.x for pt in struct_pts_2d],
+        [pt.y for pt in struct_pts_2d]))
 
 
 def xy_from_canvas(canvas, position):
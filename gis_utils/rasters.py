@@ -6,7 +6,9 @@ import copy
 
 import numpy as np
 
-from ..gsf.geometry import MIN_SEPARATION_THRESHOLD, Point
+from ..gsf.geometry import MIN_SEPARATION_THRESHOLD, MIN_SCALAR_VALUE, Point
+
+from ..config.settings import grid_chunk_num_cells
 
 
 class ArrCoord(object):
@@ -72,8 +74,8 @@ class ArrCoord(object):
     j = property(g_j, s_j)
 
     def grid2geogcoord(self, currGeoGrid):
-        currPt_geogr_y = currGeoGrid.domain.trcorner.p_y - self.i * currGeoGrid.cellsize_y
-        currPt_geogr_x = currGeoGrid.domain.llcorner.p_x + self.j * currGeoGrid.cellsize_x
+        currPt_geogr_y = currGeoGrid.domain.trcorner.y - self.i * currGeoGrid.cellsize_y
+        currPt_geogr_x = currGeoGrid.domain.llcorner.x + self.j * currGeoGrid.cellsize_x
 
         return Point(currPt_geogr_x, currPt_geogr_y)
 
@@ -123,7 +125,7 @@ class RectangularDomain(object):
 
         @return:  x range - float.
         """
-        return self.trcorner.p_x - self.llcorner.p_x
+        return self.trcorner.x - self.llcorner.x
 
     @property
     def yrange(self):
@@ -132,7 +134,7 @@ class RectangularDomain(object):
 
         @return:  y range - float.
         """
-        return self.trcorner.p_y - self.llcorner.p_y
+        return self.trcorner.y - self.llcorner.y
 
     @property
     def zrange(self):
@@ -141,7 +143,7 @@ class RectangularDomain(object):
 
         @return:  z range - float.
         """
-        return self.trcorner.p_z - self.llcorner.p_z
+        return self.trcorner.z - self.llcorner.z
 
     @property
     def horiz_area(self):
@@ -160,7 +162,7 @@ class Grid(object):
 
     """
 
-    def __init__(self, source_filename=None, grid_params=None, grid_data=None):
+    def __init__(self, source_filename=None, grid_params=None, grid_data=None, copy_data=True):
         """
         Grid class constructor.
 
@@ -170,6 +172,8 @@ class Grid(object):
         @type  grid_params:  class GDALParameters.
         @param  grid_data:  the array storing the data.
         @type  grid_data:  2D np.array.
+        @param  copy_data:  whether to copy the data array, or to use it (e.g. a view or a shared array) as it is.
+        @type  copy_data:  bool.
 
         @return:  self.
         """
@@ -185,7 +189,7 @@ class Grid(object):
         self._grid_domain = RectangularDomain(pt_llc, pt_trc)
 
         if grid_data is not None:
-            self._grid_data = grid_data.copy()
+            self._grid_data = grid_data.copy() if copy_data else grid_data
         else:
             self._grid_data = None
 
@@ -263,10 +267,10 @@ class Grid(object):
         Return the xmin, xmax and ymin, ymax values as a dictionary
         """
 
-        return dict(xmin=self.domain.llcorner.p_x,
-                    xmax=self.domain.trcorner.p_x,
-                    ymin=self.domain.llcorner.p_y,
-                    ymax=self.domain.trcorner.p_y)
+        return dict(xmin=self.domain.llcorner.x,
+                    xmax=self.domain.trcorner.x,
+                    ymin=self.domain.llcorner.y,
+                    ymax=self.domain.trcorner.y)
 
     @property
     def xmin(self):
@@ -347,8 +351,8 @@ class Grid(object):
 
         @return: point coordinates in raster (array) frame - class ArrCoord.
         """
-        currArrCoord_grid_i = (self.domain.trcorner.p_y - curr_Pt.p_y) / self.cellsize_y
-        currArrCoord_grid_j = (curr_Pt.p_x - self.domain.llcorner.p_x) / self.cellsize_x
+        currArrCoord_grid_i = (self.domain.trcorner.y - curr_Pt.y) / self.cellsize_y
+        currArrCoord_grid_j = (curr_Pt.x - self.domain.llcorner.x) / self.cellsize_x
 
         return ArrCoord(currArrCoord_grid_i, currArrCoord_grid_j)
 
@@ -360,7 +364,7 @@ class Grid(object):
         @return: numpy.array, shape: 1 x col_num.
         """
 
-        x_values = self.domain.llcorner.p_x + self.cellsize_x * (0.5 + np.arange(self.col_num))
+        x_values = self.domain.llcorner.x + self.cellsize_x * (0.5 + np.arange(self.col_num))
 
         return x_values[np.newaxis, :]
 
@@ -372,10 +376,40 @@ class Grid(object):
         @return: numpy.array, shape: row_num x 1.
         """
 
-        y_values = self.domain.trcorner.p_y - self.cellsize_y * (0.5 + np.arange(self.row_num))
+        y_values = self.domain.trcorner.y - self.cellsize_y * (0.5 + np.arange(self.row_num))
 
         return y_values[:, np.newaxis]
 
+    def window(self, center_x, center_y, radius):
+        """
+        Creates a grid covering the cells within a square window around a point.
+        The window data is a view of the grid data, not a copy.
+
+        @param center_x: x coordinate of the window center.
+        @type center_x: float.
+        @param center_y: y coordinate of the window center.
+        @type center_y: float.
+        @param radius: half side of the window.
+        @type radius: float.
+
+        @return: Grid instance, or None when the window is outside the grid.
+        """
+
+        col_start = max(int(floor((center_x - radius - self.xmin) / self.cellsize_x)), 0)
+        col_end = min(int(ceil((center_x + radius - self.xmin) / self.cellsize_x)), self.col_num)
+        row_start = max(int(floor((self.ymax - (center_y + radius)) / self.cellsize_y)), 0)
+        row_end = min(int(ceil((self.ymax - (center_y - radius)) / self.cellsize_y)), self.row_num)
+
+        if col_start >= col_end or row_start >= row_end:
+            return None
+
+        window_grid = Grid(grid_data=self.data[row_start:row_end, col_start:col_end], copy_data=False)
+        window_grid.domain = RectangularDomain(
+            Point(self.xmin + col_start * self.cellsize_x, self.ymax - row_end * self.cellsize_y),
+            Point(self.xmin + col_end * self.cellsize_x, self.ymax - row_start * self.cellsize_y))
+
+        return window_grid
+
     def grad_forward_y(self):
         """
         Return an array representing the forward gradient in the y direction (top-wards), with values scaled by cell size.
@@ -431,10 +465,124 @@ class Grid(object):
 
         return grid_val_interp
 
-    def intersection_with_surface(self, surf_type, srcPt, srcPlaneAttitude):
+    def chunk_num_rows(self, chunk_num_cells=grid_chunk_num_cells):
         """
-        Calculates the intersections (as points) between DEM (the self object) and an analytical surface.
-        Currently it works only with planes.
+        Number of rows processed at a time, so that each chunk has about chunk_num_cells cells.
+
+        @param chunk_num_cells: maximum number of cells in a chunk.
+        @type chunk_num_cells: int.
+
+        @return: number of rows - int.
+        """
+
+        return max(int(chunk_num_cells // max(self.col_num, 1)), 1)
+
+    def plane_intersections_in_rows(self, row_start, row_end, plane_coeffs):
+        """
+        Calculates the intersections between the plane and the DEM segments
+        joining the cell centers, for the rows from row_start to row_end (excluded).
+        Temporary arrays are limited to the size of the processed rows.
+
+        @param row_start: first row.
+        @type row_start: int.
+        @param row_end: row after the last one.
+        @type row_end: int.
+        @param plane_coeffs: x coefficient, y coefficient and constant term of the plane, as z = f(x, y).
+        @type plane_coeffs: tuple of three floats.
+
+        @return: tuple of four arrays, with the same shape as the processed rows:
+        x and y coordinates of the intersections along the x axis,
+        x and y coordinates of the intersections along the y axis (nan where no intersection).
+        """
+
+        plane_x_coeff, plane_y_coeff, plane_const = plane_coeffs
+
+        cell_center_x_array = self.x()
+        cell_center_y_array = self.y()[row_start:row_end]
+
+        ycoords_x, xcoords_y = np.broadcast_arrays(cell_center_x_array, cell_center_y_array)
+
+        rows_data = self.data[row_start:row_end].astype(np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+
+            #### x-axis direction intersections
+
+            # DEM segments between the cell center and the next one rightwards
+            x_dem_m = np.full(rows_data.shape, np.nan)
+            x_dem_m[:, :-1] = (rows_data[:, 1:] - rows_data[:, :-1]) / float(self.cellsize_x)
+            x_dem_q = rows_data - cell_center_x_array * x_dem_m
+
+            # plane segments along the rows
+            x_plane_q = plane_y_coeff * cell_center_y_array + plane_const
+
+            xcoords_x = (x_plane_q - x_dem_q) / (x_dem_m - plane_x_coeff)
+
+            # DEM segment lying on the plane: intersection at the cell center
+            coincident_x = (x_dem_m == plane_x_coeff) & (x_dem_q == x_plane_q)
+            xcoords_x[coincident_x] = ycoords_x[coincident_x]
+
+            # filter out cases where intersection is outside cell range
+            xcoords_x[~((ycoords_x <= xcoords_x) & (xcoords_x < ycoords_x + self.cellsize_x))] = np.nan
+
+            del x_dem_m, x_dem_q, coincident_x
+
+            #### y-axis direction intersections
+
+            # DEM segments between the cell center and the next one upwards, i.e. in the previous row
+            upper_rows_data = np.empty(rows_data.shape)
+            upper_rows_data[1:] = rows_data[:-1]
+            upper_rows_data[0] = self.data[row_start - 1] if row_start > 0 else np.nan
+
+            y_dem_m = (upper_rows_data - rows_data) / float(self.cellsize_y)
+            y_dem_q = rows_data - cell_center_y_array * y_dem_m
+
+            del upper_rows_data
+
+            # plane segments along the columns
+            y_plane_q = plane_x_coeff * cell_center_x_array + plane_const
+
+            ycoords_y = (y_plane_q - y_dem_q) / (y_dem_m - plane_y_coeff)
+
+            coincident_y = (y_dem_m == plane_y_coeff) & (y_dem_q == y_plane_q)
+            ycoords_y[coincident_y] = xcoords_y[coincident_y]
+
+            ycoords_y[~((xcoords_y <= ycoords_y) & (ycoords_y < xcoords_y + self.cellsize_y))] = np.nan
+
+            del y_dem_m, y_dem_q, coincident_y
+
+        # intersections at the cell centers are found along both axes: keep the x-axis ones
+
+        at_cell_centers = (np.abs(xcoords_x - ycoords_x) < MIN_SEPARATION_THRESHOLD) & \
+                          (np.abs(ycoords_y - xcoords_y) < MIN_SEPARATION_THRESHOLD)
+        ycoords_y[at_cell_centers] = np.nan
+
+        return xcoords_x, xcoords_y, ycoords_x, ycoords_y
+
+    def plane_coefficients(self, srcPt, srcPlaneAttitude):
+        """
+        Coefficients of the plane, expressed as z = x_coeff * x + y_coeff * y + const.
+
+        @param srcPt: point, expressed in geographical coordinates, that the plane must contain.
+        @type srcPt: Point.
+        @param srcPlaneAttitude: orientation of the plane.
+        @type srcPlaneAttitude: class GPlane.
+
+        @return: tuple of three floats, or None for vertical planes.
+        """
+
+        cartes_plane = srcPlaneAttitude.plane(srcPt)
+
+        if abs(cartes_plane.c) < MIN_SCALAR_VALUE:
+            return None
+
+        return -cartes_plane.a / cartes_plane.c, -cartes_plane.b / cartes_plane.c, -cartes_plane.d / cartes_plane.c
+
+    def intersection_with_surface_chunks(self, surf_type, srcPt, srcPlaneAttitude, chunk_num_cells=grid_chunk_num_cells):
+        """
+        Calculates the intersections (as points) between DEM (the self object) and an analytical surface,
+        processing the DEM in chunks of rows, so that only the intersections are kept in memory.
+        Currently it works only with (non-vertical) planes.
 
         @param surf_type: type of considered surface (i.e., plane, the only case implemented at present).
         @type surf_type: String.
@@ -442,72 +590,73 @@ class Grid(object):
         @type srcPt: Point.
         @param srcPlaneAttitude: orientation of the surface (currently only planes).
         @type srcPlaneAttitude: class GPlane.
+        @param chunk_num_cells: maximum number of cells in a chunk.
+        @type chunk_num_cells: int.
 
-        @return: tuple of four arrays
+        @return: generator of tuples of four 1D arrays, one for each chunk: x and y coordinates
+        of the intersections along the x axis, x and y coordinates of the intersections along the y axis.
         """
 
-        if surf_type == 'plane':
+        if surf_type != 'plane':
+            return
 
-            # closures to compute the geographic coordinates (in x- and y-) of a cell center
-            # the grid coordinates of the cell center are expressed by i and j
-            grid_coord_to_geogr_coord_x_closure = lambda j: self.domain.llcorner.p_x + self.cellsize_x * (0.5 + j)
-            grid_coord_to_geogr_coord_y_closure = lambda i: self.domain.trcorner.p_y - self.cellsize_y * (0.5 + i)
+        plane_coeffs = self.plane_coefficients(srcPt, srcPlaneAttitude)
+        if plane_coeffs is None:
+            return
 
-            # arrays storing the geographical coordinates of the cell centers along the x- and y- axes
-            cell_center_x_array = self.x()
-            cell_center_y_array = self.y()
+        chunk_num_rows = self.chunk_num_rows(chunk_num_cells)
 
-            ycoords_x, xcoords_y = np.broadcast_arrays(cell_center_x_array, cell_center_y_array)
+        for row_start in range(0, self.row_num, chunk_num_rows):
 
-            #### x-axis direction intersections
+            xcoords_x, xcoords_y, ycoords_x, ycoords_y = self.plane_intersections_in_rows(
+                row_start,
+                min(row_start + chunk_num_rows, self.row_num),
+                plane_coeffs)
 
-            # 2D array of DEM segment parameters
-            x_dem_m = self.grad_forward_x()
-            x_dem_q = self.data - cell_center_x_array * x_dem_m
+            x_inters = np.isfinite(xcoords_x)
+            y_inters = np.isfinite(ycoords_y)
 
-            # closure for the planar surface that, given (x,y), will be used to derive z
-            plane_z_closure = srcPlaneAttitude.plane_from_geo(srcPt)
+            yield xcoords_x[x_inters], xcoords_y[x_inters], ycoords_x[y_inters], ycoords_y[y_inters]
 
-            # 2D array of plane segment parameters
-            x_plane_m = srcPlaneAttitude.plane_x_coeff()
-            x_plane_q = np.array_from_function(self.row_num(), 1, lambda j: 0, grid_coord_to_geogr_coord_y_closure,
-                                               plane_z_closure)
+    def intersection_with_surface(self, surf_type, srcPt, srcPlaneAttitude, chunk_num_cells=grid_chunk_num_cells):
+        """
+        Calculates the intersections (as points) between DEM (the self object) and an analytical surface.
+        Currently it works only with (non-vertical) planes.
+        The DEM is processed in chunks of rows, so that temporary arrays are bounded.
 
-            # 2D array that defines denominator for intersections between local segments
-            x_inters_denomin = np.where(x_dem_m != x_plane_m, x_dem_m - x_plane_m, np.NaN)
+        @param surf_type: type of considered surface (i.e., plane, the only case implemented at present).
+        @type surf_type: String.
+        @param srcPt: point, expressed in geographical coordinates, that the plane must contain.
+        @type srcPt: Point.
+        @param srcPlaneAttitude: orientation of the surface (currently only planes).
+        @type srcPlaneAttitude: class GPlane.
+        @param chunk_num_cells: maximum number of cells in a chunk.
+        @type chunk_num_cells: int.
 
-            coincident_x = np.where(x_dem_q != x_plane_q, np.NaN, ycoords_x)
+        @return: tuple of four arrays
+        """
 
-            xcoords_x = np.where(x_dem_m != x_plane_m, (x_plane_q - x_dem_q) / x_inters_denomin, coincident_x)
-            xcoords_x = np.where(xcoords_x < ycoords_x, np.NaN, xcoords_x)
-            xcoords_x = np.where(xcoords_x >= ycoords_x + self.cellsize_x, np.NaN, xcoords_x)
+        if surf_type == 'plane':
 
-            #### y-axis direction intersections
+            # arrays storing the geographical coordinates of the cell centers along the x- and y- axes
+            ycoords_x, xcoords_y = np.broadcast_arrays(self.x(), self.y())
 
-            # 2D array of DEM segment parameters
-            y_dem_m = self.grad_forward_y()
-            y_dem_q = self.data - cell_center_y_array * y_dem_m
+            xcoords_x = np.full(self.data.shape, np.nan)
+            ycoords_y = np.full(self.data.shape, np.nan)
 
-            # 2D array of plane segment parameters
-            y_plane_m = srcPlaneAttitude.plane_y_coeff()
-            y_plane_q = np.array_from_function(1, self.col_num, grid_coord_to_geogr_coord_x_closure, lambda i: 0,
-                                               plane_z_closure)
+            plane_coeffs = self.plane_coefficients(srcPt, srcPlaneAttitude)
+            if plane_coeffs is None:
+                return xcoords_x, xcoords_y, ycoords_x, ycoords_y
 
-            # 2D array that defines denominator for intersections between local segments
-            y_inters_denomin = np.where(y_dem_m != y_plane_m, y_dem_m - y_plane_m, np.NaN)
-            coincident_y = np.where(y_dem_q != y_plane_q, np.NaN, xcoords_y)
+            chunk_num_rows = self.chunk_num_rows(chunk_num_cells)
 
-            ycoords_y = np.where(y_dem_m != y_plane_m, (y_plane_q - y_dem_q) / y_inters_denomin, coincident_y)
+            for row_start in range(0, self.row_num, chunk_num_rows):
 
-            # filter out cases where intersection is outside cell range
-            ycoords_y = np.where(ycoords_y < xcoords_y, np.NaN, ycoords_y)
-            ycoords_y = np.where(ycoords_y >= xcoords_y + self.cellsize_y, np.NaN, ycoords_y)
+                row_end = min(row_start + chunk_num_rows, self.row_num)
 
-            for i in range(xcoords_x.shape[0]):
-                for j in range(xcoords_x.shape[1]):
-                    if abs(xcoords_x[i, j] - ycoords_x[i, j]) < MIN_SEPARATION_THRESHOLD and abs(
-                                    ycoords_y[i, j] - xcoords_y[i, j]) < MIN_SEPARATION_THRESHOLD:
-                        ycoords_y[i, j] = np.NaN
+                xcoords_x[row_start:row_end], _, _, ycoords_y[row_start:row_end] = self.plane_intersections_in_rows(
+                    row_start,
+                    row_end,
+                    plane_coeffs)
 
             return xcoords_x, xcoords_y, ycoords_x, ycoords_y
-
@@ -0,0 +1,242 @@
+from builtins import object
+
+import numpy as np
+
+
+class SegmentGridIndex(object):
+    """
+    Spatial index of 2D segments, based on a uniform grid.
+    Each grid cell lists the segments whose bounding box overlaps it,
+    stored as sorted arrays (no cell is allocated when empty).
+    Segments overlapping too many cells are kept apart
+    and only checked by bounding box.
+    """
+
+    def __init__(self, start_xs, start_ys, end_xs, end_ys, cell_size=None, max_segment_cells=1024):
+        """
+        :param start_xs: array-like of float
+        :param start_ys: array-like of float
+        :param end_xs: array-like of float
+        :param end_ys: array-like of float
+        :param cell_size: float, or None to derive it from the segment extents
+        :param max_segment_cells: maximum number of grid cells indexed for a single segment
+        """
+
+        start_xs, start_ys = np.asarray(start_xs, dtype=np.float64), np.asarray(start_ys, dtype=np.float64)
+        end_xs, end_ys = np.asarray(end_xs, dtype=np.float64), np.asarray(end_ys, dtype=np.float64)
+
+        self._x_mins, self._x_maxs = np.minimum(start_xs, end_xs), np.maximum(start_xs, end_xs)
+        self._y_mins, self._y_maxs = np.minimum(start_ys, end_ys), np.maximum(start_ys, end_ys)
+
+        num_segments = self._x_mins.size
+
+        if num_segments == 0:
+            self._cell_size = 1.0
+            self._x_origin = self._y_origin = 0.0
+            self._num_cols = 1
+            self._cell_keys = np.zeros(0, dtype=np.int64)
+            self._cell_starts = np.zeros(1, dtype=np.int64)
+            self._cell_segments = np.zeros(0, dtype=np.int64)
+            self._oversized_segments = np.zeros(0, dtype=np.int64)
+            return
+
+        self._x_origin, self._y_origin = self._x_mins.min(), self._y_mins.min()
+
+        if cell_size is None:
+            cell_size = self.default_cell_size()
+        self._cell_size = cell_size
+
+        col_mins, col_maxs = self._cols(self._x_mins), self._cols(self._x_maxs)
+        row_mins, row_maxs = self._rows(self._y_mins), self._rows(self._y_maxs)
+
+        self._num_cols = int(col_maxs.max()) + 1
+
+        widths = col_maxs - col_mins + 1
+        num_cells = widths * (row_maxs - row_mins + 1)
+
+        oversized = num_cells > max_segment_cells
+        self._oversized_segments = np.flatnonzero(oversized)
+        num_cells[oversized] = 0
+
+        # one (cell, segment) entry for each cell overlapped by a segment bounding box
+
+        entry_segments = np.repeat(np.arange(num_segments), num_cells)
+        entry_ndxs = np.arange(entry_segments.size) - np.repeat(np.cumsum(num_cells) - num_cells, num_cells)
+        entry_cols = col_mins[entry_segments] + entry_ndxs % widths[entry_segments]
+        entry_rows = row_mins[entry_segments] + entry_ndxs // widths[entry_segments]
+        entry_keys = entry_rows * self._num_cols + entry_cols
+
+        entry_order = np.argsort(entry_keys, kind='stable')
+        sorted_keys = entry_keys[entry_order]
+
+        self._cell_keys, self._cell_starts = np.unique(sorted_keys, return_index=True)
+        self._cell_starts = np.append(self._cell_starts, sorted_keys.size)
+        self._cell_segments = entry_segments[entry_order]
+
+    def default_cell_size(self):
+        """
+        Cell size comparable both with the mean segment extent
+        and with the mean spacing of the segments in the indexed area.
+
+        :return: float
+        """
+
+        num_segments = self._x_mins.size
+
+        mean_extent = np.mean(np.maximum(self._x_maxs - self._x_mins, self._y_maxs - self._y_mins))
+
+        area = (self._x_maxs.max() - self._x_origin) * (self._y_maxs.max() - self._y_origin)
+        mean_spacing = np.sqrt(area / num_segments)
+
+        cell_size = max(mean_extent, mean_spacing)
+
+        return cell_size if cell_size > 0.0 else 1.0
+
+    @property
+    def num_segments(self):
+
+        return self._x_mins.size
+
+    def _cols(self, xs):
+
+        return np.floor((xs - self._x_origin) / self._cell_size).astype(np.int64)
+
+    def _rows(self, ys):
+
+        return np.floor((ys - self._y_origin) / self._cell_size).astype(np.int64)
+
+    def _cell_ndxs(self, query_keys):
+        """
+        Indices of the occupied cells among the cells with the given keys.
+
+        :param query_keys: numpy.array of int
+        :return: numpy.array of int
+        """
+
+        return np.intersect1d(self._cell_keys, query_keys, return_indices=True)[1]
+
+    def _cell_segments_union(self, cell_ndxs):
+        """
+        Indices of the segments listed in the given occupied cells,
+        together with the oversized segments.
+
+        :param cell_ndxs: numpy.array of int
+        :return: numpy.array of int, sorted
+        """
+
+        entry_starts = self._cell_starts[cell_ndxs]
+        num_entries = self._cell_starts[cell_ndxs + 1] - entry_starts
+        entry_ndxs = np.repeat(entry_starts - (np.cumsum(num_entries) - num_entries), num_entries) + \
+            np.arange(np.sum(num_entries))
+
+        return np.unique(np.concatenate((self._cell_segments[entry_ndxs], self._oversized_segments)))
+
+    def _bbox_filter(self, candidates, x_min, y_min, x_max, y_max):
+
+        return candidates[
+            (self._x_mins[candidates] <= x_max) & (x_min <= self._x_maxs[candidates]) &
+            (self._y_mins[candidates] <= y_max) & (y_min <= self._y_maxs[candidates])]
+
+    def query_bbox(self, x_min, y_min, x_max, y_max):
+        """
+        Indices of the segments whose bounding box overlaps the given rectangle.
+
+        :param x_min: float
+        :param y_min: float
+        :param x_max: float
+        :param y_max: float
+        :return: numpy.array of int, sorted
+        """
+
+        if self.num_segments == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        col_min, col_max = max(int(self._cols(x_min)), 0), min(int(self._cols(x_max)), self._num_cols - 1)
+        row_min, row_max = max(int(self._rows(y_min)), 0), int(self._rows(y_max))
+
+        # occupied cells within the rectangle: the rectangle cells are searched among the occupied ones,
+        # unless they are more numerous
+
+        num_query_cells = max(col_max - col_min + 1, 0) * max(row_max - row_min + 1, 0)
+
+        if num_query_cells <= self._cell_keys.size:
+            query_cols, query_rows = np.meshgrid(np.arange(col_min, col_max + 1), np.arange(row_min, row_max + 1))
+            cell_ndxs = self._cell_ndxs((query_rows * self._num_cols + query_cols).ravel())
+        else:
+            cell_cols, cell_rows = self._cell_keys % self._num_cols, self._cell_keys // self._num_cols
+            cell_ndxs = np.flatnonzero(
+                (col_min <= cell_cols) & (cell_cols <= col_max) &
+                (row_min <= cell_rows) & (cell_rows <= row_max))
+
+        return self._bbox_filter(self._cell_segments_union(cell_ndxs), x_min, y_min, x_max, y_max)
+
+    def query_segment(self, start_x, start_y, end_x, end_y):
+        """
+        Indices of the segments that could intersect the given segment.
+        Only the cells along the segment are visited, so that
+        long diagonal segments do not collect the segments of their whole bounding box:
+        the segment is split into pieces shorter than the cell size,
+        each one overlapping at most 2 x 2 cells.
+
+        :param start_x: float
+        :param start_y: float
+        :param end_x: float
+        :param end_y: float
+        :return: numpy.array of int, sorted
+        """
+
+        if self.num_segments == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        length = np.hypot(end_x - start_x, end_y - start_y)
+        num_pieces = int(np.floor(length / self._cell_size)) + 1
+
+        fractions = np.linspace(0.0, 1.0, num_pieces + 1)
+        xs = start_x + (end_x - start_x) * fractions
+        ys = start_y + (end_y - start_y) * fractions
+
+        col_mins, col_maxs = self._cols(np.minimum(xs[:-1], xs[1:])), self._cols(np.maximum(xs[:-1], xs[1:]))
+        row_mins, row_maxs = self._rows(np.minimum(ys[:-1], ys[1:])), self._rows(np.maximum(ys[:-1], ys[1:]))
+
+        query_keys = []
+        for delta_col in (0, 1):
+            for delta_row in (0, 1):
+                query_cols = np.minimum(col_mins + delta_col, col_maxs)
+                query_rows = np.minimum(row_mins + delta_row, row_maxs)
+                is_inside = (0 <= query_cols) & (query_cols < self._num_cols) & (0 <= query_rows)
+                query_keys.append(query_rows[is_inside] * self._num_cols + query_cols[is_inside])
+
+        candidates = self._cell_segments_union(self._cell_ndxs(np.unique(np.concatenate(query_keys))))
+
+        return self._bbox_filter(
+            candidates,
+            min(start_x, end_x),
+            min(start_y, end_y),
+            max(start_x, end_x),
+            max(start_y, end_y))
+
+    def query_segments(self, start_xs, start_ys, end_xs, end_ys):
+        """
+        Candidate pairs between the query segments and the indexed ones,
+        i.e. the pairs that could intersect.
+
+        :param start_xs: array-like of float
+        :param start_ys: array-like of float
+        :param end_xs: array-like of float
+        :param end_ys: array-like of float
+        :return: tuple of two numpy.array of int: query segment indices and indexed segment indices
+        """
+
+        query_ndxs, segment_ndxs = [], []
+
+        for ndx, (start_x, start_y, end_x, end_y) in enumerate(zip(start_xs, start_ys, end_xs, end_ys)):
+
+            candidates = self.query_segment(start_x, start_y, end_x, end_y)
+
+            query_ndxs.append(np.full(candidates.size, ndx, dtype=np.int64))
+            segment_ndxs.append(candidates)
+
+        if not query_ndxs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        return np.concatenate(query_ndxs), np.concatenate(segment_ndxs)
@@ -2,6 +2,8 @@
 from builtins import map
 import calendar
 
+import numpy as np
+
 
 def standard_gpstime_to_seconds(time_str):
     """
@@ -16,23 +18,82 @@ def standard_gpstime_to_seconds(time_str):
       3600
     """
 
-    date, hhmmss = time_str.split("T")
+    date, hhmmss = time_str.strip().split("T")
     if hhmmss.endswith("Z"):
         hhmmss = hhmmss[:-1]
 
+    # time zone offset, as +hh:mm, +hhmm or +hh (or negative)
+
+    offset_seconds = 0
+    for sign_char, sign in (("+", 1), ("-", -1)):
+        if sign_char in hhmmss:
+            hhmmss, zone = hhmmss.rsplit(sign_char, 1)
+            zone = zone.replace(":", "").ljust(4, "0")
+            offset_seconds = sign * (int(zone[:2]) * 3600 + int(zone[2:]) * 60)
+
     year, month, day = list(map(int, date.split("-")))
-    hour, minutes, seconds = hhmmss.split(":")
-    hour, minutes, seconds = int(hour), int(minutes), float(seconds)
+    hhmmss_values = hhmmss.split(":")
+    hour, minutes = int(hhmmss_values[0]), int(hhmmss_values[1])
+    seconds = float(hhmmss_values[2]) if len(hhmmss_values) > 2 else 0.0
 
     # modified from:
     # https://stackoverflow.com/questions/7852855/how-to-convert-a-python-datetime-object-to-seconds
 
     t = year, month, day, hour, minutes, seconds
-    secs = calendar.timegm(t)
+    secs = calendar.timegm(t) - offset_seconds
 
     return secs
 
 
+def gpx_times_to_seconds(time_strs):
+    """
+    Convert many ISO 8601 date-time strings, as found in GPX files,
+    into float values representing seconds since January 1, 1970 (UTC), all at once.
+    Fractional seconds and time zone designators (Z, +hh:mm, +hhmm, +hh or negative) are handled.
+    When a string cannot be decoded in bulk, all the strings are converted
+    one at a time with standard_gpstime_to_seconds.
+
+    Example:
+      >>> gpx_times_to_seconds(["1970-01-01T00:00:00Z", "1970-01-01T02:00:01.5+02:00"]).tolist()
+      [0.0, 1.5]
+    """
+
+    time_strs = np.char.strip(np.asarray(time_strs, dtype=np.str_))
+
+    if time_strs.size == 0:
+        return np.zeros(0)
+
+    try:
+
+        dates, _, hhmmss = np.char.partition(time_strs, "T").T
+        hhmmss = np.char.rstrip(hhmmss, "Zz")
+
+        # time zone offsets, searched in the time part since dates contain minus signs
+
+        offset_seconds = np.zeros(time_strs.shape)
+        for sign_char, sign in (("+", 1.0), ("-", -1.0)):
+            hhmmss_wo_zone, separator, zone = np.char.rpartition(hhmmss, sign_char).T
+            with_zone = separator == sign_char
+            if np.any(with_zone):
+                zone_values = np.char.ljust(np.char.replace(zone[with_zone], ":", ""), 4, "0").astype(np.int64)
+                offset_seconds[with_zone] = sign * ((zone_values // 100) * 3600 + (zone_values % 100) * 60)
+                hhmmss = np.where(with_zone, hhmmss_wo_zone, hhmmss)
+
+        local_times = np.char.add(np.char.add(dates, "T"), hhmmss).astype("datetime64[ns]")
+
+    except ValueError:
+
+        return np.array([standard_gpstime_to_seconds(time_str) for time_str in time_strs], dtype=np.float64)
+
+    epoch = np.datetime64("1970-01-01T00:00:00", "ns")
+
+    # whole and fractional seconds are converted separately, to keep the fractions exact
+
+    ns = (local_times - epoch).astype(np.int64)
+
+    return ns // 10**9 - offset_seconds + (ns % 10**9) / 1e9
+
+
 if __name__ == "__main__":
 
     import doctest
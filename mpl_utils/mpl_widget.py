@@ -11,13 +11,14 @@ from matplotlib import rcParams
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
 
 from qgis.PyQt.QtCore import *
 from qgis.PyQt.QtGui import *
 from qgis.PyQt.QtWidgets import *
 
 
-from .utils import valid_intervals
+from .utils import minmax_decimation_ndxs
 
 
 class MplCanvas(FigureCanvas):
@@ -99,6 +100,11 @@ def plot_along_main_line(
     linewidth=1,
     label_z = 0.5
 ):
+    """
+    Plot a line, optionally with its name.
+
+    :return: list of the created artists
+    """
 
     line, = axes.plot(
         x_list,
@@ -123,12 +129,116 @@ def plot_along_main_line(
         s_end = x_list[1] if len(x_list) > 1 else None
         s_mid = s_start if s_end is None else (s_start + s_end) / 2
 
-        axes.annotate(
+        name_label = axes.annotate(
             f"{name}",
             (s_mid, label_z),
             color=linecolor
         )
 
+        return [line, name_label]
+
+    return [line]
+
+
+class DecimatedLine(object):
+    """
+    A line plotted with a level of detail fitting the axes width in pixels:
+    the plotted points are chosen again when the x limits change (zoom, pan)
+    or the canvas is resized, so that the full detail is back when zooming in.
+    The line can be filled down to a minimum y value.
+    """
+
+    def __init__(
+        self,
+        axes,
+        x_list,
+        y_list,
+        linecolor,
+        linewidth=1,
+        fill_y_min=None,
+        fill_alpha=0.1
+    ):
+
+        self.axes = axes
+
+        self.xs = np.asarray(x_list, dtype=np.float64)
+        self.ys = np.asarray(y_list, dtype=np.float64)
+
+        self.linecolor = linecolor
+        self.fill_y_min = fill_y_min
+        self.fill_alpha = fill_alpha
+        self.fill = None
+
+        self.line, = axes.plot(
+            [],
+            [],
+            '-',
+            color=linecolor,
+            linewidth=linewidth
+        )
+
+        self.update()
+
+        axes.callbacks.connect('xlim_changed', lambda changed_axes: self.update())
+        axes.figure.canvas.mpl_connect('resize_event', lambda event: self.update())
+
+    def plotted_ndxs(self):
+
+        x_min, x_max = sorted(self.axes.get_xlim())
+        num_buckets = max(int(self.axes.get_window_extent().width), 1)
+
+        return minmax_decimation_ndxs(self.xs, self.ys, x_min, x_max, num_buckets)
+
+    def update(self, full_detail=False):
+        """
+        Plot the points fitting the current axes width,
+        or all of them (e.g., for export at a resolution other than the screen one).
+
+        :param full_detail: bool, whether to plot all the points
+        """
+
+        if full_detail:
+            ndxs = np.arange(self.xs.size)
+        else:
+            ndxs = self.plotted_ndxs()
+        xs, ys = self.xs[ndxs], self.ys[ndxs]
+
+        self.line.set_data(xs, ys)
+
+        if self.fill_y_min is None:
+            return
+
+        if self.fill is not None:
+            self.fill.remove()
+
+        self.fill = plot_filled_line(
+            self.axes,
+            xs,
+            ys,
+            self.fill_y_min,
+            self.linecolor,
+            alpha=self.fill_alpha
+        )
+
+
+def plot_decimated_line(
+    axes,
+    x_list,
+    y_list,
+    linecolor,
+    linewidth=1,
+    fill_y_min=None
+):
+
+    return DecimatedLine(
+        axes,
+        x_list,
+        y_list,
+        linecolor,
+        linewidth=linewidth,
+        fill_y_min=fill_y_min
+    )
+
 
 def plot_line(
     axes,
@@ -166,14 +276,75 @@ def plot_filled_line(
     facecolor,
     alpha=0.1
 ):
+    """
+    Fill the area below a line, skipping its nan values,
+    as a single collection of polygons.
 
-    y_values_array = np.array(y_list)
-    x_values_array = np.array(x_list)
-    for val_int in valid_intervals(y_values_array):
-        axes.fill_between(
-            x_values_array[val_int['start']: val_int['end'] + 1],
-            plot_y_min,
-            y_values_array[val_int['start']: val_int['end'] + 1],
-            facecolor=facecolor,
-            alpha=alpha
-        )
+    :return: matplotlib.collections.PolyCollection
+    """
+
+    y_values_array = np.asarray(y_list, dtype=np.float64)
+    x_values_array = np.asarray(x_list, dtype=np.float64)
+
+    return axes.fill_between(
+        x_values_array,
+        plot_y_min,
+        y_values_array,
+        where=np.isfinite(y_values_array),
+        facecolor=facecolor,
+        alpha=alpha
+    )
+
+
+def plot_segments(
+    axes,
+    segments,
+    linecolor,
+    linewidth=1,
+    alpha=None
+):
+    """
+    Plot many lines with the same style as a single collection.
+
+    :param segments: list of numpy.array of float with shape (n, 2), or numpy.array with shape (m, n, 2)
+    :return: matplotlib.collections.LineCollection
+    """
+
+    line_collection = LineCollection(
+        segments,
+        colors=linecolor,
+        linewidths=linewidth,
+        alpha=alpha
+    )
+
+    axes.add_collection(line_collection, autolim=False)
+
+    return line_collection
+
+
+def thinned_label_ndxs(
+    axes,
+    x_list,
+    y_list,
+    label_width=60,
+    label_height=15
+):
+    """
+    Indices of the labels to plot so that they do not pile up:
+    the axes are divided into cells of the label size (in pixels),
+    and only the first label of each cell is kept.
+
+    :return: numpy.array of int, sorted
+    """
+
+    if len(x_list) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    pixel_coords = axes.transData.transform(np.column_stack((x_list, y_list)))
+
+    cell_cols = np.floor(pixel_coords[:, 0] / label_width)
+    cell_rows = np.floor(pixel_coords[:, 1] / label_height)
+
+    _, first_ndxs = np.unique(np.column_stack((cell_cols, cell_rows)), axis=0, return_index=True)
+
+    return np.sort(first_ndxs)
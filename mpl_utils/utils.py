@@ -1,30 +1,66 @@
+import numpy as np
 
 
-from builtins import range
-from numpy import isnan
+def minmax_decimation_ndxs(xs, ys, x_min, x_max, num_buckets):
+    """
+    Indices of the points to plot for a line, so that its shape is preserved
+    at the given horizontal resolution.
+    The x range is split into num_buckets buckets (e.g., one for each pixel),
+    and in each bucket only the first, last, minimum and maximum points are kept,
+    together with the points bounding the nan gaps.
+    Only the points within the x range are considered, plus one on each side
+    so that the line reaches the range borders.
+    The x values must be sorted in increasing order.
 
+    :param xs: numpy.array of float, sorted
+    :param ys: numpy.array of float
+    :param x_min: float
+    :param x_max: float
+    :param num_buckets: int
+    :return: numpy.array of int, sorted
+    """
 
-def valid_intervals(values_array_1D):
-    assert values_array_1D.ndim == 1
-    assert values_array_1D.shape[0] > 0
+    num_pts = xs.size
 
-    valid_list = []
-    interval = []
-    for i in range(values_array_1D.shape[0]):
-        if isnan(values_array_1D[i]):
-            if len(interval) > 0:
-                valid_list.append(interval)
-                interval = []
-        else:
-            interval.append(i)
-    else:
-        if len(interval) > 0:
-            valid_list.append(interval)
+    start = max(int(np.searchsorted(xs, x_min, side='left')) - 1, 0)
+    end = min(int(np.searchsorted(xs, x_max, side='right')) + 1, num_pts)
 
-    intdict_list = []
-    for interval in valid_list:
-        if len(interval) > 1:
-            int_dict = dict(start=interval[0], end=interval[-1])
-            intdict_list.append(int_dict)
+    if end - start <= 4 * num_buckets or x_max <= x_min:
+        return np.arange(start, end)
 
-    return intdict_list
+    view_xs, view_ys = xs[start:end], ys[start:end]
+    num_view_pts = view_xs.size
+
+    buckets = np.clip(
+        ((view_xs - x_min) / (x_max - x_min) * num_buckets).astype(np.int64),
+        0,
+        num_buckets - 1)
+
+    # buckets are contiguous runs of points, since the x values are sorted
+
+    bucket_starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+    bucket_sizes = np.diff(np.append(bucket_starts, num_view_pts))
+    bucket_ndxs = np.repeat(np.arange(bucket_starts.size), bucket_sizes)
+
+    is_nan = np.isnan(view_ys)
+    bucket_mins = np.minimum.reduceat(np.where(is_nan, np.inf, view_ys), bucket_starts)
+    bucket_maxs = np.maximum.reduceat(np.where(is_nan, -np.inf, view_ys), bucket_starts)
+
+    keep = np.zeros(num_view_pts, dtype=np.bool_)
+    keep[bucket_starts] = True
+    keep[bucket_starts + bucket_sizes - 1] = True
+
+    # first minimum and first maximum of each bucket
+
+    for extreme_ndxs in (np.flatnonzero(view_ys == bucket_mins[bucket_ndxs]),
+                         np.flatnonzero(view_ys == bucket_maxs[bucket_ndxs])):
+        _, first_ndxs = np.unique(bucket_ndxs[extreme_ndxs], return_index=True)
+        keep[extreme_ndxs[first_ndxs]] = True
+
+    # nan gaps
+
+    gap_bounds = np.flatnonzero(np.diff(is_nan))
+    keep[gap_bounds] = True
+    keep[gap_bounds + 1] = True
+
+    return start + np.flatnonzero(keep)
@@ -1,8 +1,6 @@
 
 from typing import Tuple
 
-import unicodedata
-
 import pickle
 
 
@@ -10,6 +8,7 @@ from .gsf.array_utils import *
 from .gsf.sorting import *
 
 from .gis_utils.intersections import *
+from .gis_utils.dem_cache import *
 from .gis_utils.profile import *
 from .gis_utils.qgs_tools import *
 from .gis_utils.statistics import *
@@ -161,9 +160,11 @@ def extract_2d_lines_laying_on_dem(
         project_crs,
         demLayer,
         demParams,
-) -> List[MultiLine]:
+) -> List[ArrayMultiLine]:
+
+    # all the layer lines, as flat coordinate arrays with part offsets
 
-    multilines2d_project_crs = extract_multiline2d_list(
+    lines_2d_proj_crs, feature_part_offsets = extract_ragged_lines(
         structural_line_layer,
         on_the_fly_projection,
         project_crs
@@ -171,67 +172,49 @@ def extract_2d_lines_laying_on_dem(
 
     # densify with provided densify distance
 
-    densified_proj_crs_MultiLine2D_list = [multiline_2d.densify_2d_multiline(densify_proj_crs_distance) for
-                                           multiline_2d in
-                                           multilines2d_project_crs]
+    densified_lines_proj_crs = lines_2d_proj_crs.densify_2d_multiline(densify_proj_crs_distance)
 
     # project to DEM CRS
 
     if on_the_fly_projection and demParams.crs != project_crs:
-
-        densified_dem_crs_MultiLine2D_list = [multiline_2d.crs_project(project_crs, demParams.crs) for
-                                              multiline_2d in densified_proj_crs_MultiLine2D_list]
-
+        dem_crs_xs, dem_crs_ys = project_xy_arrays(
+            densified_lines_proj_crs.xs,
+            densified_lines_proj_crs.ys,
+            project_crs,
+            demParams.crs)
     else:
+        dem_crs_xs, dem_crs_ys = densified_lines_proj_crs.xs, densified_lines_proj_crs.ys
 
-        densified_dem_crs_MultiLine2D_list = densified_proj_crs_MultiLine2D_list
-
-    # interpolate z values from DEM
-
-    z_list = [interpolate_z(demLayer, demParams, pt_2d) for multiline_2d in densified_dem_crs_MultiLine2D_list
-              for line_2d in multiline_2d.lines for pt_2d in line_2d.pts]
-
-    # extract x-y pairs for creation of 3D points
-    xy_list = [(pt_2d.x, pt_2d.y) for multiline_2d in densified_proj_crs_MultiLine2D_list for line_2d in
-               multiline_2d.lines for pt_2d in line_2d.pts]
-
-    # re-create MultiLine list structure with 3D points having project CRS
-
-    ndx = -1
-
-    multiline_3d_proj_crs_list = []
-
-    for multiline_2d in densified_proj_crs_MultiLine2D_list:
-
-        multiline_3d_list = []
-
-        for line_2d in multiline_2d.lines:
+    # interpolate z values from DEM, for all the points at once
 
-            line_3d_pts_list = []
-
-            for _ in line_2d.pts:
-                ndx += 1
-                line_3d_pts_list.append(Point(xy_list[ndx][0], xy_list[ndx][1], z_list[ndx]))
+    zs = interpolate_z_array(
+        demLayer,
+        demParams,
+        dem_crs_xs,
+        dem_crs_ys)
 
-            multiline_3d_list.append(Line(line_3d_pts_list))
+    lines_3d_proj_crs = ArrayMultiLine(
+        densified_lines_proj_crs.xs,
+        densified_lines_proj_crs.ys,
+        zs,
+        densified_lines_proj_crs.ts,
+        densified_lines_proj_crs.part_offsets)
 
-        multiline_3d_proj_crs_list.append(MultiLine(multiline_3d_list))
+    # one multiline for each feature, as views of the flat arrays
 
-    return multiline_3d_proj_crs_list
+    return [lines_3d_proj_crs.sub_multiline(part_start, part_end) for (part_start, part_end) in
+            zip(feature_part_offsets[:-1], feature_part_offsets[1:])]
 
 
 def distance_projected_pts(x, y, delta_x, delta_y, src_crs, dest_crs):
 
-    qgspt_start_src_crs = qgs_pt(x, y)
-    qgspt_end_src_crs = qgs_pt(x + delta_x, y + delta_y)
+    (start_x, end_x), (start_y, end_y) = project_xy_arrays(
+        [x, x + delta_x],
+        [y, y + delta_y],
+        src_crs,
+        dest_crs)
 
-    qgspt_start_dest_crs = project_qgs_point(qgspt_start_src_crs, src_crs, dest_crs)
-    qgspt_end_dest_crs = project_qgs_point(qgspt_end_src_crs, src_crs, dest_crs)
-
-    pt2_start_dest_crs = Point(qgspt_start_dest_crs.x(), qgspt_start_dest_crs.y())
-    pt2d_end_dest_crs = Point(qgspt_end_dest_crs.x(), qgspt_end_dest_crs.y())
-
-    return pt2_start_dest_crs.dist_2d(pt2d_end_dest_crs)
+    return Point(start_x, start_y).dist_2d(Point(end_x, end_y))
 
 
 class QProfQWidget(QWidget):
@@ -278,6 +261,8 @@ class QProfQWidget(QWidget):
         self.input_geoprofiles = GeoProfilesSet()  # main instance for the geoprofiles
 
         self.profile_windows = []  # used to maintain alive the plots, i.e. to avoid the C++ objects being destroyed
+        self.profile_view = None  # current profile view, where geological overlays are added
+        self.figure_export_task = None  # running background export of profile figures
 
         self.plane_attitudes_styles = []
 
@@ -318,6 +303,8 @@ class QProfQWidget(QWidget):
         QgsProject.instance().layerRemoved.connect(self.struct_line_refresh_lyr_combobox)
         QgsProject.instance().layerRemoved.connect(self.struct_polygon_refresh_lyr_combobox)
 
+        QgsProject.instance().layerRemoved.connect(dem_tile_cache.remove_layer)
+
         self.dialog_layout.addWidget(self.main_widget)
         self.setLayout(self.dialog_layout)
         self.adjustSize()
@@ -452,6 +439,14 @@ class QProfQWidget(QWidget):
         self.invert_profile_checkbox = QCheckBox("Invert orientation")
         read_topo_data_layout.addWidget(self.invert_profile_checkbox, 1, 0, 1, 1)
 
+        read_topo_data_layout.addWidget(QLabel(self.tr("Worker threads")), 1, 1, 1, 1)
+        self.profile_workers_spinbox = QSpinBox()
+        self.profile_workers_spinbox.setMinimum(1)
+        self.profile_workers_spinbox.setMaximum(64)
+        self.profile_workers_spinbox.setValue(profile_max_workers)
+        self.profile_workers_spinbox.setToolTip(self.tr("Threads creating multiple profiles and DEM samplings in parallel"))
+        read_topo_data_layout.addWidget(self.profile_workers_spinbox, 1, 2, 1, 1)
+
         self.read_source_data_pushbutton = QPushButton("Read source data")
         self.read_source_data_pushbutton.clicked.connect(self.create_topo_profiles)
         read_topo_data_layout.addWidget(self.read_source_data_pushbutton, 2, 0, 1, 3)
@@ -596,6 +591,18 @@ class QProfQWidget(QWidget):
         self.proj_point_indivax_plunge_fld_comboBox = QComboBox()
         xs_method_point_proj_Layout.addWidget(self.proj_point_indivax_plunge_fld_comboBox, 2, 3, 1, 1)
 
+        self.proj_point_max_dist_choice = QCheckBox("only points within distance")
+        xs_method_point_proj_Layout.addWidget(self.proj_point_max_dist_choice, 3, 0, 1, 1)
+
+        self.proj_point_max_dist_SpinBox = QDoubleSpinBox()
+        self.proj_point_max_dist_SpinBox.setMinimum(0.0)
+        self.proj_point_max_dist_SpinBox.setMaximum(1.0e7)
+        self.proj_point_max_dist_SpinBox.setDecimals(1)
+        self.proj_point_max_dist_SpinBox.setValue(1000.0)
+        xs_method_point_proj_Layout.addWidget(self.proj_point_max_dist_SpinBox, 3, 1, 1, 1)
+
+        xs_method_point_proj_Layout.addWidget(QLabel("from section"), 3, 2, 1, 1)
+
         xs_method_point_proj_QGroupBox.setLayout(xs_method_point_proj_Layout)
         qlytXsPointProj.addWidget(xs_method_point_proj_QGroupBox)
 
@@ -614,6 +621,9 @@ class QProfQWidget(QWidget):
         self.plot_prj_add_pt_id_label = QCheckBox("id")
         xs_plot_proj_Layout.addWidget(self.plot_prj_add_pt_id_label, 0, 3, 1, 1)
 
+        self.plot_prj_thin_labels = QCheckBox("drop overlapping")
+        xs_plot_proj_Layout.addWidget(self.plot_prj_thin_labels, 0, 5, 1, 2)
+
         xs_plot_proj_Layout.addWidget(QLabel("Markers"), 1, 0, 1, 1)
 
         xs_plot_proj_Layout.addWidget(QLabel("color"), 1, 1, 1, 1)
@@ -1092,6 +1102,7 @@ class QProfQWidget(QWidget):
                 warn(self,
                      self.plugin_name,
                      "Error in font size value")
+                return
 
             try:
                 fig_outpath = str(dialog.figure_outpath_QLineEdit.text())
@@ -1149,6 +1160,9 @@ class QProfQWidget(QWidget):
                      "Error in figure blank height space value")
                 return
 
+            batch_export = dialog.batch_export_QCheckBox.isChecked()
+            profiles_per_file = dialog.profiles_per_file_QSpinBox.value()
+
         else:
 
             warn(self,
@@ -1156,18 +1170,32 @@ class QProfQWidget(QWidget):
                  "No export figure defined")
             return
 
+        export_params = dict(
+            width_inches=fig_width_inches,
+            resolution_dpi=fig_resolution_dpi,
+            font_size_pts=fig_font_size_pts,
+            top_space=top_space_value,
+            left_space=left_space_value,
+            right_space=right_space_value,
+            bottom_space=bottom_space_value,
+            blank_width_space=blank_width_space,
+            blank_height_space=blank_height_space)
+
         figure = profile_window.canvas.fig
 
-        fig_current_width, fig_current_height = figure.get_size_inches()
-        fig_scale_factor = fig_width_inches / fig_current_width
-        figure.set_size_inches(fig_width_inches, fig_scale_factor * fig_current_height)
+        if batch_export:
+            self.export_profile_pages(figure, fig_outpath, profiles_per_file, export_params)
+            return
+
+        apply_figure_export_params(figure, export_params)
+
+        # the topographic lines are saved with all their points, not with the screen detail
 
-        for axis in figure.axes:
-            for label in (axis.get_xticklabels() + axis.get_yticklabels()):
-                label.set_fontsize(fig_font_size_pts)
+        profile_view = self.profile_view if self.profile_view is not None and \
+            self.profile_view.profile_window is profile_window else None
 
-        figure.subplots_adjust(wspace=blank_width_space, hspace=blank_height_space, left=left_space_value,
-                               right=right_space_value, top=top_space_value, bottom=bottom_space_value)
+        if profile_view is not None:
+            profile_view.set_line_detail(full_detail=True)
 
         try:
             figure.savefig(str(fig_outpath), dpi=fig_resolution_dpi,bbox_inches= 'tight')
@@ -1179,6 +1207,107 @@ class QProfQWidget(QWidget):
             info(self,
                  self.plugin_name,
                  "Image saved")
+        finally:
+            if profile_view is not None:
+                profile_view.set_line_detail()
+
+    def export_profile_pages(self, figure, fig_outpath, profiles_per_file, export_params):
+        """
+        Export the current geoprofiles off-screen, in numbered files
+        with a given number of profiles each.
+        The figure height of each file derives from the aspect of the profile window.
+        The export runs as a QGIS background task, that can be followed and canceled
+        in the task manager.
+
+        :param figure: the figure of the profile window
+        :param fig_outpath: output file path, that is numbered for each file
+        :param profiles_per_file: number of profiles in each file
+        :param export_params: dict of figure export parameters
+        """
+
+        if self.figure_export_task is not None:
+            warn(self,
+                 self.plugin_name,
+                 "A figure export is already running")
+            return
+
+        geoprofiles = self.input_geoprofiles
+        if geoprofiles is None or geoprofiles.geoprofiles_num == 0:
+            warn(self,
+                 self.plugin_name,
+                 "Profile not yet calculated")
+            return
+
+        outpath_root, outpath_ext = os.path.splitext(str(fig_outpath))
+        if not outpath_ext:
+            outpath_ext = ".png"
+
+        profile_ndxs = list(range(geoprofiles.geoprofiles_num))
+        pages = [(outpath_root + "_{:03d}".format(page_ndx + 1) + outpath_ext,
+                  profile_ndxs[first_ndx:first_ndx + profiles_per_file])
+                 for page_ndx, first_ndx in enumerate(range(0, len(profile_ndxs), profiles_per_file))]
+
+        fig_current_width, fig_current_height = figure.get_size_inches()
+        profile_height_inches = export_params["width_inches"] * fig_current_height / fig_current_width / len(profile_ndxs)
+        page_export_params = dict(
+            export_params,
+            height_inches=profile_height_inches * min(profiles_per_file, len(profile_ndxs)))
+
+        # the geoprofiles are copied, and the export processes started, before queuing the task
+
+        try:
+            figures_export = ProfileFiguresExport(
+                geoprofiles,
+                self.profile_plot_addit_params(),
+                pages,
+                page_export_params)
+        except Exception as e:
+            warn(self,
+                 self.plugin_name,
+                 "Error with image saving: {}".format(e))
+            return
+
+        self.figure_export_task = ProfileFiguresExportTask(
+            "{}: export of {} profile figures".format(self.plugin_name, len(pages)),
+            figures_export,
+            self.profile_pages_exported)
+
+        QgsApplication.taskManager().addTask(self.figure_export_task)
+
+    def profile_pages_exported(self, export_task):
+        """
+        Report the results of a background export of profile figures.
+
+        :param export_task: the finished ProfileFiguresExportTask
+        """
+
+        self.figure_export_task = None
+
+        if export_task.exception is not None:
+            warn(self,
+                 self.plugin_name,
+                 "Error with image saving: {}".format(export_task.exception))
+            return
+
+        num_saved = sum(1 for (_, success, _) in export_task.results if success)
+
+        if export_task.isCanceled():
+            warn(self,
+                 self.plugin_name,
+                 "Figure export canceled: {} of {} images saved".format(num_saved, len(export_task.pages)))
+            return
+
+        errors = ["{}: {}".format(outfile_path, message) for (outfile_path, success, message) in export_task.results
+                  if not success]
+
+        if errors:
+            warn(self,
+                 self.plugin_name,
+                 "Error with image saving\n" + "\n".join(errors))
+        else:
+            info(self,
+                 self.plugin_name,
+                 "{} images saved".format(num_saved))
 
     def do_export_topo_profiles(self):
 
@@ -1210,43 +1339,7 @@ class QProfQWidget(QWidget):
                 geoprofile
             ):
 
-                # definition of output results
-
-                xs = geoprofile.topo_profiles.planar_xs
-                ys = geoprofile.topo_profiles.planar_ys
-                elev_list = geoprofile.topo_profiles.profile_zs
-                cumdist2Ds = geoprofile.topo_profiles.profile_s
-                cumdist3Ds = geoprofile.topo_profiles.profile_s3ds
-                slopes = geoprofile.topo_profiles.profile_dirslopes
-
-                elevs_zipped = list(zip(*elev_list))
-                cumdist3Ds_zipped = list(zip(*cumdist3Ds))
-                slopes_zipped = list(zip(*slopes))
-
-                parsed_data = []
-                rec_id = 0
-                for x, y, cum_2d_dist, zs, cum3d_dists, slopes \
-                        in zip(
-                    xs,
-                    ys,
-                    cumdist2Ds,
-                    elevs_zipped,
-                    cumdist3Ds_zipped,
-                    slopes_zipped):
-
-                    rec_id += 1
-                    record = [rec_id, x, y, cum_2d_dist]
-                    for z, cum3d_dist, slope in zip(zs, cum3d_dists, slopes):
-                        if isnan(z):
-                            z = ''
-                        if isnan(cum3d_dist):
-                            cum3d_dist = ''
-                        if isnan(slope):
-                            slope = ''
-                        record += [z, cum3d_dist, slope]
-                    parsed_data.append(record)
-
-                return parsed_data
+                return parse_topo_profiles_data(geoprofile.topo_profiles)
 
             def export_topography_all_dems(
                 out_format,
@@ -1265,19 +1358,7 @@ class QProfQWidget(QWidget):
 
                 dem_names = geoprofile.get_current_dem_names()
 
-                dem_headers = []
-                cum3ddist_headers = []
-                slopes_headers = []
-                for ndx in range(len(dem_names)):
-                    dem_headers.append(
-                        unicodedata.normalize('NFKD', str(dem_names[ndx][:10])).encode('ascii', 'ignore').decode("utf-8") )
-                    cum3ddist_headers.append("cds3d_" + str(ndx + 1))
-                    slopes_headers.append("slopd_" + str(ndx + 1))
-
-                multi_dem_header_list = dem_header_common + [name for sublist in
-                                                             zip(dem_headers, cum3ddist_headers, slopes_headers) for
-                                                             name in
-                                                             sublist]
+                multi_dem_header_list = multidems_header_list(dem_names)
 
                 # extraction of results
 
@@ -1779,44 +1860,57 @@ class QProfQWidget(QWidget):
 
         if topo_source_type == self.demline_source:  # sources are DEM(s) and line
 
-            # check total number of points in line(s) to create
-            estimated_total_num_pts = 0
-            for profile_line in source_profile_lines:
-                profile_length = profile_line.length_2d
-                profile_num_pts = profile_length / sample_distance
-                estimated_total_num_pts += profile_num_pts
-
-            estimated_total_num_pts = int(ceil(estimated_total_num_pts))
+            # check the memory required by the profile(s) to create
+            estimated_profiles_memory = estimated_profiles_bytes(
+                source_profile_lines,
+                sample_distance,
+                len(selected_dems))
 
-            if estimated_total_num_pts > pt_num_threshold:
+            if estimated_profiles_memory > profile_memory_budget:
                 warn(
                     parent=self,
                     header=self.plugin_name,
-                    msg="There are {} estimated points (limit is {}) in profile(s) to create.".format(
-                        estimated_total_num_pts, pt_num_threshold) +
+                    msg="The profile(s) to create require about {:.1f} MB (limit is {:.1f} MB).".format(
+                        estimated_profiles_memory / 1048576.0, profile_memory_budget / 1048576.0) +
                         "\nPlease increase sample distance value"
                 )
                 return
 
-            for profile_line in source_profile_lines:
+            num_workers = self.profile_workers_spinbox.value()
 
-                try:
+            try:
+
+                if num_workers > 1 and len(source_profile_lines) * len(selected_dems) > 1:
+
+                    source_topo_profiles = topoprofiles_from_dems_parallel(
+                        self.canvas,
+                        source_profile_lines,
+                        sample_distance,
+                        selected_dems,
+                        selected_dem_parameters,
+                        invert_profile,
+                        num_workers
+                    )
+
+                else:
 
-                    topo_profiles = topoprofiles_from_dems(
+                    source_topo_profiles = [topoprofiles_from_dems(
                         self.canvas,
                         profile_line,
                         sample_distance,
                         selected_dems,
                         selected_dem_parameters,
                         invert_profile
-                    )
+                    ) for profile_line in source_profile_lines]
 
-                except Exception as e:
+            except Exception as e:
 
-                    warn(self,
-                         self.plugin_name,
-                         "Error with data source read: {}".format(e))
-                    return
+                warn(self,
+                     self.plugin_name,
+                     "Error with data source read: {}".format(e))
+                return
+
+            for profile_line, topo_profiles in zip(source_profile_lines, source_topo_profiles):
 
                 if topo_profiles is None:
                     warn(self,
@@ -2344,19 +2438,57 @@ class QProfQWidget(QWidget):
 
         # plot profiles
 
+        self.plot_profiles(new_view=True)
+
+    def profile_plot_addit_params(self):
+
         plot_addit_params = dict()
         #plot_addit_params["label_projected_lines"] = self.project_line_add_labels.isChecked()
         #plot_addit_params["projected_lines_class_colors"] = self.projected_lines_classification_colors
         plot_addit_params["add_trendplunge_label"] = self.plot_prj_add_trendplunge_label.isChecked()
         plot_addit_params["add_ptid_label"] = self.plot_prj_add_pt_id_label.isChecked()
+        plot_addit_params["thin_labels"] = self.plot_prj_thin_labels.isChecked()
         plot_addit_params["polygon_class_colors"] = self.intersected_polygon_classification_colors
         plot_addit_params["plane_attitudes_styles"] = self.plane_attitudes_styles
 
-        profile_window = plot_geoprofiles(
+        return plot_addit_params
+
+    def refresh_profile_view(self):
+        """
+        Show the changes of the geological overlays in the current profile view.
+
+        :return: bool, whether the current profile view is still open
+        """
+
+        if self.profile_view is None or not self.profile_view.is_open(self.input_geoprofiles):
+            return False
+
+        self.profile_view.update_overlays(self.profile_plot_addit_params())
+
+        return True
+
+    def plot_profiles(self, new_view=False):
+        """
+        Plot the profiles with their geological overlays.
+        Unless a new view is required, the overlays are updated
+        in the current profile view, when it is still open.
+
+        :param new_view: whether to create a new profile view
+        """
+
+        if not new_view and self.refresh_profile_view():
+            return
+
+        # closed profile windows are released, apart from the last one
+
+        self.profile_windows = [profile_window for profile_window in self.profile_windows[:-1] if
+                                profile_window.isVisible()] + self.profile_windows[-1:]
+
+        self.profile_view = plot_geoprofiles(
             self.input_geoprofiles,
-            plot_addit_params
+            self.profile_plot_addit_params()
         )
-        self.profile_windows.append(profile_window)
+        self.profile_windows.append(self.profile_view.profile_window)
 
     def clear_rubberband(self):
 
@@ -2433,6 +2565,7 @@ class QProfQWidget(QWidget):
         geoprofile = self.input_geoprofiles.geoprofile(0)
         if geoprofile is not None:
             geoprofile.intersected_lineaments = []
+            self.refresh_profile_view()
 
     def reset_polygon_intersections(self):
 
@@ -2440,6 +2573,7 @@ class QProfQWidget(QWidget):
             geoprofile = self.input_geoprofiles.geoprofile(0)
             if geoprofile is not None:
                 geoprofile.intersected_outcrops = []
+                self.refresh_profile_view()
         except:
             pass
 
@@ -2458,7 +2592,7 @@ class QProfQWidget(QWidget):
 
     def check_intersection_line_inputs(self) -> Tuple[bool, str]:
 
-        correct, err_msg = self.check_for_struc_process()
+        correct, err_msg = self.check_for_struc_process(single_segment_constrain=False)
         if not correct:
             return False, err_msg
 
@@ -2565,19 +2699,7 @@ class QProfQWidget(QWidget):
         geoprofile.add_intersections_lines(formation_list, intersection_line3d_list, intersection_polygon_s_list2)
 
         # plot profiles
-        plot_addit_params = dict()
-        #plot_addit_params["label_projected_lines"] = self.project_line_add_labels.isChecked()
-        #plot_addit_params["projected_lines_class_colors"] = self.projected_lines_classification_colors
-        plot_addit_params["add_trendplunge_label"] = self.plot_prj_add_trendplunge_label.isChecked()
-        plot_addit_params["add_ptid_label"] = self.plot_prj_add_pt_id_label.isChecked()
-        plot_addit_params["polygon_class_colors"] = self.intersected_polygon_classification_colors
-        plot_addit_params["plane_attitudes_styles"] = self.plane_attitudes_styles
-
-        profile_window = plot_geoprofiles(
-            self.input_geoprofiles,
-            plot_addit_params
-        )
-        self.profile_windows.append(profile_window)
+        self.plot_profiles()
 
     def classification_colors(self, dialog):
 
@@ -2632,18 +2754,15 @@ class QProfQWidget(QWidget):
         line_proj_crs_MultiLine2D_list = extract_multiline2d_list(structural_line_layer, on_the_fly_projection,
                                                                        project_crs)
 
-        # calculated Point intersection list
-        intersection_point_id_list = calculate_profile_lines_intersection(line_proj_crs_MultiLine2D_list,
-                                                                          id_list,
-                                                                          geoprofile.original_line)
-
-        # sort intersection points by spat_distance from profile start point
-        lstDistancesFromProfileStart = intersection_distances_by_profile_start_list(geoprofile.original_line,
-                                                                                         intersection_point_id_list)
+        # calculated intersections, sorted by distance from the profile start point
+        intersections = profile_lines_intersections(line_proj_crs_MultiLine2D_list,
+                                                    id_list,
+                                                    geoprofile.original_line)
 
         # create CartesianPoint from intersection with source DEM
-        lstIntersectionPoints = [pt2d for pt2d, _ in intersection_point_id_list]
-        lstIntersectionIds = [pt_id for _, pt_id in intersection_point_id_list]
+        lstDistancesFromProfileStart = [distance for distance, _, _ in intersections]
+        lstIntersectionPoints = [pt2d for _, pt2d, _ in intersections]
+        lstIntersectionIds = [pt_id for _, _, pt_id in intersections]
         lstIntersectionPoints3d = intersect_with_dem(demLayer, demParams, on_the_fly_projection, project_crs,
                                                             lstIntersectionPoints)
         lstIntersectionColors = [color] * len(lstIntersectionPoints)
@@ -2653,17 +2772,7 @@ class QProfQWidget(QWidget):
 
         # plot profiles
 
-        plot_addit_params = dict()
-        plot_addit_params["add_trendplunge_label"] = self.plot_prj_add_trendplunge_label.isChecked()
-        plot_addit_params["add_ptid_label"] = self.plot_prj_add_pt_id_label.isChecked()
-        plot_addit_params["polygon_class_colors"] = self.intersected_polygon_classification_colors
-        plot_addit_params["plane_attitudes_styles"] = self.plane_attitudes_styles
-
-        profile_window = plot_geoprofiles(
-            self.input_geoprofiles,
-            plot_addit_params
-        )
-        self.profile_windows.append(profile_window)
+        self.plot_profiles()
 
     def save_projected_line_styles(self):
 
@@ -2844,6 +2953,54 @@ class QProfQWidget(QWidget):
                     'trend field': str(self.proj_point_indivax_trend_fld_comboBox.currentText()),
                     'plunge field': str(self.proj_point_indivax_plunge_fld_comboBox.currentText())}
 
+    def struct_pts_section_swath(self, structural_layer_crs):
+        """
+        Swath of the structural points to project: the maximum distance from the section
+        and the rectangle enclosing the swath, in the structural layer CRS.
+
+        :param structural_layer_crs: qgis._core.QgsCoordinateReferenceSystem
+        :return: tuple of float and QgsRectangle, or of two None when all the points are projected
+        """
+
+        if not self.proj_point_max_dist_choice.isChecked():
+            return None, None
+
+        max_distance = float(self.proj_point_max_dist_SpinBox.value())
+
+        sect_pt_1, sect_pt_2 = self.input_geoprofiles.geoprofile(0).original_line.pts
+
+        swath_rect = QgsRectangle(min(sect_pt_1.x, sect_pt_2.x) - max_distance,
+                                  min(sect_pt_1.y, sect_pt_2.y) - max_distance,
+                                  max(sect_pt_1.x, sect_pt_2.x) + max_distance,
+                                  max(sect_pt_1.y, sect_pt_2.y) + max_distance)
+
+        on_the_fly_projection, project_crs = get_on_the_fly_projection(self.canvas)
+        if on_the_fly_projection and structural_layer_crs != project_crs:
+            swath_rect = project_rectangle(swath_rect, project_crs, structural_layer_crs)
+
+        return max_distance, swath_rect
+
+    def struct_pts_in_swath(self, structural_pts_attrs, structural_layer_crs, max_distance):
+        """
+        Flags of the structural points within the maximum distance from the section.
+
+        :param structural_pts_attrs: list of records, starting with the point x and y values
+        :param structural_layer_crs: qgis._core.QgsCoordinateReferenceSystem
+        :param max_distance: float
+        :return: numpy.array of bool
+        """
+
+        xs = [float(rec[0]) for rec in structural_pts_attrs]
+        ys = [float(rec[1]) for rec in structural_pts_attrs]
+
+        on_the_fly_projection, project_crs = get_on_the_fly_projection(self.canvas)
+        if on_the_fly_projection and structural_layer_crs != project_crs:
+            xs, ys = project_xy_arrays(xs, ys, structural_layer_crs, project_crs)
+
+        sect_pt_1, sect_pt_2 = self.input_geoprofiles.geoprofile(0).original_line.pts
+
+        return points_segment_distances_2d(xs, ys, sect_pt_1.x, sect_pt_1.y, sect_pt_2.x, sect_pt_2.y) <= max_distance
+
     def check_post_profile(self) -> Tuple[bool, str]:
 
         correct, err_msg = self.check_pre_profile()
@@ -2926,11 +3083,24 @@ class QProfQWidget(QWidget):
         structural_field_list = self.get_current_combobox_values(self.flds_prj_point_comboBoxes)
         isRHRStrike = self.qrbtPlotPrjUseRhrStrike.isChecked()
 
+        # optional swath: only the points within the maximum distance from the section are projected
+        max_distance, swath_rect = self.struct_pts_section_swath(structural_layer_crs)
+
         # retrieve selected structural points with their attributes
         # original version
         # THIS ONE CHECKS IF SELECTED ATTRIBUTES >0
-        structural_pts_attrs = pt_geoms_attrs(structural_layer, structural_field_list)
+        structural_pts_attrs = pt_geoms_attrs(structural_layer, structural_field_list, swath_rect)
+
+        in_swath = None
+        if max_distance is not None:
+            in_swath = self.struct_pts_in_swath(structural_pts_attrs, structural_layer_crs, max_distance)
+            structural_pts_attrs = [rec for (rec, is_in_swath) in zip(structural_pts_attrs, in_swath) if is_in_swath]
 
+        if not structural_pts_attrs:
+            warn(self,
+                 self.plugin_name,
+                 "No structural point to project")
+            return
 
 
         # list of structural points with original crs
@@ -2970,27 +3140,19 @@ class QProfQWidget(QWidget):
         if mapping_method['method'] == 'individual axes':
             trend_field_name, plunge_field_name = mapping_method['trend field'], mapping_method['plunge field']
             # retrieve structural points mapping axes        
-            mapping_method['individual_axes_values'] = vect_attrs(structural_layer,
-                                                                  [trend_field_name, plunge_field_name])
+            individual_axes_values = vect_attrs(structural_layer,
+                                                [trend_field_name, plunge_field_name],
+                                                swath_rect)
+            if in_swath is not None:
+                individual_axes_values = [rec for (rec, is_in_swath) in zip(individual_axes_values, in_swath) if is_in_swath]
+            mapping_method['individual_axes_values'] = individual_axes_values
 
         geoprofile.add_plane_attitudes(map_struct_pts_on_section(structural_data, self.section_data, mapping_method))
         self.plane_attitudes_styles.append((marker_symbol, marker_size, color, line_width, transparency))
 
         # plot profiles
 
-        plot_addit_params = dict()
-        #plot_addit_params["label_projected_lines"] = self.project_line_add_labels.isChecked()
-        #plot_addit_params["projected_lines_class_colors"] = self.projected_lines_classification_colors
-        plot_addit_params["add_trendplunge_label"] = self.plot_prj_add_trendplunge_label.isChecked()
-        plot_addit_params["add_ptid_label"] = self.plot_prj_add_pt_id_label.isChecked()
-        plot_addit_params["polygon_class_colors"] = self.intersected_polygon_classification_colors
-        plot_addit_params["plane_attitudes_styles"] = self.plane_attitudes_styles
-
-        profile_window = plot_geoprofiles(
-            self.input_geoprofiles,
-            plot_addit_params
-        )
-        self.profile_windows.append(profile_window)
+        self.plot_profiles()
 
     def reset_struct_point_projection(self):
 
@@ -2998,6 +3160,7 @@ class QProfQWidget(QWidget):
             geoprofile = self.input_geoprofiles.geoprofile(0)
             geoprofile.projected_attitudes = []
             self.plane_attitudes_styles = []
+            self.refresh_profile_view()
         except:
             pass
 
@@ -3199,62 +3362,23 @@ class QProfQWidget(QWidget):
 
         # Projection parameters part
 
-        # create projection vector
+        # projection axis
 
         trend = float(self.common_axis_line_trend_SpinBox.value())
         plunge = float(self.common_axis_line_plunge_SpinBox.value())
-        axis_versor = GAxis(trend, plunge).as_gvect().versor()
-        l, m, n = axis_versor.x, axis_versor.y, axis_versor.z
 
         # calculation of Cartesian plane expressing section plane
 
         self.section_data = self.calculate_section_data_dictionary()
 
-        # project the multiline points onto the section
-
-        points3d_projected_onto_section = [] # note: result may contain None instances
-
-        for multiline_3d in multiline_3d_proj_crs_list:
-            for line_3d in multiline_3d.lines:
-                for pt_3d in line_3d.pts:
-                    srcPt = pt_3d
-                    param_line = ParamLine3D(srcPt, l, m, n)
-                    points3d_projected_onto_section.append(
-                        param_line.intersect_cartes_plane(
-                            self.section_data['cartes_plane']
-                        )
-                    )
+        # project the multiline points onto the section,
+        # obtaining multilines with signed distances from the section start and z values
 
-        # create again the multiline 3D list structure of points onto the section
-        # using the 3D points with the project CRS
-
-        ndx = -1
-        multiline_3d_proj_crs_section_list = []
-        for multiline_3d in multiline_3d_proj_crs_list:
-            multiline_3d_list = []
-            for line_3d in multiline_3d.lines:
-                line_3d_pts_list = []
-                for _ in line_3d.pts:
-                    ndx += 1
-                    line_3d_pts_list.append(points3d_projected_onto_section[ndx])
-                multiline_3d_list.append(Line(line_3d_pts_list))
-            multiline_3d_proj_crs_section_list.append(MultiLine(multiline_3d_list))
-
-        # parse the multiline 3D list into a structure that can be used for profile plotting
-
-        section_start_point, section_vector = self.section_data['init_pt'], self.section_data['vector']
-
-        multilines2d = []
-        for multiline_3d in multiline_3d_proj_crs_section_list:
-            multiline_2d_list = []
-            for line_3d in multiline_3d.lines:
-                line_2d_pts_list = []
-                for pt_3d in line_3d.pts:
-                    s = calculate_distance_with_sign(pt_3d, section_start_point, section_vector)
-                    z = pt_3d.z
-                    line_2d_pts_list.append(Point(s, z))
-                multiline_2d_list.append(Line(line_2d_pts_list))
-            multilines2d.append(MultiLine(multiline_2d_list))
+        multilines2d = project_multilines_on_section(
+            multiline_3d_proj_crs_list,
+            self.section_data,
+            trend,
+            plunge)
 
         geoprofile.add_curves(
             multilines2d,
@@ -3266,25 +3390,14 @@ class QProfQWidget(QWidget):
 
         # plot profiles
 
-        plot_addit_params = dict()
-        #plot_addit_params["label_projected_lines"] = self.project_line_add_labels.isChecked()
-        #plot_addit_params["categorize_projected_lines"] = self.classified_colors_choice_radiobutton.isChecked()
-        plot_addit_params["add_trendplunge_label"] = self.plot_prj_add_trendplunge_label.isChecked()
-        plot_addit_params["add_ptid_label"] = self.plot_prj_add_pt_id_label.isChecked()
-        plot_addit_params["polygon_class_colors"] = self.intersected_polygon_classification_colors
-        plot_addit_params["plane_attitudes_styles"] = self.plane_attitudes_styles
-
-        profile_window = plot_geoprofiles(
-            self.input_geoprofiles,
-            plot_addit_params
-        )
-        self.profile_windows.append(profile_window)
+        self.plot_profiles()
 
     def reset_structural_lines_projection(self):
 
         try:
             geoprofile = self.input_geoprofiles.geoprofile(0)
             geoprofile.projected_lines = []
+            self.refresh_profile_view()
         except:
             pass
 
@@ -3567,9 +3680,9 @@ class QProfQWidget(QWidget):
         geoprofile = self.input_geoprofiles.geoprofile(0)
         for projected_lines in geoprofile.projected_lines:
             for curve, rec_id in zip(projected_lines.multilines2d, projected_lines.ids):
-                for line in curve.projected_lines:
-                    for pt in line.pts:
-                        data_list.append([rec_id, pt.x, pt.y])
+                for line in curve.lines:
+                    for s, z in zip(line.x_list, line.y_list):
+                        data_list.append([rec_id, s, z])
         return data_list
 
     def export_parse_lineintersections(self, profile_intersection_pts):
@@ -3763,6 +3876,11 @@ class QProfQWidget(QWidget):
         except:
             pass
 
+        try:
+            QgsProject.instance().layerRemoved.disconnect(dem_tile_cache.remove_layer)
+        except:
+            pass
+
 
 class SourceDEMsDialog(QDialog):
 
@@ -4398,7 +4516,7 @@ class FigureExportDialog(QDialog):
 
         # output file parameters
 
-        output_file_groupBox = QGroupBox(self.tr("Output file - available formats: tif, pdf, svg"))
+        output_file_groupBox = QGroupBox(self.tr("Output file - available formats: png, tif, pdf, svg"))
 
         output_file_layout = QGridLayout()
 
@@ -4409,6 +4527,15 @@ class FigureExportDialog(QDialog):
         self.figure_outpath_QPushButton.clicked.connect(self.define_figure_outpath)
         output_file_layout.addWidget(self.figure_outpath_QPushButton, 3, 1, 1, 1)
 
+        self.batch_export_QCheckBox = QCheckBox(self.tr("Batch export: a numbered file for each set of profiles"))
+        output_file_layout.addWidget(self.batch_export_QCheckBox, 4, 0, 1, 1)
+
+        self.profiles_per_file_QSpinBox = QSpinBox()
+        self.profiles_per_file_QSpinBox.setPrefix(self.tr("profiles per file: "))
+        self.profiles_per_file_QSpinBox.setRange(1, 100)
+        self.profiles_per_file_QSpinBox.setValue(1)
+        output_file_layout.addWidget(self.profiles_per_file_QSpinBox, 4, 1, 1, 1)
+
         output_file_groupBox.setLayout(output_file_layout)
 
         layout.addWidget(output_file_groupBox)
@@ -4507,7 +4634,7 @@ blank height space = %f""" % (float(self.figure_width_inches_QLineEdit.text()),
 
     def define_figure_outpath(self):
 
-        outfile_path = new_file_path(self, "Create", "", "Images (*.svg *.pdf *.tif)")
+        outfile_path = new_file_path(self, "Create", "", "Images (*.svg *.pdf *.tif *.png)")
 
         if not outfile_path:
             return
@@ -4864,6 +4991,16 @@ class StatisticsDialog(QDialog):
                 for ln_ndx, (x, y) in enumerate(zip(resampled_line_xs, resampled_line_ys)):
                    stat_report += "\n{}, {}, {}".format(ln_ndx+1, x, y)
 
+        cache_stats = dem_tile_cache.statistics()
+        stat_report += "\n\nDEM tile cache"
+        stat_report += "\n\t - hits: {}".format(cache_stats["hits"])
+        stat_report += "\n\t - misses: {}".format(cache_stats["misses"])
+        stat_report += "\n\t - evictions: {}".format(cache_stats["evictions"])
+        stat_report += "\n\t - cached tiles: {} ({} x {} cells)".format(
+            cache_stats["tiles"], cache_stats["tile_size"], cache_stats["tile_size"])
+        stat_report += "\n\t - memory: {:.1f} / {:.1f} MB".format(
+            cache_stats["size_bytes"] / 1048576.0, cache_stats["max_bytes"] / 1048576.0)
+
         self.text_widget.insertPlainText(stat_report)
 
         layout.addWidget(self.text_widget)
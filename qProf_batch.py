@@ -0,0 +1,302 @@
+
+"""
+Batch creation of topographic profiles, without the QGIS GUI.
+
+Line files are read via OGR and DEMs via GDAL, and the profiles are created
+with the same pipeline of the plugin (densification, DEM sampling, distances and slopes)
+and exported with the same writers.
+
+Command-line usage example:
+
+    python -m qProf.qProf_batch traces.shp --dem dem_a.tif --dem dem_b.tif --sample-distance 5 --output-dir out --format csv --format point
+"""
+
+from builtins import zip
+
+import argparse
+import os
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from osgeo import ogr
+except ImportError:
+    import ogr
+
+from .gis_utils.profile import *
+from .gis_utils.gdal_utils import GDALDEM, osr_project_xy_arrays, read_line_shapefile_via_ogr
+
+from .config.settings import *
+
+from .qProf_export import *
+
+
+batch_output_formats = {
+    "csv": ("csv", "_topography.csv"),
+    "point": ("shapefile - point", "_topography_pt.shp"),
+    "line": ("shapefile - line", "_topography_ln.shp")
+}
+
+
+def read_profile_lines(line_path):
+    """
+    Read the profile lines from a line file.
+
+    :param line_path: str
+    :return: tuple of list of Line and osgeo.osr.SpatialReference (or None)
+    :raise: OGRIOException - lines not readable
+    """
+
+    result = read_line_shapefile_via_ogr(line_path)
+    if not result['success']:
+        raise OGRIOException("{}: {}".format(line_path, result['error_message']))
+
+    profile_lines = [Line(line_points) for line_points in result['vertices']]
+    if not profile_lines or min([line.num_pts for line in profile_lines]) < 2:
+        raise OGRIOException("{}: each profile line must have at least two points".format(line_path))
+
+    return profile_lines, result['spatial_reference']
+
+
+def topoline_from_gdal_dem(resampled_trace2d, trace_srs, dem, chunk_num_pts=profile_chunk_num_pts):
+    """
+    Create the 3D topographic line, in the trace spatial reference,
+    sampling the GDAL DEM at the points of the resampled trace, one chunk at a time.
+
+    :param resampled_trace2d: ArrayLine
+    :param trace_srs: osgeo.osr.SpatialReference, or None
+    :param dem: GDALDEM
+    :param chunk_num_pts: int
+    :return: ArrayLine
+    """
+
+    def sample_zs(xs, ys):
+
+        xs, ys = osr_project_xy_arrays(xs, ys, trace_srs, dem.spatial_reference)
+
+        return dem.interpolate_z_array(xs, ys)
+
+    return sample_topoline(resampled_trace2d, sample_zs, chunk_num_pts)
+
+
+def batch_topoprofiles(
+        source_profile_lines,
+        trace_srs,
+        dems,
+        sample_distance,
+        invert_profile=False,
+        num_workers=profile_max_workers
+) -> List[ProfileElevations]:
+    """
+    Create the topographic profiles of the profile lines from GDAL DEMs,
+    as topoprofiles_from_dems_parallel does for QGIS layers.
+    The results are in the same order as the source profile lines.
+
+    :param source_profile_lines: list of Line
+    :param trace_srs: osgeo.osr.SpatialReference of the profile lines, or None
+    :param dems: list of GDALDEM
+    :param sample_distance: float
+    :param invert_profile: bool
+    :param num_workers: number of worker threads
+    :return: list of ProfileElevations
+    """
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+
+        resampled_lines = list(executor.map(
+            lambda profile_line: resample_profile_line(profile_line, sample_distance, invert_profile),
+            source_profile_lines))
+
+        # one task for each (profile line, DEM) pair
+
+        dem_topolines_futures = [[executor.submit(
+            topoline_from_gdal_dem,
+            resampled_line,
+            trace_srs,
+            dem) for dem in dems]
+            for resampled_line in resampled_lines]
+
+        # GDALDEM instances act both as the DEM layers and as their raster parameters
+
+        return [topoprofiles_from_topolines(
+            resampled_line,
+            [future.result() for future in dem_topoline_futures],
+            dems,
+            dems) for (resampled_line, dem_topoline_futures) in
+            zip(resampled_lines, dem_topolines_futures)]
+
+
+def export_batch_topoprofiles(
+        topo_profiles_list,
+        dem_names,
+        out_format,
+        outfile_path,
+        sr
+):
+    """
+    Export the topographic profiles, with the writers used by the plugin for all the DEMs.
+
+    :param topo_profiles_list: list of ProfileElevations
+    :param dem_names: list of str
+    :param out_format: "csv", "shapefile - point" or "shapefile - line"
+    :param outfile_path: str
+    :param sr: osgeo.osr.SpatialReference, or None
+    :return: tuple of success (bool) and message
+    """
+
+    header_list = multidems_header_list(dem_names)
+    geoprofiles_topography_data = [parse_topo_profiles_data(topo_profiles) for topo_profiles in topo_profiles_list]
+
+    if out_format == "csv":
+        return write_topography_multidems_csv(
+            outfile_path,
+            header_list,
+            None,
+            None,
+            geoprofiles_topography_data)
+
+    # existing shapefiles cannot be overwritten by the OGR driver
+
+    shape_driver = ogr.GetDriverByName("ESRI Shapefile")
+    if os.path.exists(outfile_path):
+        shape_driver.DeleteDataSource(str(outfile_path))
+
+    if out_format == "shapefile - point":
+        return write_topography_multidems_ptshp(
+            outfile_path,
+            header_list,
+            dem_names,
+            None,
+            None,
+            geoprofiles_topography_data,
+            sr)
+    elif out_format == "shapefile - line":
+        return write_topography_multidems_lnshp(
+            outfile_path,
+            header_list,
+            dem_names,
+            None,
+            None,
+            geoprofiles_topography_data,
+            sr)
+    else:
+        return False, "Output format {} not available".format(out_format)
+
+
+def run_batch_profiles(
+        line_paths,
+        dem_paths,
+        sample_distance,
+        output_dir,
+        output_formats=("csv",),
+        invert_profile=False,
+        num_workers=profile_max_workers
+):
+    """
+    Create and export the topographic profiles of each line file.
+    The outputs of a line file are named after it, in the output directory.
+
+    :param line_paths: list of str
+    :param dem_paths: list of str
+    :param sample_distance: float
+    :param output_dir: str
+    :param output_formats: keys of batch_output_formats
+    :param invert_profile: bool
+    :param num_workers: number of worker threads
+    :return: list of (path, success, message) tuples, for each output file or failed line file
+    """
+
+    assert sample_distance > 0.0
+
+    dems = [GDALDEM(dem_path) for dem_path in dem_paths]
+    dem_names = [dem.name() for dem in dems]
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    results = []
+    for line_path in line_paths:
+
+        try:
+
+            profile_lines, trace_srs = read_profile_lines(line_path)
+
+            estimated_profiles_memory = estimated_profiles_bytes(profile_lines, sample_distance, len(dems))
+            if estimated_profiles_memory > profile_memory_budget:
+                raise Exception("the profiles require about {:.1f} MB (limit is {:.1f} MB)".format(
+                    estimated_profiles_memory / 1048576.0, profile_memory_budget / 1048576.0))
+
+            topo_profiles_list = batch_topoprofiles(
+                profile_lines,
+                trace_srs,
+                dems,
+                sample_distance,
+                invert_profile,
+                num_workers)
+
+        except Exception as e:
+
+            results.append((line_path, False, "Error with profile calculation: {}".format(e)))
+            continue
+
+        line_name = os.path.splitext(os.path.basename(line_path))[0]
+
+        for output_format in output_formats:
+
+            out_format, suffix = batch_output_formats[output_format]
+            outfile_path = os.path.join(output_dir, line_name + suffix)
+
+            success, msg = export_batch_topoprofiles(
+                topo_profiles_list,
+                dem_names,
+                out_format,
+                outfile_path,
+                trace_srs)
+
+            results.append((outfile_path, success, msg))
+
+    return results
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description="Create topographic profiles from line files and DEMs, without the QGIS GUI")
+
+    parser.add_argument("lines", nargs="+", help="line files with the profile traces")
+    parser.add_argument("--dem", action="append", required=True, help="DEM raster (repeat for multiple DEMs)")
+    parser.add_argument("--sample-distance", type=float, required=True, help="profile sample distance")
+    parser.add_argument("--output-dir", default=".", help="output directory")
+    parser.add_argument("--format", action="append", choices=sorted(batch_output_formats),
+                        help="output format (repeat for multiple formats, default csv)")
+    parser.add_argument("--invert", action="store_true", help="invert the profile orientation")
+    parser.add_argument("--workers", type=int, default=profile_max_workers, help="number of worker threads")
+
+    args = parser.parse_args(argv)
+
+    if args.sample_distance <= 0.0:
+        parser.error("sample distance must be positive")
+
+    try:
+        results = run_batch_profiles(
+            args.lines,
+            args.dem,
+            args.sample_distance,
+            args.output_dir,
+            args.format or ["csv"],
+            args.invert,
+            max(args.workers, 1))
+    except Exception as e:
+        print("Batch profiles not created: {}".format(e))
+        return 1
+
+    for path, success, msg in results:
+        print("{}: {}".format(path, msg if success else "failed - {}".format(msg)))
+
+    return 0 if all([success for (_, success, _) in results]) else 1
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -5,12 +5,16 @@ from builtins import map
 from builtins import range
 
 import os
+import unicodedata
+from math import isnan
 
 try:
     from osgeo import ogr
 except ImportError:
     import ogr
 
+from .config.output import dem_header_common
+
 
 def preprocess_labels(
         labels,
@@ -29,6 +33,82 @@ def preprocess_labels(
     return labels, orders
 
 
+def parse_topo_profiles_data(
+        topo_profiles
+):
+    """
+    Convert the topographic profiles from DEMs into output records,
+    each one with id, x, y, 2D distance and, for each DEM,
+    elevation, 3D distance and slope. Nan values become empty strings.
+
+    :param topo_profiles: ProfileElevations
+    :return: list of lists
+    """
+
+    # definition of output results
+
+    xs = topo_profiles.planar_xs
+    ys = topo_profiles.planar_ys
+    elev_list = topo_profiles.profile_zs
+    cumdist2Ds = topo_profiles.profile_s
+    cumdist3Ds = topo_profiles.profile_s3ds
+    slopes = topo_profiles.profile_dirslopes
+
+    elevs_zipped = list(zip(*elev_list))
+    cumdist3Ds_zipped = list(zip(*cumdist3Ds))
+    slopes_zipped = list(zip(*slopes))
+
+    parsed_data = []
+    rec_id = 0
+    for x, y, cum_2d_dist, zs, cum3d_dists, slopes \
+            in zip(
+        xs,
+        ys,
+        cumdist2Ds,
+        elevs_zipped,
+        cumdist3Ds_zipped,
+        slopes_zipped):
+
+        rec_id += 1
+        record = [rec_id, x, y, cum_2d_dist]
+        for z, cum3d_dist, slope in zip(zs, cum3d_dists, slopes):
+            if isnan(z):
+                z = ''
+            if isnan(cum3d_dist):
+                cum3d_dist = ''
+            if isnan(slope):
+                slope = ''
+            record += [z, cum3d_dist, slope]
+        parsed_data.append(record)
+
+    return parsed_data
+
+
+def multidems_header_list(
+        dem_names
+):
+    """
+    Field names for the export of topographic profiles from multiple DEMs.
+
+    :param dem_names: list of str
+    :return: list of str
+    """
+
+    dem_headers = []
+    cum3ddist_headers = []
+    slopes_headers = []
+    for ndx in range(len(dem_names)):
+        dem_headers.append(
+            unicodedata.normalize('NFKD', str(dem_names[ndx][:10])).encode('ascii', 'ignore').decode("utf-8") )
+        cum3ddist_headers.append("cds3d_" + str(ndx + 1))
+        slopes_headers.append("slopd_" + str(ndx + 1))
+
+    return dem_header_common + [name for sublist in
+                                zip(dem_headers, cum3ddist_headers, slopes_headers) for
+                                name in
+                                sublist]
+
+
 def write_rubberband_profile_lnshp(fileName, header_list, points, sr):
 
     shape_driver_name = "ESRI Shapefile"
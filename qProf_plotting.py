@@ -3,15 +3,25 @@ from typing import Dict
 
 import random
 
+import sys
+import copy
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
 
 import numpy as np
 
 from matplotlib import gridspec
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 from.gis_utils.qgs_tools import *
 from .gis_utils.profile import *
 from .mpl_utils.mpl_widget import *
 
+from .config.settings import figure_export_max_workers
+
 
 lines_colors = [
     "darkseagreen",
@@ -45,20 +55,20 @@ def plot_structural_attitude(
     color,
     line_width: numbers.Integral,
     transparency: numbers.Real,
-) -> None:
+) -> list:
 
-    # TODO:  manage case for possible nan z values
-    projected_z = [structural_attitude.pt_3d.z for structural_attitude in structural_attitude_list if
-                   0.0 <= structural_attitude.sign_hor_dist <= section_length]
+    # only the attitudes within the section are plotted
+
+    in_section_attitudes = [structural_attitude for structural_attitude in structural_attitude_list if
+                            0.0 <= structural_attitude.sign_hor_dist <= section_length]
 
     # TODO:  manage case for possible nan z values
-    projected_s = [structural_attitude.sign_hor_dist for structural_attitude in structural_attitude_list if
-                   0.0 <= structural_attitude.sign_hor_dist <= section_length]
+    projected_z = np.array([structural_attitude.pt_3d.z for structural_attitude in in_section_attitudes])
+    projected_s = np.array([structural_attitude.sign_hor_dist for structural_attitude in in_section_attitudes])
 
-    projected_ids = [structural_attitude.id for structural_attitude in structural_attitude_list if
-                     0.0 <= structural_attitude.sign_hor_dist <= section_length]
+    projected_ids = [structural_attitude.id for structural_attitude in in_section_attitudes]
 
-    axes.plot(
+    attitude_markers, = axes.plot(
         projected_s,
         projected_z,
         linewidth=0,
@@ -70,32 +80,41 @@ def plot_structural_attitude(
         alpha=transparency,
     )
 
-    # plot segments representing structural data
+    # plot segments representing structural data, all together
 
-    for structural_attitude in structural_attitude_list:
-        if 0.0 <= structural_attitude.sign_hor_dist <= section_length:
-            structural_segment_s, structural_segment_z = define_plot_structural_segment(structural_attitude,
-                                                                                        section_length,
-                                                                                        vertical_exaggeration)
+    structural_segments = define_plot_structural_segments(
+        projected_s,
+        projected_z,
+        [structural_attitude.slope_rad for structural_attitude in in_section_attitudes],
+        [structural_attitude.dwnwrd_sense == "left" for structural_attitude in in_section_attitudes],
+        section_length,
+        vertical_exaggeration)
 
-            axes.plot(
-                structural_segment_s,
-                structural_segment_z,
-                '-',
-                linewidth=line_width,
-                color=color,
-                alpha=transparency,
-            )
+    artists = [attitude_markers]
+
+    artists.append(plot_segments(
+        axes,
+        structural_segments,
+        color,
+        linewidth=line_width,
+        alpha=transparency
+    ))
 
     if plot_addit_params["add_trendplunge_label"] or plot_addit_params["add_ptid_label"]:
 
-        src_dip_dirs = [structural_attitude.src_geol_plane.dd for structural_attitude in
-                        structural_attitude_list if 0.0 <= structural_attitude.sign_hor_dist <= section_length]
-        src_dip_angs = [structural_attitude.src_geol_plane.da for structural_attitude in
-                        structural_attitude_list if 0.0 <= structural_attitude.sign_hor_dist <= section_length]
+        src_dip_dirs = [structural_attitude.src_geol_plane.dd for structural_attitude in in_section_attitudes]
+        src_dip_angs = [structural_attitude.src_geol_plane.da for structural_attitude in in_section_attitudes]
+
+        # optionally, overlapping labels are dropped
+
+        if plot_addit_params["thin_labels"]:
+            label_ndxs = thinned_label_ndxs(axes, projected_s, projected_z)
+        else:
+            label_ndxs = range(len(in_section_attitudes))
 
-        for rec_id, src_dip_dir, src_dip_ang, s, z in zip(projected_ids, src_dip_dirs, src_dip_angs, projected_s,
-                                                          projected_z):
+        for ndx in label_ndxs:
+
+            rec_id, src_dip_dir, src_dip_ang = projected_ids[ndx], src_dip_dirs[ndx], src_dip_angs[ndx]
 
             if plot_addit_params["add_trendplunge_label"] and plot_addit_params["add_ptid_label"]:
                 if ((src_dip_dir == 0) and (src_dip_ang==0)):
@@ -111,22 +130,21 @@ def plot_structural_attitude(
                 else:
                     label = "%03d/%02d" % (src_dip_dir, src_dip_ang)
 
-
-
-            axes.annotate(
+            artists.append(axes.annotate(
                 label,
-                (s + 15, z + 15),
+                (projected_s[ndx] + 15, projected_z[ndx] + 15),
                 color=color,
                 alpha=transparency,
 
-            )
-
+            ))
 
+    return artists
 
 
 def plot_lines_in_section(
     axes,
-    section_lines: SectionLines
+    section_lines: SectionLines,
+    thin_labels=False
 ):
 
     multilines2d = section_lines.multilines2d
@@ -140,45 +158,71 @@ def plot_lines_in_section(
     else:
         colors = color_style
 
+    # lines are grouped by color, each group being plotted as a single collection
+
+    color_lines = dict()
+    labels = []
+
     for ndx, (multiline_2d, classification_id) in enumerate(zip(multilines2d, multilines_ids)):
 
+        if isinstance(colors, list):
+            if plot_as_categorized:
+                color = colors[ndx]
+            else:
+                color = colors[0]
+        elif isinstance(colors, dict):
+            if classification_id in colors:
+                color = colors[classification_id]
+            else:
+                color = list(colors.values())[0]
+
         for line_2d in multiline_2d.lines:
 
-            if not plot_labels:
+            line_xs, line_ys = line_2d.x_list, line_2d.y_list
+            if len(line_xs) == 0:
+                continue
 
-                label = ""
+            color_lines.setdefault(repr(color), (color, []))[1].append(np.column_stack((line_xs, line_ys)))
 
-            else:
+            if plot_labels and classification_id is not None and classification_id != "":
+                labels.append((classification_id, line_xs[0], line_ys[0]))
 
-                label = classification_id
+    artists = [plot_segments(
+        axes,
+        lines,
+        color
+    ) for color, lines in color_lines.values()]
 
-            if isinstance(colors, list):
-                if plot_as_categorized:
-                    color = colors[ndx]
-                else:
-                    color = colors[0]
-            elif isinstance(colors, dict):
-                if classification_id in colors:
-                    color = colors[classification_id]
-                else:
-                    color = list(colors.values())[0]
+    if not labels:
+        return artists
 
-            plot_line(
-                axes,
-                line_2d.x_list,
-                line_2d.y_list,
-                color,
-                name=label
-            )
+    if thin_labels:
+        label_ndxs = thinned_label_ndxs(axes, [x for (_, x, _) in labels], [y for (_, _, y) in labels])
+    else:
+        label_ndxs = range(len(labels))
+
+    for ndx in label_ndxs:
+
+        label, x, y = labels[ndx]
+        artists.append(axes.annotate(label, xy=(x, y), xycoords='data',
+                                     xytext=(-40, 25), textcoords='offset points',
+                                     size=8,
+                                     arrowprops=dict(arrowstyle="fancy",
+                                                     fc="0.6", ec="none",
+                                                     connectionstyle="angle3,angleA=0,angleB=-90")))
+
+    return artists
 
 #FUNCTION THAT PLOTS LINES ONTO THE CS
 def plot_profile_lines_intersection_points(axes, profile_lines_intersection_points):
 
+    artists = []
+
     for s, pt3d, intersection_id, color in profile_lines_intersection_points:
-        axes.plot(s, pt3d.z, 'o', color=color)
+        artists += axes.plot(s, pt3d.z, 'o', color=color)
 
         if str(intersection_id).upper() != "NULL" or str(intersection_id) != '':
-            axes.annotate(str(intersection_id), (s + 25, pt3d.z + 25))
+            artists.append(axes.annotate(str(intersection_id), (s + 25, pt3d.z + 25)))
             # Adding an arrow pointing to the plot location with text behind it
             # The arrow starts at the intersection point and points towards the plot location
             # The text is placed behind the arrow
@@ -188,9 +232,11 @@ def plot_profile_lines_intersection_points(axes, profile_lines_intersection_poin
                               #patchB=line,
                               connectionstyle="angle3,angleA=0,angleB=-90")
 
-            axes.annotate('', xy=(s, pt3d.z), xytext=(s + 25, pt3d.z + 25), arrowprops=arrow_properties)
+            artists.append(axes.annotate('', xy=(s, pt3d.z), xytext=(s + 25, pt3d.z + 25), arrowprops=arrow_properties))
             #axes.text(s + 25, pt3d.z + 25, 'Text behind arrow', fontsize=10, ha='center')
 
+    return artists
+
 
 def plot_profile_polygon_intersection_line(
         plot_addit_params,
@@ -207,7 +253,7 @@ def plot_profile_polygon_intersection_line(
     else:
         color = plot_addit_params["polygon_class_colors"][str(classification)]
 
-    plot_along_main_line(
+    return plot_along_main_line(
         axes,
         s_list,
         z_list,
@@ -218,212 +264,798 @@ def plot_profile_polygon_intersection_line(
     )
 
 
-def plot_geoprofiles(
-    geoprofiles,
-    plot_addit_params,
-    slope_padding=0.2
-):
+class ProfileFigure(object):
+    """
+    Topographic profiles of (some of) the geoprofiles of a set, plotted on a matplotlib figure,
+    with the geological overlays (outcrops, attitudes, projected lines and lineament intersections)
+    on the elevation axes.
+    The overlays can be synchronized with the geoprofiles after changes.
+    """
+
+    # whether the topographic lines are plotted with all their points, instead of the axes width detail
 
-    def plot_topo_profile_lines(
-        grid_spec,
-        ndx_subplot,
-        topo_type,
-        plot_x_range,
-        plot_y_range,
-        filled_choice
+    full_line_detail = False
+
+    def __init__(
+        self,
+        figure,
+        geoprofiles,
+        plot_addit_params,
+        geoprofile_ndxs=None,
+        slope_padding=0.2
     ):
 
-        def create_axes(
-                profile_window,
-                plot_x_range,
-                plot_y_range
-        ):
+        self.figure = figure
+        self.geoprofiles = geoprofiles
 
-            x_min, x_max = plot_x_range
-            y_min, y_max = plot_y_range
-            axes = profile_window.canvas.fig.add_subplot(grid_spec[ndx_subplot])
-            axes.set_xlim(x_min, x_max)
-            axes.set_ylim(y_min, y_max)
-            axes.grid(True)
+        if geoprofile_ndxs is None:
+            geoprofile_ndxs = range(geoprofiles.geoprofiles_num)
+        self.geoprofile_ndxs = list(geoprofile_ndxs)
 
-            return axes
+        # elevation axes, section length and label height, by geoprofile index
 
-        topo_profiles = geoprofile.topo_profiles
-        topoline_colors = plot_params['elev_lyr_colors']
-        topoline_visibilities = plot_params['visible_elev_lyrs']
+        self.elevation_axes = dict()
+        self.section_lengths = dict()
+        self.label_z_values = dict()
 
-        axes = create_axes(
-            profile_window,
-            plot_x_range,
-            plot_y_range)
+        # plotted overlay items with their artists, by item id, for each (geoprofile index, overlay type)
 
-        if plot_params['invert_xaxis']:
-            axes.invert_xaxis()
+        self.overlays = dict()
 
-        if topo_type == 'elevation':
-            ys = topo_profiles.profile_zs
-            plot_y_min = plot_y_range[0]
-        else:
-            if plot_params['plot_slope_absolute']:
-                ys = topo_profiles.absolute_slopes
-            else:
-                ys = topo_profiles.profile_dirslopes
-            plot_y_min = 0.0
+        # plot options each overlay was plotted with, for each (geoprofile index, overlay type)
 
-        s = topo_profiles.profile_s
+        self.overlay_options = dict()
 
-        for y, topoline_color, topoline_visibility in zip(ys, topoline_colors, topoline_visibilities):
+        self.decimated_lines = []
 
-            if topoline_visibility:
+        # the overlays are plotted with the final layout,
+        # since overlapping labels are dropped based on their pixel positions
 
-                if filled_choice:
-                    plot_filled_line(
-                        axes,
-                        s,
-                        y,
-                        plot_y_min,
-                        qcolor2rgbmpl(topoline_color))
+        self.plot_topography(slope_padding)
+        self.set_layout()
+        self.sync_overlays(plot_addit_params)
 
-                plot_along_main_line(
-                    axes,
-                    s,
-                    y,
-                    qcolor2rgbmpl(topoline_color))
+    def set_layout(self):
+        """
+        Fix the final position and aspect of the axes,
+        and plot the topographic lines with the detail fitting the final axes width.
+        """
 
-        return axes
+        for axes in self.figure.axes:
+            axes.apply_aspect()
 
-    # extract/define plot parameters
+        self.set_line_detail(self.full_line_detail)
 
-    plot_params = geoprofiles.plot_params
+    def set_line_detail(self, full_detail=False):
+        """
+        Plot the topographic lines with all their points,
+        or with the detail fitting the axes width.
 
-    set_vertical_exaggeration = plot_params["set_vertical_exaggeration"]
-    vertical_exaggeration = plot_params['vertical_exaggeration']
+        :param full_detail: bool
+        """
 
-    plot_height_choice = plot_params['plot_height_choice']
-    plot_slope_choice = plot_params['plot_slope_choice']
+        for decimated_line in self.decimated_lines:
+            decimated_line.update(full_detail)
 
-    if plot_height_choice:
-        # defines plot min and max values
-        plot_z_min = plot_params['plot_min_elevation_user']
-        plot_z_max = plot_params['plot_max_elevation_user']
+    def plot_topography(self, slope_padding):
 
-    # populate the plot
+        def plot_topo_profile_lines(
+            grid_spec,
+            ndx_subplot,
+            topo_type,
+            plot_x_range,
+            plot_y_range,
+            filled_choice
+        ):
 
-    profile_window = MplWidget('Profile')
+            def create_axes(
+                    figure,
+                    plot_x_range,
+                    plot_y_range
+            ):
 
-    num_subplots = (plot_height_choice + plot_slope_choice)*geoprofiles.geoprofiles_num
-    grid_spec = gridspec.GridSpec(num_subplots, 1)
+                x_min, x_max = plot_x_range
+                y_min, y_max = plot_y_range
+                axes = figure.add_subplot(grid_spec[ndx_subplot])
+                axes.set_xlim(x_min, x_max)
+                axes.set_ylim(y_min, y_max)
+                axes.grid(True)
 
-    ndx_subplot = -1
-    for ndx in range(geoprofiles.geoprofiles_num):
+                return axes
 
-        geoprofile = geoprofiles.geoprofile(ndx)
-        plot_s_min, plot_s_max = 0, geoprofile.topo_profiles.profile_length
+            topo_profiles = geoprofile.topo_profiles
+            topoline_colors = plot_params['elev_lyr_colors']
+            topoline_visibilities = plot_params['visible_elev_lyrs']
 
-        # if slopes are to be calculated and plotted
+            axes = create_axes(
+                self.figure,
+                plot_x_range,
+                plot_y_range)
 
-        if plot_slope_choice:
+            if plot_params['invert_xaxis']:
+                axes.invert_xaxis()
 
-            # defines slope value lists and the min and max values
-            if plot_params['plot_slope_absolute']:
-                slopes = geoprofile.topo_profiles.absolute_slopes
+            if topo_type == 'elevation':
+                ys = topo_profiles.profile_zs
+                plot_y_min = plot_y_range[0]
             else:
-                slopes = geoprofile.topo_profiles.profile_dirslopes
+                if plot_params['plot_slope_absolute']:
+                    ys = topo_profiles.absolute_slopes
+                else:
+                    ys = topo_profiles.profile_dirslopes
+                plot_y_min = 0.0
+
+            s = topo_profiles.profile_s
+
+            for y, topoline_color, topoline_visibility in zip(ys, topoline_colors, topoline_visibilities):
+
+                if topoline_visibility:
 
-            profiles_slope_min = np.nanmin(np.array(list(map(np.nanmin, slopes))))
-            profiles_slope_max = np.nanmax(np.array(list(map(np.nanmax, slopes))))
+                    # long profiles are plotted with the detail allowed by the axes width
 
-            delta_slope = profiles_slope_max - profiles_slope_min
-            plot_slope_min = profiles_slope_min - delta_slope * slope_padding
-            plot_slope_max = profiles_slope_max + delta_slope * slope_padding
+                    self.decimated_lines.append(plot_decimated_line(
+                        axes,
+                        s,
+                        y,
+                        qcolor2rgbmpl(topoline_color),
+                        fill_y_min=plot_y_min if filled_choice else None))
 
-        # plot topographic profile elevations
+            return axes
+
+        geoprofiles = self.geoprofiles
+
+        # extract/define plot parameters
+
+        plot_params = geoprofiles.plot_params
+
+        set_vertical_exaggeration = plot_params["set_vertical_exaggeration"]
+        vertical_exaggeration = plot_params['vertical_exaggeration']
+
+        plot_height_choice = plot_params['plot_height_choice']
+        plot_slope_choice = plot_params['plot_slope_choice']
 
         if plot_height_choice:
-            ndx_subplot += 1
-            axes_elevation = plot_topo_profile_lines(
-                grid_spec,
-                ndx_subplot,
-                'elevation',
-                (plot_s_min, plot_s_max),
-                (plot_z_min, plot_z_max),
-                plot_params['filled_height'])
-            if set_vertical_exaggeration:
-                axes_elevation.set_aspect(vertical_exaggeration)
-            axes_elevation.set_anchor('W')  # align left
-
-        # plot topographic profile slopes
-
-        if plot_slope_choice:
-            ndx_subplot += 1
-            axes_slopes = plot_topo_profile_lines(
-                grid_spec,
-                ndx_subplot,
-                'slope',
-                (plot_s_min, plot_s_max),
-                (plot_slope_min, plot_slope_max),
-                plot_params['filled_slope'])
-            axes_slopes.set_anchor('W')  # align left
+            # defines plot min and max values
+            plot_z_min = plot_params['plot_min_elevation_user']
+            plot_z_max = plot_params['plot_max_elevation_user']
+
+        # populate the plot
+
+        num_subplots = (plot_height_choice + plot_slope_choice)*len(self.geoprofile_ndxs)
+        grid_spec = gridspec.GridSpec(num_subplots, 1)
+
+        ndx_subplot = -1
+        for ndx in self.geoprofile_ndxs:
+
+            geoprofile = geoprofiles.geoprofile(ndx)
+            plot_s_min, plot_s_max = 0, geoprofile.topo_profiles.profile_length
+
+            # if slopes are to be calculated and plotted
+
+            if plot_slope_choice:
+
+                # defines slope value lists and the min and max values
+                if plot_params['plot_slope_absolute']:
+                    slopes = geoprofile.topo_profiles.absolute_slopes
+                else:
+                    slopes = geoprofile.topo_profiles.profile_dirslopes
+
+                profiles_slope_min = np.nanmin(np.array(list(map(np.nanmin, slopes))))
+                profiles_slope_max = np.nanmax(np.array(list(map(np.nanmax, slopes))))
+
+                delta_slope = profiles_slope_max - profiles_slope_min
+                plot_slope_min = profiles_slope_min - delta_slope * slope_padding
+                plot_slope_max = profiles_slope_max + delta_slope * slope_padding
+
+            # plot topographic profile elevations
+
+            axes_elevation = None
+            label_z_value = None
+
+            if plot_height_choice:
+                ndx_subplot += 1
+                axes_elevation = plot_topo_profile_lines(
+                    grid_spec,
+                    ndx_subplot,
+                    'elevation',
+                    (plot_s_min, plot_s_max),
+                    (plot_z_min, plot_z_max),
+                    plot_params['filled_height'])
+                if set_vertical_exaggeration:
+                    axes_elevation.set_aspect(vertical_exaggeration)
+                axes_elevation.set_anchor('W')  # align left
+
+                plot_z_range = plot_z_max - plot_z_min
+                label_z_value = plot_z_min + int(plot_z_range / 40)  # 40 is chosen in an empiric way
+
+            # plot topographic profile slopes
+
+            if plot_slope_choice:
+                ndx_subplot += 1
+                axes_slopes = plot_topo_profile_lines(
+                    grid_spec,
+                    ndx_subplot,
+                    'slope',
+                    (plot_s_min, plot_s_max),
+                    (plot_slope_min, plot_slope_max),
+                    plot_params['filled_slope'])
+                axes_slopes.set_anchor('W')  # align left
+
+            self.elevation_axes[ndx] = axes_elevation
+            self.section_lengths[ndx] = plot_s_max
+            self.label_z_values[ndx] = label_z_value
+
+    def overlay_layers(self, ndx, plot_addit_params):
+        """
+        Overlay types of a geoprofile, each with its current items,
+        the function plotting an item on the elevation axes and returning its artists,
+        and the plot options the plotted items depend on.
+
+        :param ndx: geoprofile index
+        :param plot_addit_params: dict of additional plot parameters
+        :return: list of (overlay type, items, plot function, plot options) tuples
+        """
+
+        geoprofile = self.geoprofiles.geoprofile(ndx)
+        axes = self.elevation_axes[ndx]
 
         # plot geological outcrop intersections
 
-        plot_z_range = plot_z_max - plot_z_min
-        label_z_value = plot_z_min + int(plot_z_range / 40)  # 40 is chosen in an empiric way
+        def plot_outcrop(item_ndx, line_intersection_value):
 
-        if len(geoprofile.intersected_outcrops) > 0:
-            for line_intersection_value in geoprofile.intersected_outcrops:
-                plot_profile_polygon_intersection_line(
-                    plot_addit_params,
-                    axes_elevation,
-                    line_intersection_value,
-                    label_z_value
-                )
+            return plot_profile_polygon_intersection_line(
+                plot_addit_params,
+                axes,
+                line_intersection_value,
+                self.label_z_values[ndx]
+            )
 
         # plot geological attitudes projections
 
-        if geoprofile.projected_attitudes:
-            for plane_attitude_set, attitude_style in zip(geoprofile.projected_attitudes, plot_addit_params["plane_attitudes_styles"]):
-                marker_symbol, marker_size, color, line_width, transparency = attitude_style
-                plot_structural_attitude(
-                    plot_addit_params,
-                    axes_elevation,
-                    plot_s_max,
-                    #vertical_exaggeration,
-                    1,
-                    plane_attitude_set,
-                    marker_symbol=marker_symbol,
-                    marker_size=marker_size,
-                    color=color,
-                    line_width=line_width,
-                    transparency=transparency,
-                )
+        def plot_attitudes(item_ndx, plane_attitude_set):
+
+            marker_symbol, marker_size, color, line_width, transparency = \
+                plot_addit_params["plane_attitudes_styles"][item_ndx]
+            return plot_structural_attitude(
+                plot_addit_params,
+                axes,
+                self.section_lengths[ndx],
+                #vertical_exaggeration,
+                1,
+                plane_attitude_set,
+                marker_symbol=marker_symbol,
+                marker_size=marker_size,
+                color=color,
+                line_width=line_width,
+                transparency=transparency,
+            )
 
         # plot geological traces projections
 
-        if geoprofile.projected_lines:
+        def plot_projected_lines(item_ndx, geosurface):
 
-            for geosurface in geoprofile.projected_lines:
-                plot_lines_in_section(
-                    axes_elevation,
-                    geosurface
-                )
+            return plot_lines_in_section(
+                axes,
+                geosurface,
+                thin_labels=plot_addit_params["thin_labels"]
+            )
 
         # plot lineament intersections
 
-        if geoprofile.intersected_lineaments:
-            plot_profile_lines_intersection_points(
-                axes_elevation,
-                geoprofile.intersected_lineaments
+        def plot_lineament(item_ndx, intersection):
+
+            return plot_profile_lines_intersection_points(
+                axes,
+                [intersection]
             )
 
-    profile_window.canvas.fig.tight_layout()
-    profile_window.canvas.draw()
+        polygon_class_colors = plot_addit_params["polygon_class_colors"]
+        label_options = (
+            plot_addit_params["add_trendplunge_label"],
+            plot_addit_params["add_ptid_label"],
+            plot_addit_params["thin_labels"])
+
+        return [
+            ('outcrops', geoprofile.intersected_outcrops, plot_outcrop,
+             dict(polygon_class_colors) if polygon_class_colors is not None else None),
+            ('attitudes', geoprofile.projected_attitudes, plot_attitudes, label_options),
+            ('lines', geoprofile.projected_lines, plot_projected_lines, plot_addit_params["thin_labels"]),
+            ('lineaments', geoprofile.intersected_lineaments, plot_lineament, None)
+        ]
+
+    def sync_overlays(self, plot_addit_params):
+        """
+        Synchronize the plotted overlays with the geoprofiles:
+        new overlay items are plotted, removed ones are deleted from the axes.
+        The overlays whose plot options changed are plotted again as a whole.
+
+        :param plot_addit_params: dict of additional plot parameters
+        :return: tuple of the list of new (axes, artist) pairs and whether artists were removed
+        """
+
+        new_artists = []
+        removed_artists = False
+
+        for ndx in self.geoprofile_ndxs:
+
+            axes = self.elevation_axes[ndx]
+            if axes is None:
+                continue
+
+            for overlay_type, items, plot_item, plot_options in self.overlay_layers(ndx, plot_addit_params):
+
+                previous_items = self.overlays.get((ndx, overlay_type), {})
+
+                if (ndx, overlay_type) in self.overlay_options and \
+                        self.overlay_options[(ndx, overlay_type)] != plot_options:
+                    item_ids = set()
+                else:
+                    item_ids = set(id(item) for item in items)
+
+                plotted_items = dict()
+
+                for item_id, (plotted_item, artists) in previous_items.items():
+                    if item_id in item_ids:
+                        plotted_items[item_id] = (plotted_item, artists)
+                    else:
+                        for artist in artists:
+                            artist.remove()
+                        removed_artists = True
+
+                for item_ndx, item in enumerate(items):
+                    if id(item) not in plotted_items:
+                        artists = plot_item(item_ndx, item)
+                        plotted_items[id(item)] = (item, artists)
+                        new_artists += [(axes, artist) for artist in artists]
+
+                self.overlays[(ndx, overlay_type)] = plotted_items
+                self.overlay_options[(ndx, overlay_type)] = plot_options
+
+        return new_artists, removed_artists
+
+
+class ProfileView(ProfileFigure):
+    """
+    Persistent profile window.
+    The topographic profiles are plotted once, while the geological overlays
+    are added to or removed from the existing elevation axes.
+    Added overlays are drawn over the cached rendering of the window (blitting),
+    so that their cost is limited to the new artists.
+    """
+
+    def __init__(
+        self,
+        geoprofiles,
+        plot_addit_params,
+        slope_padding=0.2
+    ):
+
+        self.profile_window = MplWidget('Profile')
+
+        self.background = None
+        self.profile_window.canvas.mpl_connect('draw_event', self.on_draw)
+
+        ProfileFigure.__init__(
+            self,
+            self.profile_window.canvas.fig,
+            geoprofiles,
+            plot_addit_params,
+            slope_padding=slope_padding)
+
+        self.profile_window.canvas.draw()
+
+    def set_layout(self):
+
+        self.figure.tight_layout()
+
+        ProfileFigure.set_layout(self)
+
+    def is_open(self, geoprofiles):
+        """
+        Check whether the view is still shown and plots the given geoprofiles.
+
+        :param geoprofiles: the geoprofiles
+        :return: bool
+        """
+
+        return geoprofiles is self.geoprofiles and self.profile_window.isVisible()
+
+    def on_draw(self, event):
+
+        canvas = self.profile_window.canvas
+        self.background = canvas.copy_from_bbox(canvas.fig.bbox)
+
+    def update_overlays(self, plot_addit_params):
+        """
+        Show the changes of the geological overlays.
+        When items are only added, just their artists are drawn over the cached background,
+        otherwise the window is redrawn.
+
+        :param plot_addit_params: dict of additional plot parameters
+        """
+
+        new_artists, removed_artists = self.sync_overlays(plot_addit_params)
+
+        if not (new_artists or removed_artists):
+            return
+
+        canvas = self.profile_window.canvas
+
+        if removed_artists or self.background is None:
+            canvas.draw()
+            return
+
+        canvas.restore_region(self.background)
+        for axes, artist in new_artists:
+            axes.draw_artist(artist)
+        canvas.blit(canvas.fig.bbox)
+
+        self.background = canvas.copy_from_bbox(canvas.fig.bbox)
+
+
+def plot_geoprofiles(
+    geoprofiles,
+    plot_addit_params,
+    slope_padding=0.2
+):
+    """
+    Plot the topographic profiles, together with their geological overlays, in a new profile view.
+
+    :return: ProfileView
+    """
+
+    return ProfileView(
+        geoprofiles,
+        plot_addit_params,
+        slope_padding)
+
+
+def apply_figure_export_params(figure, export_params):
+    """
+    Apply the figure export parameters to a figure:
+    width (with the figure aspect preserved), tick label font size and subplot spacing.
+
+    :param figure: matplotlib Figure
+    :param export_params: dict of figure export parameters
+    """
+
+    fig_current_width, fig_current_height = figure.get_size_inches()
+    fig_scale_factor = export_params["width_inches"] / fig_current_width
+    figure.set_size_inches(export_params["width_inches"], fig_scale_factor * fig_current_height)
+
+    for axis in figure.axes:
+        for label in (axis.get_xticklabels() + axis.get_yticklabels()):
+            label.set_fontsize(export_params["font_size_pts"])
+
+    figure.subplots_adjust(
+        wspace=export_params["blank_width_space"],
+        hspace=export_params["blank_height_space"],
+        left=export_params["left_space"],
+        right=export_params["right_space"],
+        top=export_params["top_space"],
+        bottom=export_params["bottom_space"])
+
+
+class ExportProfileFigure(ProfileFigure):
+    """
+    Profile figure laid out with the figure export parameters.
+    The topographic lines are exported with all their points, as vector formats are resolution-independent.
+    """
+
+    full_line_detail = True
+
+    def __init__(
+        self,
+        figure,
+        geoprofiles,
+        plot_addit_params,
+        geoprofile_ndxs,
+        export_params
+    ):
+
+        self.export_params = export_params
+
+        ProfileFigure.__init__(
+            self,
+            figure,
+            geoprofiles,
+            plot_addit_params,
+            geoprofile_ndxs)
+
+    def set_layout(self):
+
+        apply_figure_export_params(self.figure, self.export_params)
+
+        ProfileFigure.set_layout(self)
+
+
+def save_profile_figure(
+    geoprofiles,
+    plot_addit_params,
+    geoprofile_ndxs,
+    outfile_path,
+    export_params
+):
+    """
+    Render some geoprofiles, with their geological overlays, on an off-screen (Agg) figure
+    and save it to file. The file format (png, pdf, svg, tif) derives from the file extension.
+
+    :param geoprofiles: the geoprofiles
+    :param plot_addit_params: dict of additional plot parameters
+    :param geoprofile_ndxs: indices of the geoprofiles to plot
+    :param outfile_path: path of the output file
+    :param export_params: dict of figure export parameters, with the figure height in inches
+    :return: tuple of output path, success and message
+    """
+
+    try:
+
+        figure = Figure(
+            figsize=(export_params["width_inches"], export_params["height_inches"]),
+            dpi=export_params["resolution_dpi"])
+        FigureCanvasAgg(figure)
+
+        ExportProfileFigure(
+            figure,
+            geoprofiles,
+            plot_addit_params,
+            geoprofile_ndxs,
+            export_params)
+
+        figure.savefig(outfile_path, dpi=export_params["resolution_dpi"], bbox_inches='tight')
+
+    except Exception as e:
+
+        return outfile_path, False, str(e)
+
+    return outfile_path, True, ""
+
+
+# geoprofiles and plot parameters of the current export worker process, set once by the pool initializer
+_export_geoprofiles = None
+_export_plot_addit_params = None
+
+
+def _init_export_worker(geoprofiles, plot_addit_params):
+
+    global _export_geoprofiles, _export_plot_addit_params
+
+    _export_geoprofiles = geoprofiles
+    _export_plot_addit_params = plot_addit_params
+
+
+def _worker_save_profile_figure(page, export_params):
+
+    outfile_path, geoprofile_ndxs = page
+
+    return save_profile_figure(
+        _export_geoprofiles,
+        _export_plot_addit_params,
+        geoprofile_ndxs,
+        outfile_path,
+        export_params)
+
+
+def plot_snapshot(geoprofiles, plot_addit_params):
+    """
+    Copy of the geoprofiles and of the plot parameters, unaffected by later changes of the originals.
+    The QGIS DEM layers cannot be copied, and are shared with the originals.
+
+    :param geoprofiles: the geoprofiles
+    :param plot_addit_params: dict of additional plot parameters
+    :return: tuple of the copied geoprofiles and plot parameters
+    """
+
+    memo = dict()
+    for geoprofile in geoprofiles.geoprofiles:
+        if geoprofile.topo_profiles is not None:
+            for dem_params in geoprofile.topo_profiles.dem_params:
+                memo[id(dem_params.layer)] = dem_params.layer
+
+    return copy.deepcopy((geoprofiles, plot_addit_params), memo)
+
+
+class ProfileFiguresExport(object):
+    """
+    Export of sets of geoprofiles as figure files, each rendered off-screen,
+    from a snapshot of the geoprofiles taken at creation.
+    On Linux the files are distributed among a pool of forked worker processes,
+    that inherit the snapshot without copying it. The workers are forked at creation,
+    that should happen in the main thread, while the results can be collected from any thread.
+    Elsewhere forking the QGIS process is not safe, and the figures are exported sequentially
+    when the results are collected.
+    """
+
+    def __init__(
+        self,
+        geoprofiles,
+        plot_addit_params,
+        pages,
+        export_params,
+        num_workers=figure_export_max_workers
+    ):
+        """
+        :param geoprofiles: the geoprofiles
+        :param plot_addit_params: dict of additional plot parameters
+        :param pages: list of tuples of output file path and indices of the geoprofiles to plot in it
+        :param export_params: dict of figure export parameters, with the figure height in inches
+        :param num_workers: number of worker processes (1: sequential export)
+        """
+
+        self.geoprofiles, self.plot_addit_params = plot_snapshot(geoprofiles, plot_addit_params)
+        self.pages = pages
+        self.export_params = export_params
+
+        self.executor = None
+        self.page_futures = dict()
+
+        if num_workers <= 1 or len(pages) <= 1 or not sys.platform.startswith('linux'):
+            return
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=min(num_workers, len(pages)),
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_export_worker,
+            initargs=(self.geoprofiles, self.plot_addit_params))
+
+        # with the fork start method all the workers are started at the first submission
+
+        self.page_futures = dict(
+            (self.executor.submit(_worker_save_profile_figure, page, export_params), page_ndx)
+            for page_ndx, page in enumerate(pages))
+
+    def results(self, page_exported=None, is_canceled=None):
+        """
+        Wait for the export of the files, or export them sequentially.
+
+        :param page_exported: optional function called with the number of processed files, after each file
+        :param is_canceled: optional function returning whether the export has been canceled
+        :return: list of tuples of output path, success and message, in the same order as the pages
+        """
+
+        results = [(outfile_path, False, "Export canceled") for (outfile_path, _) in self.pages]
+
+        def canceled():
+
+            return is_canceled is not None and is_canceled()
+
+        def processed(num_processed):
+
+            if page_exported is not None:
+                page_exported(num_processed)
+
+        if self.executor is None:
+
+            for page_ndx, (outfile_path, geoprofile_ndxs) in enumerate(self.pages):
+
+                if canceled():
+                    break
+
+                results[page_ndx] = save_profile_figure(
+                    self.geoprofiles,
+                    self.plot_addit_params,
+                    geoprofile_ndxs,
+                    outfile_path,
+                    self.export_params)
+
+                processed(page_ndx + 1)
+
+            return results
+
+        try:
+
+            for num_processed, future in enumerate(as_completed(self.page_futures)):
+
+                page_ndx = self.page_futures[future]
+
+                try:
+                    results[page_ndx] = future.result()
+                except BrokenProcessPool:
+                    results[page_ndx] = (self.pages[page_ndx][0], False, "Export process terminated abruptly")
+
+                processed(num_processed + 1)
+
+                if canceled():
+                    break
+
+        finally:
+
+            self.close(wait=True)
+
+        # files completed by the running workers after a cancellation are reported as well
+
+        for future, page_ndx in self.page_futures.items():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                results[page_ndx] = future.result()
+
+        return results
+
+    def close(self, wait=False):
+        """
+        Cancel the pending files and stop the worker processes.
+
+        :param wait: bool, whether to wait for the files being exported
+        """
+
+        if self.executor is None:
+            return
+
+        for future in self.page_futures:
+            future.cancel()
+
+        self.executor.shutdown(wait=wait)
+
+
+def export_profile_figures(
+    geoprofiles,
+    plot_addit_params,
+    pages,
+    export_params,
+    num_workers=figure_export_max_workers
+):
+    """
+    Export sets of geoprofiles as figure files, each rendered off-screen (see ProfileFiguresExport).
+
+    :param geoprofiles: the geoprofiles
+    :param plot_addit_params: dict of additional plot parameters
+    :param pages: list of tuples of output file path and indices of the geoprofiles to plot in it
+    :param export_params: dict of figure export parameters, with the figure height in inches
+    :param num_workers: number of worker processes (1: sequential export)
+    :return: list of tuples of output path, success and message, in the same order as the pages
+    """
+
+    return ProfileFiguresExport(
+        geoprofiles,
+        plot_addit_params,
+        pages,
+        export_params,
+        num_workers).results()
+
+
+class ProfileFiguresExportTask(QgsTask):
+    """
+    Background export of sets of geoprofiles as figure files, with progress and cancellation
+    from the QGIS task manager.
+    The export (ProfileFiguresExport) is created, and its worker processes started, in the main thread,
+    and the task only collects its results.
+    The results are passed to a function called in the main thread at the end of the task.
+    """
+
+    def __init__(
+        self,
+        description,
+        figures_export,
+        on_finished
+    ):
+
+        super(ProfileFiguresExportTask, self).__init__(description, QgsTask.CanCancel)
+
+        self.figures_export = figures_export
+        self.pages = figures_export.pages
+        self.on_finished = on_finished
+
+        self.results = []
+        self.exception = None
+
+    def run(self):
+
+        try:
 
-    return profile_window
+            self.results = self.figures_export.results(
+                page_exported=lambda num_processed: self.setProgress(100.0 * num_processed / len(self.pages)),
+                is_canceled=self.isCanceled)
 
+        except Exception as e:
 
+            self.exception = e
+            return False
 
+        return not self.isCanceled()
 
+    def finished(self, result):
 
+        # the worker processes are stopped also when the task was canceled before running
 
+        self.figures_export.close()
 
+        self.on_finished(self)